@@ -0,0 +1,247 @@
+"""
+Бенчмарк DataPipeline / AssignmentEngine / SchedulerReport на синтетическом цехе.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run_benchmarks --sizes 100 1000 10000 --backend numpy pandas
+
+Для каждого размера и backend замеряются этапы (ротация, слоты, каждый тур,
+расформирование/доукомплектование, отчёт): время — в отдельном прогоне без
+трассировки памяти, пик памяти — в прогоне под tracemalloc. Результаты
+пишутся в benchmarks/results/<время>_<git-ревизия>.json и сравниваются
+с предыдущим файлом, чтобы регрессии между версиями были видны сразу.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.synthetic import make_plant
+from scheduler import DataPipeline, AssignmentEngine, SchedulerReport
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+TARGET_WEEK = 10
+
+
+class StageClock:
+    """Собирает (этап, секунды, пик памяти в байтах) последовательных этапов."""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self._name = None
+        self._started = None
+
+    def start(self, name):
+        """Закрывает текущий этап и открывает этап name."""
+        self.stop()
+        self._name = name
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        """Закрывает текущий этап (если он открыт)."""
+        if self._name is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+        self.stages.append((self._name, elapsed, peak))
+        self._name = None
+
+    def engine_progress(self, done, total, text):
+        """progress-callback для AssignmentEngine.run: каждый вызов — новый этап."""
+        if done < total:
+            self.start(f"engine {text}")
+        else:
+            self.stop()
+
+
+def run_once(plant, backend, trace_memory):
+    """Один полный прогон по этапам; возвращает список этапов StageClock."""
+    clock = StageClock(trace_memory)
+
+    clock.start("prepare")
+    pipeline = DataPipeline(
+        plant["workers"].copy(),
+        plant["equipment"],
+        plant["history"][["worker_id", "week", "shift"]],
+        plant["requirements"],
+        plant["plan"],
+    )
+
+    clock.start("rotation")
+    pipeline._build_shift_rotation(TARGET_WEEK)
+
+    clock.start("slots")
+    pipeline.shift_equipment_day = pipeline._create_shift_slots("day", TARGET_WEEK)
+    pipeline.shift_equipment_evening = pipeline._create_shift_slots(
+        "evening", TARGET_WEEK
+    )
+    pipeline.shift_equipment_night = pipeline._create_shift_slots("night", TARGET_WEEK)
+
+    clock.start("engine init")
+    engine = AssignmentEngine(
+        pipeline.shift_candidates,
+        pipeline.shift_equipment_day,
+        pipeline.shift_equipment_evening,
+        pipeline.shift_equipment_night,
+        backend=backend,
+    )
+    engine.run(progress=clock.engine_progress)
+
+    clock.start("report")
+    report = SchedulerReport(
+        shift_equipment_day=engine.shift_equipment_day,
+        shift_equipment_evening=engine.shift_equipment_evening,
+        shift_equipment_night=engine.shift_equipment_night,
+        workers=pipeline.workers,
+        shift_candidates=pipeline.shift_candidates,
+        global_assigned_set=engine.global_assigned,
+        plan_long=pipeline.plan_long,
+    )
+    report.get_final_assignments()
+    report.get_brigade_summary()
+    report.generate_text_summary(TARGET_WEEK)
+    report.problem_brigades()
+    clock.stop()
+
+    return clock.stages
+
+
+def benchmark(n_workers, backend, repeat, seed, n_professions=None):
+    """Замеры для одного размера: лучшее время из repeat и пик памяти."""
+    plant = make_plant(
+        n_workers, week=TARGET_WEEK, seed=seed, n_professions=n_professions
+    )
+
+    best = None
+    for _ in range(repeat):
+        stages = run_once(plant, backend, trace_memory=False)
+        if best is None or sum(s[1] for s in stages) < sum(s[1] for s in best):
+            best = stages
+
+    tracemalloc.start()
+    try:
+        memory = run_once(plant, backend, trace_memory=True)
+    finally:
+        tracemalloc.stop()
+    peaks = {name: peak for name, _, peak in memory}
+
+    return {
+        "n_workers": n_workers,
+        "n_machines": len(plant["equipment"]),
+        "n_professions": n_professions,
+        "backend": backend,
+        "total_s": sum(s[1] for s in best),
+        "peak_bytes": max(peaks.values()),
+        "stages": [
+            {"stage": name, "seconds": seconds, "peak_bytes": peaks.get(name)}
+            for name, seconds, _ in best
+        ],
+    }
+
+
+def git_revision():
+    """Короткий хеш текущего коммита (или 'unknown' вне git)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def previous_results():
+    """Последний сохранённый файл результатов (или None)."""
+    files = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    if not files:
+        return None
+    with open(files[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_results(results, previous):
+    """Печатает таблицу этапов и изменение total относительно previous."""
+    baseline = {}
+    if previous is not None:
+        baseline = {
+            (r["n_workers"], r.get("n_professions"), r["backend"]): r["total_s"]
+            for r in previous["results"]
+        }
+
+    for r in results:
+        key = (r["n_workers"], r.get("n_professions"), r["backend"])
+        line = (
+            f"workers={r['n_workers']:>6} machines={r['n_machines']:>5} "
+            f"backend={r['backend']:<6} total={r['total_s']:8.3f}s "
+            f"peak={r['peak_bytes'] / 2**20:8.1f} MiB"
+        )
+        if key in baseline and baseline[key] > 0:
+            change = (r["total_s"] / baseline[key] - 1) * 100
+            line += f"  ({change:+.1f}% vs {previous['revision']})"
+        print(line)
+        for stage in r["stages"]:
+            print(
+                f"    {stage['stage']:<40} {stage['seconds']:8.4f}s "
+                f"{(stage['peak_bytes'] or 0) / 2**20:8.1f} MiB"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument(
+        "--backend",
+        nargs="+",
+        default=["numpy"],
+        choices=["numpy", "pandas", "optimal"],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--professions",
+        type=int,
+        default=None,
+        help="число типов машин в синтетическом цехе (по умолчанию 3)",
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="не сохранять результаты в results/"
+    )
+    args = parser.parse_args(argv)
+
+    results = [
+        benchmark(n_workers, backend, args.repeat, args.seed, args.professions)
+        for n_workers in args.sizes
+        for backend in args.backend
+    ]
+    previous = previous_results()
+    print_results(results, previous)
+
+    if not args.no_save:
+        revision = git_revision()
+        payload = {
+            "revision": revision,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(RESULTS_DIR, f"{stamp}_{revision}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Генератор синтетического цеха для бенчмарков: workers/equipment/requirements/plan/history."""
+
+import numpy as np
+import pandas as pd
+
+from scheduler import PROFESSIONS
+
+SHIFTS = ["night", "day", "evening"]
+
+# Требования к позициям в формате data/position_requirements.csv
+REQUIREMENTS = pd.DataFrame(
+    [
+        ("flat_printing", 1, 7, "Печатник"),
+        ("flat_printing", 2, 6, "Печатник"),
+        ("flat_printing", 3, 5, "Печатник"),
+        ("flat_printing", 4, 4, "Печатник"),
+        ("inkjet_printing", 1, 5, "Оператор струйной печати"),
+        ("letterpress_printing", 1, 7, "Печатник"),
+        ("letterpress_printing", 2, 6, "Печатник"),
+        ("letterpress_printing", 3, 5, "Печатник"),
+        ("letterpress_printing", 4, 4, "Печатник"),
+    ],
+    columns=["machine_type", "position", "min_rank", "profession_required"],
+)
+
+
+def make_requirements(professions):
+    """
+    REQUIREMENTS плюс по две позиции (min_rank 5 и 4) на каждый тип машины
+    из professions, которого там нет.
+    """
+    extra = [
+        (profession, position, min_rank, "Оператор")
+        for profession in professions
+        if profession not in set(REQUIREMENTS["machine_type"])
+        for position, min_rank in ((1, 5), (2, 4))
+    ]
+    if not extra:
+        return REQUIREMENTS.copy()
+    return pd.concat(
+        [REQUIREMENTS, pd.DataFrame(extra, columns=REQUIREMENTS.columns)],
+        ignore_index=True,
+    )
+
+
+def make_plant(
+    n_workers, n_machines=None, week=10, seed=0, utilization=0.9, n_professions=None
+):
+    """
+    Синтетический цех в формате CSV из data/.
+
+    Args:
+        n_workers: Число работников.
+        n_machines: Число машин (по умолчанию n_workers // 8 — примерно
+            столько, сколько этот штат может укомплектовать в три смены).
+        week: Целевая неделя; история генерируется за week - 1.
+        seed: Зерно генератора случайных чисел.
+        utilization: Доля (машина, смена), запущенных в плане.
+        n_professions: Число типов машин (по умолчанию — PROFESSIONS). Сверх
+            PROFESSIONS добавляются type_NN; смежных профессий у работника в
+            среднем не больше двух, так что навыки остаются разреженными.
+
+    Returns:
+        dict: workers, equipment, requirements, plan, history.
+    """
+    rng = np.random.default_rng(seed)
+    n_machines = n_machines or max(3, n_workers // 8)
+    n_professions = n_professions or len(PROFESSIONS)
+    professions = PROFESSIONS[:n_professions] + [
+        f"type_{k:02d}" for k in range(len(PROFESSIONS), n_professions)
+    ]
+    requirements = make_requirements(professions)
+    requirements = requirements[requirements["machine_type"].isin(professions)]
+
+    # --- Работники: основная профессия с рангом 3..7, смежные — ниже
+    worker_ids = [f"W{i:06d}" for i in range(n_workers)]
+    primary = rng.integers(0, n_professions, n_workers)
+    primary_rank = rng.integers(3, 8, n_workers)
+    ranks = rng.integers(0, 8, (n_workers, n_professions))
+    ranks = np.minimum(ranks, primary_rank[:, None] - 1)
+    skill_share = min(0.5, 2 / n_professions)
+    ranks[rng.random((n_workers, n_professions)) < 1 - skill_share] = 0
+    ranks[np.arange(n_workers), primary] = primary_rank
+
+    workers = pd.DataFrame(
+        {"worker_id": worker_ids, "name": [f"Работник {i}" for i in range(n_workers)]}
+    )
+    for j, profession in enumerate(professions):
+        workers[profession] = ranks[:, j]
+
+    # --- Оборудование
+    machine_types = rng.choice(professions, n_machines)
+    crew = requirements.groupby("machine_type")["position"].count()
+    equipment = pd.DataFrame(
+        {
+            "machine_id": [f"M-{i:05d}" for i in range(n_machines)],
+            "machine_type": machine_types,
+            "operators_needed": crew.reindex(machine_types).to_numpy(),
+        }
+    )
+
+    # --- План на целевую неделю
+    plan = pd.DataFrame({"week": week, "machine_id": equipment["machine_id"]})
+    for shift in SHIFTS:
+        plan[shift] = rng.random(n_machines) < utilization
+
+    # --- История за прошлую неделю: ~95% штата, смены поровну
+    present = rng.random(n_workers) < 0.95
+    history = pd.DataFrame(
+        {
+            "week": week - 1,
+            "shift": rng.choice(SHIFTS, n_workers),
+            "machine_id": "",
+            "position": 0,
+            "worker_id": worker_ids,
+            "name": workers["name"],
+        }
+    )[present].reset_index(drop=True)
+
+    return {
+        "workers": workers,
+        "equipment": equipment,
+        "requirements": requirements.reset_index(drop=True),
+        "plan": plan,
+        "history": history,
+    }
@@ -0,0 +1,292 @@
+"""
+Генерация расписания без GUI (для cron, пакетных запусков и серверов).
+
+Примеры:
+    python cli.py --week 47
+    python cli.py --weeks 47 52 --format csv txt summary --save-history
+    python cli.py --week 47 --sites-dir plants --lending
+    python cli.py --weeks 47 52 --format parquet xlsx
+
+PyQt5 не импортируется. В stdout печатается одна JSON-строка со статусом,
+неделями, файлами и временем этапов; код возврата — EXIT_* ниже.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+from data_cache import load_reference_data
+from export import (
+    EXPORT_FORMATS,
+    EXPORT_REQUIREMENTS,
+    export_schedule,
+    missing_dependencies,
+)
+from history_store import HistoryStore
+from scheduler import generate_range, write_schedule_txt
+from sites import MultiSiteScheduler, load_sites
+from validation import InputValidationError
+
+# Коды возврата
+EXIT_OK = 0
+EXIT_ERROR = 1  # непредвиденная ошибка
+EXIT_USAGE = 2  # неверные аргументы (argparse)
+EXIT_INPUT = 3  # нет или не читаются входные данные
+EXIT_PROBLEMS = 4  # есть проблемные бригады (только с --fail-on-problems)
+
+FORMATS = ("csv", "txt", "summary", "problems") + EXPORT_FORMATS
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    weeks = parser.add_mutually_exclusive_group(required=True)
+    weeks.add_argument("--week", type=int, help="одна целевая неделя")
+    weeks.add_argument(
+        "--weeks",
+        type=int,
+        nargs=2,
+        metavar=("START", "END"),
+        help="диапазон недель включительно",
+    )
+    parser.add_argument("--data-dir", default="data", help="каталог справочников CSV")
+    parser.add_argument(
+        "--sites-dir",
+        default=None,
+        help="несколько площадок: каталог с подкаталогом (справочники и "
+        "history/) на каждую площадку; --data-dir и --history-dir не используются",
+    )
+    parser.add_argument(
+        "--lending",
+        action="store_true",
+        help="с --sites-dir: одалживать работников без позиции другим площадкам",
+    )
+    parser.add_argument(
+        "--history-dir",
+        default=None,
+        help="каталог истории (по умолчанию <data>/history)",
+    )
+    parser.add_argument("--output-dir", default="output", help="каталог результатов")
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        default=["csv", "summary"],
+        choices=FORMATS,
+        help="csv — назначения, txt — расписание для людей, "
+        "summary — текстовая сводка, problems — проблемные бригады; "
+        "parquet/arrow/xlsx — назначения, проблемные бригады и сводка "
+        "бригад за все недели одним файлом на таблицу (xlsx — одна книга); "
+        f"для них: pip install -r {EXPORT_REQUIREMENTS}",
+    )
+    parser.add_argument(
+        "--backend", default="numpy", choices=["numpy", "pandas", "optimal"]
+    )
+    parser.add_argument(
+        "--year",
+        type=int,
+        default=date.today().year,
+        help="год ISO-недель (для дат в txt)",
+    )
+    parser.add_argument(
+        "--txt-file",
+        default=None,
+        help="с форматом txt: все недели в один файл вместо файла на неделю",
+    )
+    parser.add_argument(
+        "--save-history",
+        action="store_true",
+        help="записать сгенерированные недели в историю (как Save в GUI)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="не использовать кеш справочников"
+    )
+    parser.add_argument(
+        "--fail-on-problems",
+        action="store_true",
+        help=f"код {EXIT_PROBLEMS}, если есть неполные или пустые бригады",
+    )
+    return parser
+
+
+def _write_text(path, text, encoding="utf-8"):
+    with open(path, "w", encoding=encoding) as f:
+        f.write(text)
+
+
+def write_outputs(reports, combined, formats, output_dir, year, txt_file=None):
+    """Пишет выбранные форматы по каждой неделе; возвращает список файлов."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    if "txt" in formats:
+        start_dates = {week: date.fromisocalendar(year, week, 1) for week in reports}
+        if txt_file:
+            written += write_schedule_txt(combined, start_dates, path=txt_file)
+        else:
+            written += write_schedule_txt(combined, start_dates, output_dir=output_dir)
+    for week, report in reports.items():
+        if "csv" in formats:
+            path = os.path.join(output_dir, f"week_{week:02d}.csv")
+            report.final_assignments_df.to_csv(path, index=False, encoding="utf-8-sig")
+            written.append(path)
+        if "summary" in formats:
+            path = os.path.join(output_dir, f"summary_{week:02d}.txt")
+            _write_text(path, "\n".join(report.summary_lines) + "\n")
+            written.append(path)
+        if "problems" in formats:
+            path = os.path.join(output_dir, f"problem_brigades_{week:02d}.csv")
+            report.problem_brigades().to_csv(path, index=False, encoding="utf-8-sig")
+            written.append(path)
+    columnar = [f for f in EXPORT_FORMATS if f in formats]
+    if columnar:
+        written += export_schedule(reports, output_dir, columnar)
+    return written
+
+
+def run(args):
+    """Выполняет генерацию; возвращает (код возврата, статус для JSON)."""
+    timings = {}
+    start_week, end_week = args.weeks if args.weeks else (args.week, args.week)
+    status = {"weeks": list(range(start_week, end_week + 1)), "backend": args.backend}
+
+    if args.sites_dir:
+        return run_sites(args, status)
+
+    started = time.perf_counter()
+    try:
+        if args.no_cache:
+            frames = load_reference_data(args.data_dir, cache_path=None)
+        else:
+            frames = load_reference_data(
+                args.data_dir, os.path.join(args.data_dir, ".cache", "reference.pkl")
+            )
+        history = HistoryStore(
+            args.history_dir or os.path.join(args.data_dir, "history"),
+            legacy_csv=os.path.join(args.data_dir, "assignment_history.csv"),
+        )
+    except (OSError, ValueError, KeyError) as e:
+        status.update(status="input_error", error=str(e))
+        return EXIT_INPUT, status
+    timings["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        combined, reports = generate_range(
+            frames["workers"],
+            frames["equipment"],
+            history,
+            frames["requirements"],
+            frames["plan"],
+            start_week,
+            end_week,
+            backend=args.backend,
+            plan_long=frames["plan_long"],
+        )
+    except InputValidationError as e:
+        return _invalid(status, e)
+    timings["generate"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    outputs = write_outputs(
+        reports, combined, set(args.format), args.output_dir, args.year, args.txt_file
+    )
+    if args.save_history:
+        for week, report in reports.items():
+            history.write_week(week, report.final_assignments_df)
+            outputs.append(history.week_path(week))
+    timings["write"] = time.perf_counter() - started
+    return _finish(args, status, reports, combined, outputs, timings)
+
+
+def run_sites(args, status):
+    """Как run, но для всех площадок каталога --sites-dir одним прогоном."""
+    timings = {}
+    start_week, end_week = status["weeks"][0], status["weeks"][-1]
+
+    started = time.perf_counter()
+    try:
+        sites = load_sites(args.sites_dir, use_cache=not args.no_cache)
+    except (OSError, ValueError, KeyError) as e:
+        status.update(status="input_error", error=str(e))
+        return EXIT_INPUT, status
+    status["sites"] = list(sites)
+    timings["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scheduler = MultiSiteScheduler(sites, backend=args.backend, lending=args.lending)
+    try:
+        combined, reports = scheduler.run_range(start_week, end_week)
+    except InputValidationError as e:
+        return _invalid(status, e)
+    timings["generate"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    outputs = write_outputs(
+        reports, combined, set(args.format), args.output_dir, args.year, args.txt_file
+    )
+    if args.save_history:
+        for week, report in reports.items():
+            scheduler.save(week, report)
+            outputs += [site["schedule"].week_path(week) for site in sites.values()]
+    timings["write"] = time.perf_counter() - started
+    return _finish(args, status, reports, combined, outputs, timings)
+
+
+def _invalid(status, error):
+    """Статус input_error со списком проблем входных данных."""
+    issues = error.issues[["severity", "table", "column", "message"]]
+    status.update(
+        status="input_error",
+        error=str(error).splitlines()[0],
+        issues=issues.to_dict(orient="records"),
+    )
+    return EXIT_INPUT, status
+
+
+def _finish(args, status, reports, combined, outputs, timings):
+    """Итоговый статус и код возврата по проблемным бригадам."""
+    problems = {
+        week: len(report.problem_brigades()) for week, report in reports.items()
+    }
+    status.update(
+        status="ok",
+        assignments=len(combined),
+        problem_brigades=problems,
+        outputs=outputs,
+        seconds={name: round(value, 4) for name, value in timings.items()},
+    )
+    if args.fail_on_problems and any(problems.values()):
+        status["status"] = "problems"
+        return EXIT_PROBLEMS, status
+    return EXIT_OK, status
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.weeks and args.weeks[1] < args.weeks[0]:
+        parser.error("--weeks: END должен быть не меньше START")
+    if args.lending and not args.sites_dir:
+        parser.error("--lending: поддерживается только с --sites-dir")
+    missing = missing_dependencies(args.format)
+    if missing:
+        parser.error(
+            f"--format: для выбранных форматов установите {' '.join(missing)} "
+            f"(pip install -r {EXPORT_REQUIREMENTS})"
+        )
+    if args.sites_dir and "txt" in args.format:
+        parser.error("--format txt: не поддерживается с --sites-dir")
+    started = time.perf_counter()
+    try:
+        code, status = run(args)
+    except Exception as e:
+        code, status = EXIT_ERROR, {"status": "error", "error": repr(e)}
+    status["exit_code"] = code
+    status["total_seconds"] = round(time.perf_counter() - started, 4)
+    print(json.dumps(status, ensure_ascii=False))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Бинарный кеш справочников (workers/equipment/requirements/plan) для быстрого старта."""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from scheduler import DataPipeline
+
+# Меняется при любом изменении состава/формата кешируемых данных
+CACHE_SCHEMA_VERSION = 5
+
+REFERENCE_FILES = {
+    "workers": "workers.csv",
+    "equipment": "equipment.csv",
+    "requirements": "position_requirements.csv",
+    "plan": "plan.csv",
+}
+
+
+def _file_hash(path):
+    """SHA-256 содержимого файла."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat(path):
+    """(mtime_ns, size) файла — быстрый признак неизменности."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def reference_fingerprint(data_dir="data"):
+    """
+    (mtime_ns, size) справочников data_dir — дешёвый ключ для проверки,
+    не изменились ли CSV с прошлой загрузки.
+    """
+    return tuple(
+        (name, *_stat(os.path.join(data_dir, file_name)))
+        for name, file_name in REFERENCE_FILES.items()
+    )
+
+
+def _build(paths):
+    """Парсит CSV и выполняет производные вычисления DataPipeline."""
+    frames = {name: pd.read_csv(path) for name, path in paths.items()}
+    professions = DataPipeline.discover_professions(
+        frames["workers"], frames["equipment"]
+    )
+    frames["workers"] = DataPipeline.prepare_workers(frames["workers"], professions)
+    frames["plan_long"] = DataPipeline.build_plan_long(
+        frames["plan"], frames["equipment"]
+    )
+    return frames
+
+
+def _write(cache_path, payload):
+    """Атомарно сохраняет payload в cache_path."""
+    cache_dir = os.path.dirname(cache_path) or "."
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".tmp_", suffix=".pkl")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read(cache_path):
+    """Читает кеш; None, если файла нет, он битый или другой версии схемы."""
+    try:
+        with open(cache_path, "rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(payload, dict) or payload.get("schema") != CACHE_SCHEMA_VERSION:
+        return None
+    return payload
+
+
+def load_reference_data(data_dir="data", cache_path="data/.cache/reference.pkl"):
+    """
+    Возвращает справочники и производные данные, по возможности из кеша.
+
+    Кеш — pickle с версией схемы и отпечатками исходных CSV
+    (mtime/size и SHA-256). Если mtime и размер совпали, CSV не читаются
+    вовсе; если изменился только mtime, а содержимое то же — кеш
+    используется, а отпечатки обновляются. Иначе всё пересобирается.
+    При cache_path=None кеш не читается и не пишется.
+
+    Returns:
+        dict: workers (с primary_profession), equipment,
+        requirements, plan, plan_long — готово для
+        DataPipeline(..., plan_long=...).
+    """
+    paths = {
+        name: os.path.join(data_dir, file_name)
+        for name, file_name in REFERENCE_FILES.items()
+    }
+    if cache_path is None:
+        return _build(paths)
+    stats = {name: _stat(path) for name, path in paths.items()}
+
+    payload = _read(cache_path)
+    if payload is not None and payload.get("sources", {}).keys() == paths.keys():
+        sources = payload["sources"]
+        if all(sources[name]["stat"] == stats[name] for name in paths):
+            return payload["frames"]
+
+        hashes = {name: _file_hash(path) for name, path in paths.items()}
+        if all(sources[name]["hash"] == hashes[name] for name in paths):
+            for name in paths:
+                sources[name]["stat"] = stats[name]
+            _write(cache_path, payload)
+            return payload["frames"]
+    else:
+        hashes = {name: _file_hash(path) for name, path in paths.items()}
+
+    frames = _build(paths)
+    payload = {
+        "schema": CACHE_SCHEMA_VERSION,
+        "sources": {
+            name: {"stat": stats[name], "hash": hashes[name]} for name in paths
+        },
+        "frames": frames,
+    }
+    _write(cache_path, payload)
+    return frames
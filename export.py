@@ -0,0 +1,172 @@
+"""
+Выгрузка расписания в колоночные форматы для расчёта зарплаты и BI.
+
+Parquet и Arrow IPC (нужен pyarrow) и книга XLSX (нужен openpyxl) —
+необязательные зависимости: модуль импортируется без них, а
+export_schedule сообщает, чего не хватает, только когда формат запрошен.
+
+Выгружаются три таблицы: назначения (final_assignments_df), проблемные
+бригады (problem_brigades()) и сводка по бригадам (report). Несколько
+недель пишутся одной операцией: таблицы недель склеиваются, типизируются
+и записываются по одному файлу на таблицу (Parquet/Arrow) или одной книгой
+(XLSX, лист на каждую смену плюс листы бригад).
+"""
+
+import importlib.util
+import os
+
+import pandas as pd
+
+EXPORT_FORMATS = ("parquet", "arrow", "xlsx")
+# Необязательные зависимости форматов; проверенные версии закреплены
+# в EXPORT_REQUIREMENTS (pip install -r requirements-export.txt)
+FORMAT_MODULES = {"parquet": "pyarrow", "arrow": "pyarrow", "xlsx": "openpyxl"}
+EXPORT_REQUIREMENTS = "requirements-export.txt"
+
+SHIFT_ORDER = ["day", "evening", "night"]
+# Столбцы-идентификаторы -> categorical (словарь в Parquet/Arrow)
+CATEGORY_COLUMNS = [
+    "site",
+    "home_site",
+    "machine_id",
+    "machine_type",
+    "worker_id",
+    "name",
+    "status",
+]
+INTEGER_COLUMNS = ["week", "position", "assigned", "required", "missing"]
+
+
+def missing_dependencies(formats):
+    """Модули, которых не хватает для форматов formats (пустой список — всё есть)."""
+    modules = {FORMAT_MODULES[f] for f in formats if f in FORMAT_MODULES}
+    return sorted(m for m in modules if importlib.util.find_spec(m) is None)
+
+
+def typed(df):
+    """
+    Копия df с типами для колоночных форматов: идентификаторы — category,
+    смена — упорядоченная category (day, evening, night), счётчики и
+    номера — int32 (Int32, если есть пропуски).
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column == "shift":
+            df[column] = pd.Categorical(
+                df[column], categories=SHIFT_ORDER, ordered=True
+            )
+        elif column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype("category")
+        elif column in INTEGER_COLUMNS:
+            values = pd.to_numeric(df[column])
+            df[column] = values.astype("Int32" if values.isna().any() else "int32")
+    return df
+
+
+def schedule_tables(reports):
+    """
+    Таблицы выгрузки по отчётам недель, склеенные и типизированные.
+
+    Args:
+        reports: dict {week: SchedulerReport} (как возвращает generate_range)
+            или один SchedulerReport.
+
+    Returns:
+        dict: assignments, problem_brigades, brigades -> DataFrame.
+    """
+    if not isinstance(reports, dict):
+        reports = {None: reports}
+    parts = {"assignments": [], "problem_brigades": [], "brigades": []}
+    for report in reports.values():
+        if report.final_assignments_df is None:
+            report.get_final_assignments()
+        parts["assignments"].append(report.final_assignments_df)
+        parts["problem_brigades"].append(report.problem_brigades())
+        parts["brigades"].append(report._brigades())
+    return {
+        name: typed(pd.concat(frames, ignore_index=True))
+        for name, frames in parts.items()
+    }
+
+
+def _write_arrow(df, path):
+    """Arrow IPC (файловый формат) с сохранением pandas-метаданных."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _write_xlsx(tables, path):
+    """Книга: лист назначений на каждую смену, затем листы бригад."""
+    assignments = tables["assignments"]
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for shift_name in SHIFT_ORDER:
+            rows = assignments[assignments["shift"] == shift_name]
+            rows.to_excel(writer, sheet_name=shift_name, index=False)
+        tables["problem_brigades"].to_excel(
+            writer, sheet_name="problem_brigades", index=False
+        )
+        tables["brigades"].to_excel(writer, sheet_name="brigades", index=False)
+
+
+def export_schedule(reports, output_dir, formats=("parquet",), stem=None):
+    """
+    Пишет назначения, проблемные бригады и сводку бригад всех недель reports
+    в выбранных форматах.
+
+    Файлы: <output_dir>/<таблица>_<stem>.parquet|.arrow и
+    <output_dir>/schedule_<stem>.xlsx; stem по умолчанию — диапазон
+    недель ("47" или "47-52").
+
+    Args:
+        reports: dict {week: SchedulerReport} или один SchedulerReport.
+        output_dir: Каталог результатов.
+        formats: Подмножество EXPORT_FORMATS.
+        stem: Суффикс имён файлов.
+
+    Returns:
+        list: пути записанных файлов.
+
+    Raises:
+        ValueError: неизвестный формат.
+        ImportError: не установлена библиотека формата (pyarrow, openpyxl).
+    """
+    unknown = [f for f in formats if f not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(
+            f"Неизвестный формат выгрузки: {', '.join(unknown)}. "
+            f"Используйте {', '.join(EXPORT_FORMATS)}."
+        )
+    missing = missing_dependencies(formats)
+    if missing:
+        raise ImportError(
+            f"Для выгрузки в {', '.join(formats)} установите: {' '.join(missing)} "
+            f"(pip install -r {EXPORT_REQUIREMENTS})"
+        )
+
+    tables = schedule_tables(reports)
+    if stem is None:
+        weeks = sorted(reports) if isinstance(reports, dict) else []
+        if not weeks:
+            weeks = sorted(tables["brigades"]["week"].unique().tolist()) or ["all"]
+        stem = f"{weeks[0]}" if len(weeks) == 1 else f"{weeks[0]}-{weeks[-1]}"
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for fmt in formats:
+        if fmt == "xlsx":
+            path = os.path.join(output_dir, f"schedule_{stem}.xlsx")
+            _write_xlsx(tables, path)
+            written.append(path)
+            continue
+        for name, df in tables.items():
+            path = os.path.join(output_dir, f"{name}_{stem}.{fmt}")
+            if fmt == "parquet":
+                df.to_parquet(path, index=False)
+            else:
+                _write_arrow(df, path)
+            written.append(path)
+    return written
@@ -0,0 +1,283 @@
+"""Хранилище истории назначений, разбитое по неделям (один CSV на неделю)."""
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+HISTORY_COLUMNS = ["week", "shift", "machine_id", "position", "worker_id", "name"]
+# Столбцы, нужные ротации (DataPipeline), и таблицы последних смен
+ROTATION_COLUMNS = ["worker_id", "week", "shift"]
+
+
+class HistoryStore:
+    """
+    История назначений в каталоге root: `week_<N>.csv` на каждую неделю
+    плюс `index.csv` (week, file, rows) и `last_shift.csv` — последняя
+    известная смена каждого работника (worker_id, week, shift).
+
+    Save перезаписывает только файл своей недели (атомарно, через временный
+    файл и os.replace) и точечно обновляет last_shift.csv; ротация от
+    последней сохранённой недели строится по этой таблице, не открывая
+    файлы недель. Все файлы хранятся в `utf-8-sig`, как и остальные CSV
+    проекта.
+    """
+
+    INDEX_FILE = "index.csv"
+    LAST_SHIFT_FILE = "last_shift.csv"
+
+    def __init__(self, root="data/history", legacy_csv="data/assignment_history.csv"):
+        """
+        Args:
+            root: Каталог с файлами недель.
+            legacy_csv: Единый CSV старого формата; если каталога root ещё
+                нет, история из него разносится по неделям один раз.
+        """
+        self.root = root
+        self._index = None
+        self._last_shifts = None
+        # path -> (mtime_ns, size) на момент чтения/записи: кеш в памяти
+        # сбрасывается, если файл поменял другой процесс (GUI, CLI, сервис)
+        self._stamps = {}
+
+        if not os.path.isdir(root):
+            os.makedirs(root, exist_ok=True)
+            if legacy_csv and os.path.exists(legacy_csv):
+                self._migrate(legacy_csv)
+
+    # --- Индекс -----------------------------------------------------------
+    def _index_path(self):
+        return os.path.join(self.root, self.INDEX_FILE)
+
+    def week_path(self, week):
+        """Путь к файлу недели week."""
+        return os.path.join(self.root, f"week_{int(week):02d}.csv")
+
+    def _stamp(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _fresh(self, path):
+        """Кеш файла path в памяти ещё актуален."""
+        return path in self._stamps and self._stamps[path] == self._stamp(path)
+
+    def _load_index(self):
+        """Читает index.csv (или собирает его по файлам недель)."""
+        path = self._index_path()
+        if self._index is not None and self._fresh(path):
+            return self._index
+
+        self._stamps[path] = self._stamp(path)
+        if os.path.exists(path):
+            index = pd.read_csv(path)
+        else:
+            rows = []
+            for file_name in sorted(os.listdir(self.root)):
+                if file_name.startswith("week_") and file_name.endswith(".csv"):
+                    week = int(file_name[len("week_") : -len(".csv")])
+                    rows.append(
+                        {
+                            "week": week,
+                            "file": file_name,
+                            "rows": len(pd.read_csv(self.week_path(week))),
+                        }
+                    )
+            index = pd.DataFrame(rows, columns=["week", "file", "rows"])
+
+        self._index = index.sort_values("week", ignore_index=True)
+        return self._index
+
+    def _last_shifts_path(self):
+        return os.path.join(self.root, self.LAST_SHIFT_FILE)
+
+    def _load_last_shifts(self):
+        """Читает last_shift.csv (или собирает его один раз по всем неделям)."""
+        path = self._last_shifts_path()
+        if self._last_shifts is not None and self._fresh(path):
+            return self._last_shifts
+
+        self._stamps[path] = self._stamp(path)
+        if os.path.exists(path):
+            last = pd.read_csv(path)
+        else:
+            frames = [self.read_week(week) for week in self.weeks()]
+            last = self._latest_rows(frames)
+            self._atomic_write(last, path)
+        self._last_shifts = last
+        return last
+
+    @staticmethod
+    def _latest_rows(frames):
+        """Последняя строка каждого работника по frames (недели по возрастанию)."""
+        if not frames:
+            return pd.DataFrame(columns=ROTATION_COLUMNS)
+        rows = pd.concat([f[ROTATION_COLUMNS] for f in frames], ignore_index=True)
+        rows = rows[rows["worker_id"].notna()]
+        return rows.drop_duplicates("worker_id", keep="last").reset_index(drop=True)
+
+    def _update_last_shifts(self, week, df):
+        """
+        Обновляет таблицу последних смен после записи недели week: работники
+        недели получают её смену, если у них нет более поздней недели.
+        Старые недели перечитываются только для тех, кто пропал из
+        перезаписанной недели, бывшей для них последней.
+        """
+        last = self._load_last_shifts()
+        rows = self._latest_rows([df.assign(week=week)])
+
+        later = last[last["week"] > week]
+        earlier = last[last["week"] <= week]
+        rows = rows[~rows["worker_id"].isin(later["worker_id"])]
+        in_week = earlier["worker_id"].isin(df["worker_id"])
+        kept = earlier[~in_week & (earlier["week"] < week)]
+        stale = earlier.loc[~in_week & (earlier["week"] == week), "worker_id"]
+
+        recovered = []
+        if not stale.empty:
+            missing = set(stale)
+            for older in reversed([w for w in self.weeks() if w < week]):
+                found = self._latest_rows([self.read_week(older)])
+                found = found[found["worker_id"].isin(missing)]
+                recovered.append(found)
+                missing -= set(found["worker_id"])
+                if not missing:
+                    break
+
+        parts = [kept, *reversed(recovered), later, rows]
+        last = pd.concat(
+            [part for part in parts if not part.empty], ignore_index=True
+        ).reindex(columns=ROTATION_COLUMNS)
+        self._atomic_write(last, self._last_shifts_path())
+        self._last_shifts = last
+
+    def _atomic_write(self, df, path):
+        """Пишет CSV во временный файл рядом и атомарно подменяет path."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp_", suffix=".csv")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8-sig", newline="") as f:
+                df.to_csv(f, index=False)
+            os.replace(tmp_path, path)
+            self._stamps[path] = self._stamp(path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _migrate(self, legacy_csv):
+        """Разносит единый CSV истории по файлам недель."""
+        legacy = pd.read_csv(legacy_csv)
+        for week, week_df in legacy.groupby("week"):
+            self.write_week(week, week_df)
+
+    # --- Публичный API ----------------------------------------------------
+    def weeks(self):
+        """Список сохранённых недель по возрастанию."""
+        return self._load_index()["week"].astype(int).tolist()
+
+    def has_week(self, week):
+        """Есть ли сохранённые назначения за неделю week."""
+        return int(week) in set(self.weeks())
+
+    def read_week(self, week):
+        """Назначения одной недели (пустой DataFrame, если недели нет)."""
+        path = self.week_path(week)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        return pd.read_csv(path)
+
+    def last_shifts(self):
+        """Последняя известная смена каждого работника: worker_id, week, shift."""
+        return self._load_last_shifts().copy()
+
+    def rotation_base(self, week):
+        """
+        Назначения недели week в столбцах ROTATION_COLUMNS — база ротации
+        следующей недели. Для последней сохранённой недели берутся из
+        таблицы последних смен (в памяти) без чтения файла недели.
+        """
+        week = int(week)
+        index = self._load_index()
+        if not index.empty and week == int(index["week"].iloc[-1]):
+            last = self._load_last_shifts()
+            base = last[last["week"] == week]
+            # Строки без работника или с повтором работника в таблицу не
+            # попадают — тогда читается сам файл недели
+            if len(base) == int(index["rows"].iloc[-1]):
+                return base.reset_index(drop=True)
+        return self.read_week(week)[ROTATION_COLUMNS]
+
+    def read_all(self):
+        """Вся история одним DataFrame (для просмотра в GUI)."""
+        frames = [self.read_week(week) for week in self.weeks()]
+        if not frames:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def write_week(self, week, df):
+        """Атомарно записывает (или заменяет) назначения недели week."""
+        week = int(week)
+        self._atomic_write(df, self.week_path(week))
+
+        row = pd.DataFrame(
+            [
+                {
+                    "week": week,
+                    "file": os.path.basename(self.week_path(week)),
+                    "rows": len(df),
+                }
+            ]
+        )
+        index = self._load_index()
+        index = index[index["week"] != week]
+        if not index.empty:
+            row = pd.concat([index, row], ignore_index=True)
+        index = row.sort_values("week", ignore_index=True)
+        self._atomic_write(index, self._index_path())
+        self._index = index
+        self._update_last_shifts(week, df)
+
+
+class HistoryIndex:
+    """
+    История назначений в памяти (один DataFrame), отсортированная по неделе:
+    срез недели — двоичный поиск по массиву недель, O(log n) вместо
+    полного скана столбца. Внутри недели сохраняется исходный порядок строк.
+
+    Интерфейс чтения — как у HistoryStore, поэтому HistoryIndex можно
+    передавать в DataPipeline/generate_range вместо DataFrame истории.
+    """
+
+    def __init__(self, df):
+        order = np.argsort(df["week"].to_numpy(), kind="stable")
+        self.frame = df.iloc[order].reset_index(drop=True)
+        self._week_values = self.frame["week"].to_numpy()
+
+    def _bounds(self, week):
+        lo = np.searchsorted(self._week_values, week, side="left")
+        hi = np.searchsorted(self._week_values, week, side="right")
+        return lo, hi
+
+    def weeks(self):
+        """Список недель по возрастанию."""
+        return pd.unique(self._week_values).astype(int).tolist()
+
+    def has_week(self, week):
+        lo, hi = self._bounds(int(week))
+        return hi > lo
+
+    def read_week(self, week):
+        """Назначения одной недели (срез, без скана)."""
+        lo, hi = self._bounds(int(week))
+        return self.frame.iloc[lo:hi].reset_index(drop=True)
+
+    def rotation_base(self, week):
+        """Назначения недели week в столбцах ROTATION_COLUMNS."""
+        return self.read_week(week)[ROTATION_COLUMNS]
+
+    def last_shifts(self):
+        """Последняя известная смена каждого работника: worker_id, week, shift."""
+        return HistoryStore._latest_rows([self.frame])
@@ -0,0 +1,258 @@
+"""Инкрементальная перегенерация недели после точечной правки плана или состава."""
+
+import pandas as pd
+
+from scheduler import DataPipeline, SchedulerReport, summary_team
+
+SHIFTS = ("day", "evening", "night")
+
+
+def _like(df, reference):
+    """
+    Приводит столбцы df к category-словарям одноимённых столбцов reference,
+    если все значения в словаре есть: тогда concat сохраняет category.
+    """
+    for column in df.columns:
+        dtype = reference[column].dtype if column in reference.columns else None
+        if isinstance(dtype, pd.CategoricalDtype):
+            if df[column].dropna().isin(dtype.categories).all():
+                df[column] = df[column].astype(dtype)
+    return df
+
+
+class IncrementalScheduler:
+    """
+    Применяет к готовому результату недели небольшие изменения
+    (машина включена/выключена в смене, работник убран или добавлен) без
+    полного прогона DataPipeline + AssignmentEngine.
+
+    Пересчитывается только затронутая смена и только затронутые бригады
+    (AssignmentEngine.repair); остальные назначения недели остаются как были.
+    Каждый метод возвращает изменения назначений — DataFrame
+    shift/machine_id/position/worker_before/worker_after.
+    """
+
+    def __init__(self, pipeline, engine, target_week=None):
+        """
+        Args:
+            pipeline: DataPipeline после run(target_week).
+            engine: AssignmentEngine после run() на данных pipeline.
+            target_week: Неделя результата; по умолчанию — неделя последнего
+                pipeline.run (кандидатов на неделе может не быть вовсе).
+
+        Raises:
+            ValueError: неделя не передана и pipeline.run не выполнялся.
+        """
+        if target_week is None:
+            target_week = pipeline.target_week
+        if target_week is None:
+            raise ValueError(
+                "Не известна целевая неделя: выполните pipeline.run(target_week) "
+                "или передайте target_week."
+            )
+        self.pipeline = pipeline
+        self.engine = engine
+        self.target_week = int(target_week)
+
+    # --- Служебное -------------------------------------------------------
+    def _frame(self, shift_name):
+        return getattr(self.engine, f"shift_equipment_{shift_name}")
+
+    def _set_frame(self, shift_name, frame):
+        setattr(self.engine, f"shift_equipment_{shift_name}", frame)
+
+    def _check_shift(self, shift_name):
+        if shift_name not in SHIFTS:
+            raise ValueError(
+                f"Неизвестная смена '{shift_name}'. Используйте {', '.join(SHIFTS)}."
+            )
+
+    def _snapshot(self, shift_name):
+        # Идентификаторы раскодированы: словари category до и после правки
+        # могут различаться, а сравнивать нужно значения
+        snapshot = self._frame(shift_name)[["machine_id", "position", "worker_id"]]
+        return snapshot.astype({"machine_id": object, "worker_id": object})
+
+    def _incomplete_machines(self, shift_name, vacant=False):
+        """
+        Машины смены с вакансиями, где уже кто-то назначен; с vacant=True —
+        и полностью пустые (расформированные) машины.
+        """
+        summary = summary_team(self._frame(shift_name), ["machine_id", "machine_type"])
+        open_slots = summary["assigned"] < summary["required"]
+        if not vacant:
+            open_slots &= summary["assigned"] > 0
+        return summary.loc[open_slots, "machine_id"].tolist()
+
+    def _release(self, shift_name, worker_ids):
+        """Снимает работников с назначений смены (слоты остаются пустыми)."""
+        worker_ids = set(worker_ids)
+        getattr(self.engine, f"assigned_{shift_name}").difference_update(worker_ids)
+        self.engine.global_assigned.difference_update(worker_ids)
+
+    def _repair(self, shift_name, before, machine_ids):
+        """Пересчитывает бригады machine_ids и возвращает изменения."""
+        if machine_ids:
+            self.engine.repair(shift_name, machine_ids)
+        else:
+            self.engine._update_no_position()
+
+        after = self._snapshot(shift_name)
+        keys = ["machine_id", "position"]
+        diff = before.merge(after, on=keys, how="outer", suffixes=("_before", "_after"))
+        before_ids = diff["worker_id_before"].fillna("")
+        changed = before_ids != diff["worker_id_after"].fillna("")
+        diff = diff[changed].rename(
+            columns={
+                "worker_id_before": "worker_before",
+                "worker_id_after": "worker_after",
+            }
+        )
+        diff.insert(0, "shift", shift_name)
+        return diff.reset_index(drop=True)
+
+    # --- Изменения ---------------------------------------------------------
+    def set_machine(self, machine_id, shift_name, works):
+        """
+        Включает (works=True) или выключает машину в смене.
+
+        Включённая машина получает слоты по position_requirements, и они
+        закрываются турами смены. У выключенной машины работники
+        освобождаются и идут на вакансии неполных бригад этой же смены.
+        """
+        self._check_shift(shift_name)
+        frame = self._frame(shift_name)
+        before = self._snapshot(shift_name)
+        present = (frame["machine_id"] == machine_id).any()
+        plan_long = self.pipeline.plan_long
+        in_plan = (
+            (plan_long["machine_id"] == machine_id)
+            & (plan_long["week"] == self.target_week)
+            & (plan_long["shift"] == shift_name)
+        )
+
+        if works:
+            if present:
+                return self._repair(shift_name, before, [])
+            machine = self.pipeline.equipment.loc[
+                self.pipeline.equipment["machine_id"] == machine_id,
+                ["machine_id", "machine_type"],
+            ]
+            if machine.empty:
+                raise KeyError(f"Машина '{machine_id}' не найдена в equipment.")
+            row = machine.iloc[:1].assign(week=self.target_week, shift=shift_name)[
+                ["machine_id", "week", "shift", "machine_type"]
+            ]
+            if not in_plan.any():
+                self.pipeline.plan_long = pd.concat(
+                    [plan_long, _like(row, plan_long)], ignore_index=True
+                )
+            slots = row[["week", "shift", "machine_id", "machine_type"]].merge(
+                self.pipeline.requirements, on="machine_type", how="left"
+            )
+            slots["worker_id"] = None
+            slots = _like(slots, frame)
+            self._set_frame(shift_name, pd.concat([frame, slots], ignore_index=True))
+            return self._repair(shift_name, before, [machine_id])
+
+        if not present:
+            return self._repair(shift_name, before, [])
+        mask = frame["machine_id"] == machine_id
+        self._release(shift_name, frame.loc[mask, "worker_id"].dropna())
+        self._set_frame(shift_name, frame[~mask].reset_index(drop=True))
+        self.pipeline.plan_long = plan_long[~in_plan].reset_index(drop=True)
+        return self._repair(shift_name, before, self._incomplete_machines(shift_name))
+
+    def remove_worker(self, worker_id):
+        """
+        Убирает работника из недели (отсутствие). Его слот закрывается
+        заменой, к его бригаде применяется обычное правило
+        расформирования/доукомплектования.
+        """
+        candidates = self.pipeline.shift_candidates
+        self.pipeline.shift_candidates = candidates[
+            candidates["worker_id"] != worker_id
+        ].reset_index(drop=True)
+        self.engine.shift_candidates = self.pipeline.shift_candidates
+
+        for shift_name in SHIFTS:
+            frame = self._frame(shift_name)
+            mask = frame["worker_id"] == worker_id
+            if not mask.any():
+                continue
+            before = self._snapshot(shift_name)
+            machine_ids = frame.loc[mask, "machine_id"].unique().tolist()
+            frame = frame.copy()
+            frame.loc[mask, "worker_id"] = None
+            self._set_frame(shift_name, frame)
+            self._release(shift_name, [worker_id])
+            return self._repair(shift_name, before, machine_ids)
+
+        # Работник не был назначен: меняется только список без позиции
+        return self._repair(SHIFTS[0], self._snapshot(SHIFTS[0]), [])
+
+    def add_worker(self, worker, shift_name):
+        """
+        Добавляет работника кандидатом в смену shift_name и закрывает им
+        (и другими свободными) вакансии этой смены — и неполных бригад, и
+        пустых машин (бригада, укомплектованная наполовину и меньше, снова
+        расформировывается).
+
+        Args:
+            worker: dict со столбцами workers.csv (worker_id, name, ранги
+                по профессиям). Если работник уже есть в workers (например,
+                убран remove_worker), его строка и навыки заменяются.
+            shift_name: Смена работника на целевой неделе.
+
+        Raises:
+            ValueError: работник уже кандидат этой недели.
+        """
+        self._check_shift(shift_name)
+        professions = self.pipeline.professions
+        row = DataPipeline.prepare_workers(pd.DataFrame([worker]), professions)
+        worker_id = row["worker_id"].iloc[0]
+        candidates = self.pipeline.shift_candidates
+        if (candidates["worker_id"] == worker_id).any():
+            raise ValueError(
+                f"Работник '{worker_id}' уже кандидат недели {self.target_week}."
+            )
+
+        workers = self.pipeline.workers
+        skills = self.pipeline.skills
+        self.pipeline.workers = pd.concat(
+            [workers[workers["worker_id"] != worker_id], row], ignore_index=True
+        )
+        self.pipeline.skills = pd.concat(
+            [
+                skills[skills["worker_id"] != worker_id],
+                DataPipeline.build_skills(row, professions),
+            ],
+            ignore_index=True,
+        )
+
+        candidate = row.assign(week=self.target_week, prev_shift=None, shift=shift_name)
+        candidate = _like(candidate.reindex(columns=candidates.columns), candidates)
+        self.pipeline.shift_candidates = pd.concat(
+            [candidates, candidate], ignore_index=True
+        )
+        self.engine.shift_candidates = self.pipeline.shift_candidates
+
+        before = self._snapshot(shift_name)
+        machine_ids = self._incomplete_machines(shift_name, vacant=True)
+        return self._repair(shift_name, before, machine_ids)
+
+    # --- Итог ------------------------------------------------------------
+    def report(self):
+        """SchedulerReport по текущему состоянию недели."""
+        report = SchedulerReport(
+            shift_equipment_day=self.engine.shift_equipment_day,
+            shift_equipment_evening=self.engine.shift_equipment_evening,
+            shift_equipment_night=self.engine.shift_equipment_night,
+            workers=self.pipeline.workers,
+            shift_candidates=self.pipeline.shift_candidates,
+            global_assigned_set=self.engine.global_assigned,
+            plan_long=self.pipeline.plan_long,
+        )
+        report.get_final_assignments()
+        report.get_brigade_summary()
+        return report
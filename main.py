@@ -1,19 +1,36 @@
 # pyuic5 ui_main_window.ui -o ui_main_window.py
 import sys
 import os
-import pandas as pd
+import threading
 
 # -----------------------------------------------------------------
 # 1. ИМПОРТЫ QT (Используем PyQt5)
 # -----------------------------------------------------------------
 from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox
-from PyQt5.QtCore import QAbstractTableModel, Qt, QDate, QStringListModel
+from PyQt5.QtCore import (
+    QAbstractTableModel,
+    Qt,
+    QDate,
+    QStringListModel,
+    QObject,
+    QThread,
+    pyqtSignal,
+    pyqtSlot,
+)
 
 # Импорт для темной темы
 from PyQt5.QtGui import QPalette, QColor
 
 # Импортируем ООП-классы из scheduler.py
-from scheduler import DataPipeline, AssignmentEngine, SchedulerReport
+from scheduler import (
+    DataPipeline,
+    PipelineMemo,
+    AssignmentEngine,
+    SchedulerReport,
+    GenerationCancelled,
+)
+from history_store import HistoryStore
+from data_cache import load_reference_data
 
 # Импортируем СКОМПИЛИРОВАННЫЙ UI
 from ui_main_window import Ui_MainWindow
@@ -23,39 +40,183 @@ from ui_main_window import Ui_MainWindow
 # 3. HELPER-КЛАСС ДЛЯ PANDAS (вспомогательный)
 # -----------------------------------------------------------------
 class PandasModel(QAbstractTableModel):
-    """Класс-модель для интеграции Pandas DataFrame с QTableView."""
+    """
+    Класс-модель для интеграции Pandas DataFrame с QTableView.
 
-    def __init__(self, data):
+    Столбцы извлекаются из DataFrame один раз, отформатированные строки
+    кешируются, а строки отдаются представлению порциями (canFetchMore /
+    fetchMore), поэтому большие таблицы открываются и прокручиваются быстро.
+    """
+
+    def __init__(self, data, batch_size=1000):
         """Сохраняет DataFrame, который будем отображать в Qt."""
         super().__init__()
         self._data = data
+        self._batch_size = batch_size
+        self._columns = [data.iloc[:, i].array for i in range(data.shape[1])]
+        self._headers = [str(c) for c in data.columns]
+        self._index = data.index
+        self._total_rows = data.shape[0]
+        self._loaded_rows = min(batch_size, self._total_rows)
+        # Кеш строк: по списку на столбец, создаётся при первом обращении
+        self._cache = [None] * data.shape[1]
 
     def rowCount(self, parent=None):
-        """Возвращает количество строк исходного DataFrame."""
-        return self._data.shape[0]
+        """Возвращает количество уже подгруженных строк исходного DataFrame."""
+        if parent is not None and parent.isValid():
+            return 0
+        return self._loaded_rows
 
     def columnCount(self, parent=None):
         """Возвращает количество колонок исходного DataFrame."""
-        return self._data.shape[1]
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self._columns)
+
+    def canFetchMore(self, parent):
+        """Есть ли ещё не подгруженные строки."""
+        if parent.isValid():
+            return False
+        return self._loaded_rows < self._total_rows
+
+    def fetchMore(self, parent):
+        """Подгружает очередную порцию строк."""
+        if parent.isValid():
+            return
+        count = min(self._batch_size, self._total_rows - self._loaded_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, self._loaded_rows, self._loaded_rows + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
+
+    def cell_text(self, row, col):
+        """Строка для ячейки (row, col) с кешированием."""
+        cache = self._cache[col]
+        if cache is None:
+            cache = self._cache[col] = [None] * self._total_rows
+        text = cache[row]
+        if text is None:
+            text = cache[row] = str(self._columns[col][row])
+        return text
 
     def data(self, index, role=Qt.DisplayRole):
         """Форматирует ячейку в строку для отображения в таблице."""
         if not index.isValid():
             return None
         if role == Qt.DisplayRole:
-            return str(self._data.iloc[index.row(), index.column()])
+            return self.cell_text(index.row(), index.column())
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         """Отдаёт заголовки столбцов/строк из исходного DataFrame."""
         if role == Qt.DisplayRole:
             if orientation == Qt.Horizontal:
-                return str(self._data.columns[section])
+                return self._headers[section]
             if orientation == Qt.Vertical:
-                return str(self._data.index[section])
+                return str(self._index[section])
         return None
 
 
+class GenerationWorker(QObject):
+    """Выполняет DataPipeline -> AssignmentEngine -> SchedulerReport в фоновом потоке."""
+
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(
+        self,
+        workers,
+        equipment,
+        schedule,
+        requirements,
+        plan,
+        plan_long,
+        target_week,
+        memo=None,
+    ):
+        """
+        Получает копии исходных DataFrame, чтобы не делить их с GUI-потоком,
+        и PipelineMemo окна (повторный Generate без изменений данных).
+        """
+        super().__init__()
+        self.workers = workers
+        self.equipment = equipment
+        self.schedule = schedule
+        self.requirements = requirements
+        self.plan = plan
+        self.plan_long = plan_long
+        self.target_week = target_week
+        self.memo = memo
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Просит прервать генерацию (проверяется между турами движка)."""
+        self._cancel_event.set()
+
+    @pyqtSlot()
+    def run(self):
+        """Полный цикл генерации; результат отдаётся сигналом finished."""
+        try:
+            self.progress.emit(0, 1, "Подготовка данных")
+            pipeline = DataPipeline(
+                self.workers,
+                self.equipment,
+                self.schedule,
+                self.requirements,
+                self.plan,
+                plan_long=self.plan_long,
+                memo=self.memo,
+            )
+            pipeline.run(self.target_week)
+
+            engine = AssignmentEngine(
+                pipeline.shift_candidates,
+                pipeline.shift_equipment_day,
+                pipeline.shift_equipment_evening,
+                pipeline.shift_equipment_night,
+                backend="numpy",
+                collect_stats=True,
+            )
+
+            engine.run(
+                progress=self.progress.emit,
+                is_cancelled=self._cancel_event.is_set,
+            )
+
+            scheduler_report = SchedulerReport(
+                shift_equipment_day=engine.shift_equipment_day,
+                shift_equipment_evening=engine.shift_equipment_evening,
+                shift_equipment_night=engine.shift_equipment_night,
+                workers=self.workers,
+                shift_candidates=pipeline.shift_candidates,  # DF всех кандидатов
+                global_assigned_set=engine.global_assigned,  # set() всех назначенных
+                plan_long=pipeline.plan_long,
+            )
+
+            scheduler_report.get_final_assignments()
+            scheduler_report.get_brigade_summary()
+
+            # Генерируем текстовый отчет
+            scheduler_report.generate_text_summary(self.target_week)
+
+            self.finished.emit(
+                {
+                    "report": scheduler_report,
+                    "problem_brigades": scheduler_report.problem_brigades(),
+                    "no_position": engine.no_position,
+                    "skills": pipeline.skills,
+                    "stats": engine.stats.to_frame(),
+                }
+            )
+        except GenerationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
 class AppWindow(QMainWindow, Ui_MainWindow):
     """Главное окно приложения: загружает данные и управляет GUI."""
 
@@ -81,11 +242,16 @@ class AppWindow(QMainWindow, Ui_MainWindow):
 
         # 4.3. Загружаем "сырые" данные
         try:
-            self.workers_df = pd.read_csv("data/workers.csv")
-            self.equipment_df = pd.read_csv("data/equipment.csv")
-            self.schedule_df = pd.read_csv("data/assignment_history.csv")
-            self.requirements_df = pd.read_csv("data/position_requirements.csv")
-            self.plan_df = pd.read_csv("data/plan.csv")
+            # Справочники берутся из бинарного кеша, пока CSV не менялись
+            reference = load_reference_data("data")
+            self.workers_df = reference["workers"]
+            self.equipment_df = reference["equipment"]
+            self.requirements_df = reference["requirements"]
+            self.plan_df = reference["plan"]
+            self.plan_long_df = reference["plan_long"]
+            # История по неделям: при первом запуске переносится из
+            # data/assignment_history.csv в data/history/
+            self.history = HistoryStore("data/history", "data/assignment_history.csv")
         except FileNotFoundError as e:
             QMessageBox.critical(
                 self, "Ошибка загрузки", f"Не найден файл: {e.filename}"
@@ -96,9 +262,14 @@ class AppWindow(QMainWindow, Ui_MainWindow):
         self.scheduler_report = None
         self._table_models = {}
         self.summary_model = None
+        self._generation_thread = None
+        self._generation_worker = None
+        # Проверка входа, навыки и подготовка недели между Generate
+        self.pipeline_memo = PipelineMemo()
 
         # Подключение обработчиков событий для кнопок
         self.generate_button.clicked.connect(self.run_full_generation)
+        self.cancel_button.clicked.connect(self.cancel_generation)
         self.save_button.clicked.connect(self.save_results_to_csv)
         self.view_workers_button.clicked.connect(self.view_workers)
         self.view_equipment_button.clicked.connect(self.view_equipment)
@@ -115,93 +286,165 @@ class AppWindow(QMainWindow, Ui_MainWindow):
         table_widget.setModel(model)
         key = table_widget.objectName() or str(id(table_widget))
         self._table_models[key] = model
-        table_widget.resizeColumnsToContents()
+        self._resize_columns_sampled(table_widget, model)
         return model
 
+    def _resize_columns_sampled(self, table_widget, model, sample_rows=200):
+        """
+        Подбирает ширину столбцов по заголовку и первым sample_rows строкам
+        вместо resizeColumnsToContents(), который обходит все ячейки.
+        """
+        metrics = table_widget.fontMetrics()
+        header_metrics = table_widget.horizontalHeader().fontMetrics()
+        rows = min(sample_rows, model.rowCount())
+        padding = 16
+
+        for col in range(model.columnCount()):
+            width = header_metrics.horizontalAdvance(
+                model.headerData(col, Qt.Horizontal)
+            )
+            for row in range(rows):
+                width = max(width, metrics.horizontalAdvance(model.cell_text(row, col)))
+            table_widget.setColumnWidth(col, width + padding)
+
     def run_full_generation(self):
-        """Запускает полный цикл генерации расписания."""
+        """Запускает полный цикл генерации расписания в фоновом потоке."""
+        if self._generation_thread is not None:
+            return
+
         selected_date = self.week_date_edit.date()
         (target_week, _) = selected_date.weekNumber()
 
         if target_week > 0:
-            QMessageBox.information(self, "Генерация", "Генерация запущена")
             # Pipeline использует только идентификаторы и смену
-            required_cols = ["worker_id", "week", "shift"]
-            pipeline = DataPipeline(
-                self.workers_df,
-                self.equipment_df,
-                self.schedule_df[required_cols],
-                self.requirements_df,
-                self.plan_df,
+            worker = GenerationWorker(
+                self.workers_df.copy(),
+                self.equipment_df.copy(),
+                self.history.rotation_base(target_week - 1),
+                self.requirements_df.copy(),
+                self.plan_df.copy(),
+                self.plan_long_df.copy(),
+                target_week,
+                memo=self.pipeline_memo,
             )
-            pipeline.run(target_week)
+            thread = QThread(self)
+            worker.moveToThread(thread)
+
+            thread.started.connect(worker.run)
+            worker.progress.connect(self._on_generation_progress)
+            worker.finished.connect(self._on_generation_finished)
+            worker.failed.connect(self._on_generation_failed)
+            worker.cancelled.connect(self._on_generation_cancelled)
+            for signal in (worker.finished, worker.failed, worker.cancelled):
+                signal.connect(thread.quit)
+            thread.finished.connect(worker.deleteLater)
+            thread.finished.connect(thread.deleteLater)
+            thread.finished.connect(self._on_generation_thread_finished)
+
+            self._generation_thread = thread
+            self._generation_worker = worker
+            self._set_generation_running(True)
+            self.statusbar.showMessage("Генерация запущена")
+            thread.start()
 
-            engine = AssignmentEngine(
-                pipeline.shift_candidates,
-                pipeline.shift_equipment_day,
-                pipeline.shift_equipment_evening,
-                pipeline.shift_equipment_night,
-            )
-
-            engine.run()
-
-            scheduler_report = SchedulerReport(
-                engine.shift_equipment_day,
-                engine.shift_equipment_evening,
-                engine.shift_equipment_night,
-                self.workers_df,
-                pipeline.shift_candidates,  # DF всех кандидатов
-                engine.global_assigned,  # set() всех назначенных
-                pipeline.plan_long,
+        else:
+            QMessageBox.warning(
+                self, "Ошибка", "Не верно задана неделя.\nДопустимые значения 1 - 53"
             )
 
-            scheduler_report.get_final_assignments()
-            scheduler_report.get_brigade_summary()
-
-            # Генерируем текстовый отчет
-            scheduler_report.generate_text_summary(target_week)
-            self.scheduler_report = scheduler_report
-
-            self.final_assignments_df = scheduler_report.final_assignments_df
-            self.problem_brigades = scheduler_report.problem_brigades()
-
-            # Cоздаем модель таблицы
-            self._display_dataframe(self.results_table, scheduler_report.all_shifts)
-            self._display_dataframe(
-                self.results_table_night,
-                scheduler_report.all_shifts[
-                    scheduler_report.all_shifts["shift"] == "night"
-                ],
-            )
-            self._display_dataframe(
-                self.results_table_day,
-                scheduler_report.all_shifts[
-                    scheduler_report.all_shifts["shift"] == "day"
-                ],
-            )
-            self._display_dataframe(
-                self.results_table_evening,
-                scheduler_report.all_shifts[
-                    scheduler_report.all_shifts["shift"] == "evening"
-                ],
-            )
+    def cancel_generation(self):
+        """Просит фоновый поток прервать генерацию."""
+        if self._generation_worker is not None:
+            self._generation_worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.statusbar.showMessage("Отмена генерации...")
+
+    def closeEvent(self, event):
+        """Прерывает фоновую генерацию и дожидается потока перед закрытием окна."""
+        if self._generation_thread is not None:
+            self._generation_worker.cancel()
+            self._generation_thread.quit()
+            self._generation_thread.wait()
+        event.accept()
+
+    def _set_generation_running(self, running):
+        """Переключает кнопки и прогресс на время генерации."""
+        self.generate_button.setEnabled(not running)
+        self.save_button.setEnabled(not running)
+        self.cancel_button.setEnabled(running)
+        if running:
+            self.progress_bar.setRange(0, 1)
+            self.progress_bar.setValue(0)
+
+    def _on_generation_progress(self, done, total, text):
+        """Обновляет прогресс по сигналу из фонового потока."""
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+        self.statusbar.showMessage(text)
+
+    def _on_generation_thread_finished(self):
+        """Сбрасывает ссылки на поток после его завершения."""
+        self._generation_thread = None
+        self._generation_worker = None
+        self._set_generation_running(False)
+
+    def _on_generation_cancelled(self):
+        """Генерация прервана: прежние результаты остаются на экране."""
+        self.statusbar.showMessage("Генерация отменена", 5000)
+
+    def _on_generation_failed(self, message):
+        """Показывает ошибку генерации."""
+        self.statusbar.clearMessage()
+        QMessageBox.critical(
+            self, "Ошибка генерации", f"Не удалось сгенерировать график:\n{message}"
+        )
 
-            col = ["worker_id", "name", "primary_profession", "all_professions"]
-            self._display_dataframe(
-                self.results_table_no_position, engine.no_position[col]
-            )
-            self._display_dataframe(self.problem_brigades_table, self.problem_brigades)
+    def _on_generation_finished(self, result):
+        """Подменяет модели таблиц готовым результатом генерации."""
+        scheduler_report = result["report"]
+        self.scheduler_report = scheduler_report
+
+        self.final_assignments_df = scheduler_report.final_assignments_df
+        self.problem_brigades = result["problem_brigades"]
+
+        # Cоздаем модель таблицы
+        self._display_dataframe(self.results_table, scheduler_report.all_shifts)
+        self._display_dataframe(
+            self.results_table_night,
+            scheduler_report.all_shifts[
+                scheduler_report.all_shifts["shift"] == "night"
+            ],
+        )
+        self._display_dataframe(
+            self.results_table_day,
+            scheduler_report.all_shifts[scheduler_report.all_shifts["shift"] == "day"],
+        )
+        self._display_dataframe(
+            self.results_table_evening,
+            scheduler_report.all_shifts[
+                scheduler_report.all_shifts["shift"] == "evening"
+            ],
+        )
 
-            summary_model = QStringListModel(scheduler_report.summary_lines)
-            self.summary_list.setModel(summary_model)
-            self.summary_model = summary_model
+        no_position = result["no_position"]
+        col = ["worker_id", "name", "primary_profession"]
+        self._display_dataframe(
+            self.results_table_no_position,
+            no_position[col].assign(
+                all_professions=DataPipeline.profession_names(
+                    no_position["worker_id"], result["skills"]
+                )
+            ),
+        )
+        self._display_dataframe(self.problem_brigades_table, self.problem_brigades)
+        self._display_dataframe(self.stats_table, result["stats"])
 
-            QMessageBox.information(self, "Успех", "Генерация выполнена")
+        summary_model = QStringListModel(scheduler_report.summary_lines)
+        self.summary_list.setModel(summary_model)
+        self.summary_model = summary_model
 
-        else:
-            QMessageBox.warning(
-                self, "Ошибка", "Не верно задана неделя.\nДопустимые значения 1 - 53"
-            )
+        self.statusbar.showMessage("Генерация выполнена", 5000)
+        QMessageBox.information(self, "Успех", "Генерация выполнена")
 
     def show_stub_message(self):
         """Показывает сообщение, что функция не готова."""
@@ -221,22 +464,20 @@ class AppWindow(QMainWindow, Ui_MainWindow):
 
     def view_history(self):
         """Показывает историю."""
-        self._display_dataframe(self.data_view_table, self.schedule_df)
+        self._display_dataframe(self.data_view_table, self.history.read_all())
 
     def view_plan(self):
         """Показывает производственный план."""
         self._display_dataframe(self.data_view_table, self.plan_df)
 
-    def load_saved_results(self, file_path="data/assignment_history.csv"):
-        """Перечитывает сохранённый CSV и обновляет таблицу и отчёт."""
+    def load_saved_results(self, current_week):
+        """Перечитывает сохранённую неделю и обновляет таблицу и отчёт."""
         try:
-            df = pd.read_csv(file_path)
+            df = self.history.read_week(current_week)
             self.final_assignments_df = df
-            self.schedule_df = df
 
             # Обновляем текстовый отчёт
             if isinstance(self.scheduler_report, SchedulerReport):
-                current_week = df["week"].max()
                 self.scheduler_report.final_assignments_df = df
                 self.scheduler_report.generate_text_summary(current_week)
                 summary_model = QStringListModel(self.scheduler_report.summary_lines)
@@ -253,36 +494,22 @@ class AppWindow(QMainWindow, Ui_MainWindow):
         """
         if self.final_assignments_df is not None:
             try:
-                # --- Блок 1: Сохранение CSV (без изменений) ---
-                file_path_csv = "data/assignment_history.csv"
+                # --- Блок 1: Сохранение недели в историю (только её файл) ---
                 current_week = self.final_assignments_df["week"].iloc[0]
 
-                if os.path.exists(file_path_csv):
-                    existing = pd.read_csv(file_path_csv)
-
-                    if current_week in existing["week"].unique():
-                        reply = QMessageBox.question(
-                            self,
-                            "Подтверждение перезаписи",
-                            f"Данные за неделю {current_week} уже есть. "
-                            "Перезаписать их в data/assignment_history.csv?",
-                            QMessageBox.Yes | QMessageBox.No,
-                        )
-                        if reply == QMessageBox.No:
-                            return
-
-                        existing = existing[existing["week"] != current_week]
-                        df_to_save = pd.concat(
-                            [existing, self.final_assignments_df], ignore_index=True
-                        )
-                    else:
-                        df_to_save = pd.concat(
-                            [existing, self.final_assignments_df], ignore_index=True
-                        )
-                else:
-                    df_to_save = self.final_assignments_df.copy()
+                if self.history.has_week(current_week):
+                    reply = QMessageBox.question(
+                        self,
+                        "Подтверждение перезаписи",
+                        f"Данные за неделю {current_week} уже есть. "
+                        f"Перезаписать их в {self.history.root}?",
+                        QMessageBox.Yes | QMessageBox.No,
+                    )
+                    if reply == QMessageBox.No:
+                        return
 
-                df_to_save.to_csv(file_path_csv, index=False, encoding="utf-8-sig")
+                self.history.write_week(current_week, self.final_assignments_df)
+                file_path_csv = self.history.week_path(current_week)
 
                 # --- Блок 2: (ИЗМЕНЕН) Сохранение .TXT файла ---
                 file_path_txt = f"output/Расписание_Неделя_{current_week}.txt"
@@ -290,22 +517,22 @@ class AppWindow(QMainWindow, Ui_MainWindow):
                 # Получаем дату из GUI и конвертируем в стандартный тип Python
                 start_date_py = self.week_date_edit.date().toPyDate()
 
-                # Вызываем метод из SchedulerReport
-                txt_content = self.scheduler_report.generate_human_readable_txt(
-                    current_week, start_date_py
-                )
-
+                # Потоковая запись из SchedulerReport прямо в файл
                 saved_txt_path = None
-                if txt_content:
-                    try:
-                        with open(file_path_txt, "w", encoding="utf-8") as f:
-                            f.write(txt_content)
+                try:
+                    with open(file_path_txt, "w", encoding="utf-8") as f:
+                        written = self.scheduler_report.write_human_readable_txt(
+                            f, current_week, start_date_py
+                        )
+                    if written:
                         saved_txt_path = file_path_txt
-                    except Exception as txt_e:
-                        print(f"Не удалось сохранить TXT файл: {txt_e}")
+                    else:
+                        os.remove(file_path_txt)
+                except Exception as txt_e:
+                    print(f"Не удалось сохранить TXT файл: {txt_e}")
 
                 # --- Блок 3: Обновление буфера (без изменений) ---
-                self.load_saved_results(file_path_csv)
+                self.load_saved_results(current_week)
 
                 # --- Блок 4: Сообщение об успехе (без изменений) ---
                 msg = f"Файл CSV сохранен:\n{file_path_csv}\n\n"
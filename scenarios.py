@@ -0,0 +1,131 @@
+"""Сравнение вариантов производственного плана (what-if) в пуле процессов."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from scheduler import DataPipeline, AssignmentEngine, SchedulerReport
+
+# Справочники, загруженные в процесс-исполнитель один раз (см. _init_worker)
+_REFERENCE = {}
+
+
+def _init_worker(workers, equipment, schedule, requirements, backend):
+    """
+    Инициализатор процесса пула: справочники передаются один раз на процесс,
+    а задачи несут только свой вариант плана.
+    """
+    _REFERENCE.update(
+        workers=workers,
+        equipment=equipment,
+        schedule=schedule,
+        requirements=requirements,
+        backend=backend,
+    )
+
+
+def _run_scenario(name, plan, target_week):
+    """Прогоняет один вариант плана и возвращает строку сравнительной таблицы."""
+    pipeline = DataPipeline(
+        _REFERENCE["workers"].copy(),
+        _REFERENCE["equipment"],
+        _REFERENCE["schedule"],
+        _REFERENCE["requirements"],
+        plan,
+    )
+    pipeline.run(target_week)
+
+    engine = AssignmentEngine(
+        pipeline.shift_candidates,
+        pipeline.shift_equipment_day,
+        pipeline.shift_equipment_evening,
+        pipeline.shift_equipment_night,
+        backend=_REFERENCE["backend"],
+    )
+    engine.run()
+
+    report = SchedulerReport(
+        shift_equipment_day=engine.shift_equipment_day,
+        shift_equipment_evening=engine.shift_equipment_evening,
+        shift_equipment_night=engine.shift_equipment_night,
+        workers=pipeline.workers,
+        shift_candidates=pipeline.shift_candidates,
+        global_assigned_set=engine.global_assigned,
+        plan_long=pipeline.plan_long,
+    )
+    report.get_final_assignments()
+    report.get_brigade_summary()
+    problems = report.problem_brigades()
+
+    required = int(report.report["required"].sum())
+    filled = int(report.report["assigned"].sum())
+    return {
+        "scenario": name,
+        "brigades": len(report.report),
+        "required": required,
+        "filled": filled,
+        "vacant": required - filled,
+        "incomplete_brigades": int((problems["status"] == "incomplete").sum()),
+        "empty_brigades": int((problems["status"] == "empty").sum()),
+        "unassigned_workers": len(engine.no_position),
+    }
+
+
+def run_scenarios(
+    workers,
+    equipment,
+    schedule,
+    requirements,
+    plans,
+    target_week,
+    max_workers=None,
+    backend="numpy",
+):
+    """
+    Прогоняет несколько вариантов plan.csv на одной неделе и сравнивает их.
+
+    Справочники (workers/equipment/schedule/requirements) передаются в каждый
+    процесс пула один раз через инициализатор. На Windows вызывать из-под
+    `if __name__ == "__main__":`.
+
+    Args:
+        workers, equipment, schedule, requirements: исходные DataFrame
+            (как в DataPipeline).
+        plans: dict {имя сценария: DataFrame плана}.
+        target_week: Целевая неделя.
+        max_workers: Размер пула; 1 — без пула, в текущем процессе.
+        backend: backend для AssignmentEngine.
+
+    Returns:
+        DataFrame: одна строка на сценарий в порядке plans.
+    """
+    reference = (
+        workers,
+        equipment,
+        schedule[["worker_id", "week", "shift"]],
+        requirements,
+        backend,
+    )
+    names = list(plans)
+
+    if max_workers == 1 or len(names) <= 1:
+        _init_worker(*reference)
+        rows = [_run_scenario(name, plans[name], target_week) for name in names]
+    else:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(names))
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=reference,
+        ) as pool:
+            rows = list(
+                pool.map(
+                    _run_scenario,
+                    names,
+                    [plans[name] for name in names],
+                    [target_week] * len(names),
+                )
+            )
+
+    return pd.DataFrame(rows)
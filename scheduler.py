@@ -1,19 +1,185 @@
+import bisect
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from collections import defaultdict
 from datetime import timedelta
 
+from history_store import HistoryIndex, HistoryStore
+from validation import check_inputs, rank_columns
+from matching import ShiftMatcher
+
+# Профессии поставляемых данных (столбцы рангов data/workers.csv). Рабочий
+# список профессий DataPipeline определяет по equipment.machine_type.
+PROFESSIONS = ["flat_printing", "letterpress_printing", "inkjet_printing"]
+
+# Столбцы разреженной таблицы навыков кандидатов (candidate_skills)
+CANDIDATE_KEYS = ["worker_id", "shift", "primary_profession"]
+
+
+# Ключ бригады в сводках SchedulerReport
+BRIGADE_KEYS = ["week", "shift", "machine_id", "machine_type"]
+
+# Словарь смен для categorical-столбцов. Алфавитный порядок, как и у
+# остальных словарей (sorted): сортировка по кодам совпадает со строковой
+SHIFT_CATEGORIES = ["day", "evening", "night"]
+SHIFT_COLUMNS = ("shift", "prev_shift")
+
+
+def compact(df, columns, dictionaries=None):
+    """
+    Переводит идентификаторы columns (если они есть в df и ещё не category)
+    в pandas category. Словарь — dictionaries[column] (например, все машины
+    equipment, а не только попавшие в план), смены — SHIFT_CATEGORIES,
+    остальные — значения столбца; значения вне словаря в него добавляются,
+    словарь сортируется. Возвращает df.
+    """
+    dictionaries = dictionaries or {}
+    for column in columns:
+        if column not in df.columns or isinstance(
+            df[column].dtype, pd.CategoricalDtype
+        ):
+            continue
+        values = set(df[column].dropna().unique().tolist())
+        if column in dictionaries:
+            values |= set(dictionaries[column])
+        elif column in SHIFT_COLUMNS:
+            values |= set(SHIFT_CATEGORIES)
+        df[column] = df[column].astype(pd.CategoricalDtype(sorted(values)))
+    return df
+
+
+def summary_team(df, group_cols):
+    """
+    Требуемые (заданная position) и назначенные (непустой worker_id) позиции
+    по группам group_cols — одна groupby-сумма по булевым столбцам.
+    """
+    worker_id = df["worker_id"]
+    # Ключи — имена столбцов, а не Series: для Series pandas проверяет
+    # is_in_axis через repr каждого ключа, что дороже самой группировки
+    flags = df[group_cols].assign(
+        required=df["position"].notna(),
+        assigned=worker_id.notna() & (worker_id != ""),
+    )
+    return (
+        flags.groupby(group_cols, observed=True)[["required", "assigned"]]
+        .sum()
+        .reset_index()
+    )
+
+
+def candidate_skills(shift_candidates, professions):
+    """
+    Разреженные навыки кандидатов: строка на (кандидат, профессия) с рангом > 0
+    из professions, со сменой и основной профессией кандидата (CANDIDATE_KEYS).
+    """
+    base = shift_candidates[shift_candidates["worker_id"].notna()]
+    return DataPipeline.build_skills(base, professions, keys=CANDIDATE_KEYS)
+
+
+class PipelineMemo:
+    """
+    LRU-кеш DataPipeline по отпечаткам входных данных: проверка входа и
+    навыки (ключ — справочники и история) и результаты run() (ключ — неделя
+    и отпечатки прошлой недели, plan_long, workers, requirements).
+
+    Принадлежит владельцу, который много раз строит конвейер на одних и
+    тех же данных (сервис, окно GUI), и передаётся в DataPipeline(memo=...);
+    без memo конвейер ничего не запоминает. Хранит копии, отдаёт копии.
+    """
+
+    def __init__(self, size=8):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """Запись по ключу (None, если её нет); запись становится свежей."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Запоминает запись, вытесняя самые старые сверх size."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
 
 class DataPipeline:
     """Готовит рабочие DataFrame для целевой недели."""
 
-    def __init__(self, workers, equipment, schedule, requirements, plan):
+    def __init__(
+        self,
+        workers,
+        equipment,
+        schedule,
+        requirements,
+        plan,
+        plan_long=None,
+        memo=None,
+    ):
         """
         Args:
             workers: DataFrame с персоналом и их навыками.
             equipment: DataFrame с оборудованием и типами машин.
-            schedule: Исторический график (минимум worker_id/week/shift).
+            schedule: Исторический график (минимум worker_id/week/shift),
+                HistoryStore или HistoryIndex — тогда берётся только нужная
+                неделя, без скана всей истории.
             requirements: Требования по минимальному рангу и численности.
             plan: План запуска машин по сменам.
+            plan_long: Готовый длинный план (например, из data_cache). Если
+                передан, workers считаются уже подготовленными
+                (prepare_workers) и _prepare_base_data не выполняется.
+            memo: PipelineMemo владельца. Проверка входа и навыки берутся из
+                него, если справочники и история (DataFrame) не менялись;
+                так же запоминаются результаты run().
+
+        Raises:
+            InputValidationError: во входных данных есть ошибки
+                (validation.validate_inputs); предупреждения — в self.issues.
         """
+        history = schedule if isinstance(schedule, pd.DataFrame) else None
+        self.memo = memo
+        inputs_key = None
+        cached = None
+        if memo is not None:
+            inputs_key = (
+                "inputs",
+                *(
+                    None if df is None else self.fingerprint(df)
+                    for df in (workers, equipment, requirements, plan, plan_long)
+                ),
+                None if history is None else self.fingerprint(history),
+            )
+            cached = memo.get(inputs_key)
+
+        # Проверка входа до любой подготовки: ошибки — сразу исключением
+        # (с ошибками в memo ничего не попадает, повтор проверяется заново)
+        if cached is None:
+            issues = check_inputs(workers, equipment, requirements, plan, history)
+        else:
+            issues, skills = cached
+        self.issues = issues.copy()
+
         # Загрузка датафреймов
         self.workers = workers
         self.equipment = equipment
@@ -22,36 +188,107 @@ class DataPipeline:
         self.plan = plan
 
         # Декларация будущих данных
-        self.plan_long = None
+        self.plan_long = plan_long
+        self.target_week = None
         self.shift_candidates = None
         self.shift_equipment_day = None
         self.shift_equipment_evening = None
         self.shift_equipment_night = None
+        self.memo_hit = False
+
+        # Профессии = типы машин; навыки — разреженная таблица
+        # worker_id/profession/rank (только ранги > 0)
+        self.professions = self.discover_professions(workers, equipment)
+        self.skills = None
 
         # Запускаем подготовку данных
         # - self.workers определяет основную  и смежные професии
         # - self.plan_long -> self.plan_long
         #   1 строка = machine_id, shift, machine_type, week
-        self._prepare_base_data()
-
-    def _prepare_base_data(self):
+        if self.plan_long is None:
+            self._prepare_base_data()
+        if cached is None:
+            skills = self.build_skills(self.workers, self.professions)
+            if memo is not None:
+                memo.put(inputs_key, (issues.copy(), skills.copy()))
+        self.skills = skills.copy()
+
+    @staticmethod
+    def discover_professions(workers, equipment):
         """
-        Выполняет универсальную подготовку данных (добавление профессий,
-        создание 'plan_long').
+        Профессии = типы машин из equipment.machine_type.
+
+        Порядок — как у столбцов рангов в workers (он решает ничьи при выборе
+        основной профессии), затем типы машин без столбца в workers: ранг по
+        ним не задан ни у кого, но слоты таких машин остаются в плане.
         """
-        # --- Блок 1: Подготовка self.workers
-        # Определяем основную профессию
-        cols = ["flat_printing", "letterpress_printing", "inkjet_printing"]
-        self.workers["primary_profession"] = self.workers[cols].idxmax(axis=1)
+        types = pd.unique(equipment["machine_type"].dropna())
+        columns = rank_columns(workers, equipment)
+        listed = set(columns)
+        return columns + [t for t in types if t not in listed]
 
-        # Добавляем все професии работника
-        self.workers["all_professions"] = self.workers.apply(
-            lambda row: [c for c in cols if row[c] > 0], axis=1
+    @staticmethod
+    def build_skills(frame, professions, keys=("worker_id",)):
+        """
+        Разреженные навыки: одна строка (keys..., profession, rank) на каждый
+        ранг > 0 из столбцов professions таблицы frame (формат workers.csv).
+        Столбцы профессий, которых во frame нет, пропускаются; строки идут
+        по профессиям в порядке professions.
+        """
+        keys = list(keys)
+        columns = [p for p in professions if p in frame.columns]
+        if not columns:
+            return pd.DataFrame(columns=keys + ["profession", "rank"])
+        long = frame[keys + columns].melt(
+            id_vars=keys, value_vars=columns, var_name="profession", value_name="rank"
         )
+        return long[long["rank"] > 0].reset_index(drop=True)
 
-        # --- Блок 2: Подготовка self.plan
+    @staticmethod
+    def rank_columns(workers, equipment):
+        """
+        Столбцы рангов workers.csv: столбцы, названные типами машин из
+        equipment (то же определение, что в validate_inputs). Прочие
+        числовые столбцы (стаж, табельные номера) рангами не считаются.
+        """
+        return rank_columns(workers, equipment)
+
+    @staticmethod
+    def prepare_workers(workers, professions):
+        """
+        Добавляет в workers основную профессию — с наибольшим рангом среди
+        столбцов профессий professions (discover_professions или явный
+        список столбцов рангов), при равенстве первую по порядку столбцов
+        workers. Остальные столбцы workers в выборе не участвуют.
+        У работника без единого ранга > 0 основной профессии нет (None).
+        """
+        columns = [c for c in workers.columns if c in set(professions)]
+        rows = workers[columns].assign(row=np.arange(len(workers)))
+        skills = DataPipeline.build_skills(rows, columns, keys=("row",))
+        best = skills.sort_values("rank", ascending=False, kind="stable")
+        best = best.drop_duplicates("row")
+
+        primary = np.full(len(workers), None, dtype=object)
+        primary[best["row"].to_numpy(dtype="int64")] = best["profession"].to_numpy()
+        workers["primary_profession"] = primary
+        return workers
+
+    @staticmethod
+    def profession_names(worker_ids, skills):
+        """Все профессии работников строкой 'prof1, prof2' (для отображения)."""
+        names = skills.groupby("worker_id", sort=False)["profession"].agg(", ".join)
+        return worker_ids.astype(object).map(names).fillna("")
+
+    @staticmethod
+    def build_plan_long(plan, equipment):
+        """
+        Переводит план в длинный формат:
+        1 строка = machine_id, week, shift, machine_type (только работающие).
+        machine_id, shift и machine_type — category: слоты смен наследуют
+        эти словари, и группировки отчёта идут по целочисленным кодам.
+        """
         # Преобразуем в длинный формат
-        plan_long = self.plan.melt(
+        plan_long = plan.melt(
             id_vars=["machine_id", "week"],
             value_vars=["night", "day", "evening"],
             var_name="shift",
@@ -66,12 +303,42 @@ class DataPipeline:
         )
 
         plan_long = plan_long.merge(
-            self.equipment[["machine_id", "machine_type"]], on="machine_id", how="left"
+            equipment[["machine_id", "machine_type"]], on="machine_id", how="left"
+        )
+        return compact(
+            plan_long,
+            ["machine_id", "shift", "machine_type"],
+            {
+                "machine_id": equipment["machine_id"].dropna(),
+                "machine_type": equipment["machine_type"].dropna(),
+            },
         )
 
-        self.plan_long = plan_long
+    def _prepare_base_data(self):
+        """
+        Выполняет универсальную подготовку данных (добавление профессий,
+        создание 'plan_long').
+        """
+        # --- Блок 1: Подготовка self.workers
+        self.prepare_workers(self.workers, self.professions)
 
-    def _build_shift_rotation(self, target_week) -> pd.DataFrame:
+        # --- Блок 2: Подготовка self.plan
+        self.plan_long = self.build_plan_long(self.plan, self.equipment)
+
+    @staticmethod
+    def fingerprint(df):
+        """Отпечаток содержимого DataFrame (столбцы, типы и значения)."""
+        digest = hashlib.sha1(repr(list(df.dtypes.items())).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _previous_week(self, target_week):
+        """Назначения прошлой недели — база ротации."""
+        if isinstance(self.schedule, (HistoryStore, HistoryIndex)):
+            return self.schedule.rotation_base(target_week - 1).copy()
+        return self.schedule.loc[self.schedule["week"] == target_week - 1].copy()
+
+    def _build_shift_rotation(self, target_week, prev=None) -> pd.DataFrame:
         """
         Формирует общий датафрейм кандидатов на target_week для всех смен сразу,
         применяя правило переворота смен:
@@ -80,7 +347,8 @@ class DataPipeline:
         shift_map = {"night": "evening", "day": "night", "evening": "day"}
 
         # Базовый слой — прошлая неделя
-        prev = self.schedule.loc[self.schedule["week"] == target_week - 1].copy()
+        if prev is None:
+            prev = self._previous_week(target_week)
 
         # Сохраним прошлую смену (на всякий случай для анализа)
         prev = prev.rename(columns={"shift": "prev_shift"})
@@ -89,8 +357,12 @@ class DataPipeline:
         prev["shift"] = prev["prev_shift"].map(shift_map)
         prev["week"] = target_week
 
-        # Объединим с данными по работникам
-        self.shift_candidates = prev.merge(self.workers, on="worker_id", how="left")
+        # Объединим с данными по работникам; worker_id и смены — category
+        # (словарь worker_id кандидатов общий с worker_id слотов)
+        self.shift_candidates = compact(
+            prev.merge(self.workers, on="worker_id", how="left"),
+            ["worker_id", "prev_shift", "shift"],
+        )
 
     def _create_shift_slots(self, shift_name, target_week):
         """
@@ -102,21 +374,464 @@ class DataPipeline:
             ["week", "shift", "machine_id", "machine_type"]
         ]
 
-        shift_slots = shift_slots.merge(
-            self.requirements, on="machine_type", how="left"
-        )
-        shift_slots["worker_id"] = None
+        # Ключ requirements приводится к словарю слотов: merge двух
+        # одинаковых category сохраняет category
+        requirements = self.requirements
+        if isinstance(shift_slots["machine_type"].dtype, pd.CategoricalDtype):
+            requirements = requirements.astype(
+                {"machine_type": shift_slots["machine_type"].dtype}
+            )
+        shift_slots = shift_slots.merge(requirements, on="machine_type", how="left")
+        shift_slots["worker_id"] = self._empty_workers(len(shift_slots))
 
         return shift_slots
 
+    def _empty_workers(self, n):
+        """Пустой столбец worker_id слотов со словарём worker_id кандидатов."""
+        worker_id = self.shift_candidates["worker_id"]
+        if isinstance(worker_id.dtype, pd.CategoricalDtype):
+            return pd.Categorical([None] * n, dtype=worker_id.dtype)
+        return None
+
     def run(self, target_week):
-        """Вычисляет кандидатов и слоты под целевую неделю."""
-        self._build_shift_rotation(target_week)
+        """
+        Вычисляет кандидатов и слоты под целевую неделю.
+
+        С memo результат запоминается по неделе и отпечаткам прошлой недели
+        истории, plan_long, workers и requirements: повторный Generate той же
+        недели без изменений данных подготовку не выполняет. Возвращаются
+        копии, кеш не портится вызывающим кодом.
+        """
+        self.target_week = target_week
+        prev = self._previous_week(target_week)
+        names = [
+            "shift_candidates",
+            "shift_equipment_day",
+            "shift_equipment_evening",
+            "shift_equipment_night",
+        ]
+
+        key = cached = None
+        if self.memo is not None:
+            key = (
+                "run",
+                target_week,
+                self.fingerprint(prev),
+                self.fingerprint(self.plan_long),
+                self.fingerprint(self.workers),
+                self.fingerprint(self.requirements),
+            )
+            cached = self.memo.get(key)
+        self.memo_hit = cached is not None
+        if self.memo_hit:
+            for name, frame in zip(names, cached):
+                setattr(self, name, frame.copy())
+            return
+
+        self._build_shift_rotation(target_week, prev)
 
         self.shift_equipment_day = self._create_shift_slots("day", target_week)
         self.shift_equipment_evening = self._create_shift_slots("evening", target_week)
         self.shift_equipment_night = self._create_shift_slots("night", target_week)
 
+        if self.memo is not None:
+            self.memo.put(key, tuple(getattr(self, name).copy() for name in names))
+
+
+class GenerationCancelled(Exception):
+    """Генерация прервана по запросу (см. AssignmentEngine.run(is_cancelled=...))."""
+
+
+class EngineStats:
+    """
+    Время и счётчики этапов AssignmentEngine (включается collect_stats=True).
+
+    Один этап — тур, расформирование или доукомплектование одной смены.
+    По каждому этапу копятся: время, число вызовов поиска кандидатов
+    (_find_candidates / EngineArrays.pick), суммарный и максимальный размер
+    множества кандидатов, число закрытых слотов и освобождённых работников.
+    """
+
+    COLUMNS = [
+        "shift",
+        "stage",
+        "mode",
+        "round_shift",
+        "seconds",
+        "find_calls",
+        "candidates_total",
+        "candidates_max",
+        "filled",
+        "freed",
+    ]
+
+    def __init__(self):
+        self.stages = []
+        self.total_seconds = 0.0
+        self._current = None
+        self._started = None
+
+    def begin(self, shift_name, stage, mode=None, round_shift=None):
+        """Закрывает текущий этап и открывает новый."""
+        self.end()
+        self._current = {
+            "shift": shift_name,
+            "stage": stage,
+            "mode": mode,
+            "round_shift": round_shift,
+            "seconds": 0.0,
+            "find_calls": 0,
+            "candidates_total": 0,
+            "candidates_max": 0,
+            "filled": 0,
+            "freed": 0,
+        }
+        self._started = time.perf_counter()
+
+    def end(self):
+        """Закрывает текущий этап (если он открыт)."""
+        if self._current is None:
+            return
+        self._current["seconds"] = time.perf_counter() - self._started
+        self.stages.append(self._current)
+        self._current = None
+
+    def on_find(self, candidates):
+        """Учитывает один поиск кандидатов и размер найденного множества."""
+        current = self._current
+        current["find_calls"] += 1
+        current["candidates_total"] += candidates
+        if candidates > current["candidates_max"]:
+            current["candidates_max"] = candidates
+
+    def on_filled(self):
+        """Учитывает закрытый слот."""
+        self._current["filled"] += 1
+
+    def on_freed(self, count):
+        """Учитывает работников, освобождённых расформированием."""
+        self._current["freed"] += count
+
+    @property
+    def find_calls(self):
+        """Всего вызовов поиска кандидатов за run()."""
+        return sum(stage["find_calls"] for stage in self.stages)
+
+    def to_frame(self):
+        """Этапы в виде DataFrame (для GUI и анализа)."""
+        return pd.DataFrame(self.stages, columns=self.COLUMNS)
+
+
+class CandidateIndex:
+    """
+    Индекс кандидатов для AssignmentEngine.
+
+    Кандидаты разложены по корзинам (shift, profession, rank); каждая корзина —
+    список свободных worker_id, отсортированный по возрастанию. Поиск на слот
+    сводится к чтению головы нужных корзин, а назначение/освобождение
+    работника — к точечному удалению/вставке во все его корзины.
+    """
+
+    def __init__(self, skills):
+        """
+        Args:
+            skills: Разреженные навыки кандидатов (candidate_skills).
+        """
+        # (shift, profession, rank) -> [worker_id, ...]; только rank > 0
+        self._all = {}
+        # (shift, profession, rank) -> [worker_id, ...]; только основная профессия
+        self._primary = {}
+        # (shift, profession) -> ранги по убыванию
+        self._ranks = {}
+        # worker_id -> все корзины, где он лежит
+        self._worker_buckets = defaultdict(list)
+        self._taken = set()
+
+        self._build(skills)
+
+    def _build(self, skills):
+        """Раскладывает навыки кандидатов по корзинам (объём ~ числу навыков)."""
+        long = skills.drop_duplicates(["worker_id", "shift", "profession"])
+        self._fill_buckets(self._all, long)
+
+        for (shift_name, profession), ranks in long.groupby(
+            ["shift", "profession"], observed=True
+        )["rank"]:
+            self._ranks[(shift_name, profession)] = sorted(
+                ranks.unique().tolist(), reverse=True
+            )
+
+        primary = long[long["profession"] == long["primary_profession"]]
+        self._fill_buckets(self._primary, primary)
+
+    def _fill_buckets(self, target, long):
+        """Группирует длинный формат в отсортированные корзины."""
+        for key, ids in long.groupby(["shift", "profession", "rank"], observed=True)[
+            "worker_id"
+        ]:
+            bucket = sorted(ids.tolist())
+            target[key] = bucket
+            for worker_id in bucket:
+                self._worker_buckets[worker_id].append(bucket)
+
+    def head(self, shift_name, profession, ranks=None, primary=False):
+        """
+        Возвращает первого свободного работника из корзин в порядке ranks
+        (по умолчанию — все ранги по убыванию) или None.
+        """
+        source = self._primary if primary else self._all
+        if ranks is None:
+            ranks = self._ranks.get((shift_name, profession), ())
+
+        for rank in ranks:
+            bucket = source.get((shift_name, profession, rank))
+            if bucket:
+                return bucket[0]
+        return None
+
+    def count(self, shift_name, profession, ranks=None, primary=False):
+        """Число свободных работников в корзинах ranks (как в head)."""
+        source = self._primary if primary else self._all
+        if ranks is None:
+            ranks = self._ranks.get((shift_name, profession), ())
+        return sum(
+            len(source.get((shift_name, profession, rank), ())) for rank in ranks
+        )
+
+    def take(self, worker_id):
+        """Убирает работника из всех его корзин."""
+        if worker_id in self._taken:
+            return
+        self._taken.add(worker_id)
+        for bucket in self._worker_buckets.get(worker_id, ()):
+            i = bisect.bisect_left(bucket, worker_id)
+            if i < len(bucket) and bucket[i] == worker_id:
+                del bucket[i]
+
+    def release(self, worker_id):
+        """Возвращает работника во все его корзины."""
+        if worker_id not in self._taken:
+            return
+        self._taken.discard(worker_id)
+        for bucket in self._worker_buckets.get(worker_id, ()):
+            bisect.insort(bucket, worker_id)
+
+
+class _FindCounts(list):
+    """Размеры множеств кандидатов по вызовам pick (вместо EngineStats)."""
+
+    def on_find(self, candidates):
+        self.append(candidates)
+
+
+class EngineArrays:
+    """
+    Целочисленное представление кандидатов и слотов для AssignmentEngine
+    (backend="numpy").
+
+    Работники кодируются индексом в отсортированном worker_ids, поэтому
+    порядок индексов совпадает с порядком worker_id. Навыки хранятся
+    разреженно: на каждую пару (смена, профессия) — блок кандидатов, у
+    которых есть эта профессия, с их рангами. Слоты каждой смены — набор
+    параллельных массивов.
+    """
+
+    def __init__(self, shift_candidates, shift_frames, skills):
+        """
+        Args:
+            shift_candidates: DataFrame кандидатов (после DataPipeline.run).
+            shift_frames: dict {shift_name: DataFrame слотов смены}.
+            skills: Разреженные навыки кандидатов (candidate_skills).
+        """
+        candidates = shift_candidates[shift_candidates["worker_id"].notna()]
+
+        # --- Справочник работников: кандидаты + уже проставленные в слотах
+        ids = set(candidates["worker_id"].tolist())
+        for frame in shift_frames.values():
+            ids.update(
+                w for w in frame["worker_id"].tolist() if not pd.isna(w) and w != ""
+            )
+        self.worker_ids = np.array(sorted(ids), dtype=object)
+        self._worker_index = pd.Index(self.worker_ids)
+
+        # --- Справочник профессий: навыки кандидатов + типы машин в слотах
+        machine_types = [
+            frame["machine_type"].astype(object) for frame in shift_frames.values()
+        ]
+        self.professions = list(
+            pd.unique(pd.concat([skills["profession"], *machine_types]).dropna())
+        )
+        self._profession_code = {p: i for i, p in enumerate(self.professions)}
+
+        # --- Кандидаты по сменам: (worker, primary), строки по worker
+        worker = self._worker_index.get_indexer(candidates["worker_id"])
+        primary = self._profession_codes(candidates["primary_profession"])
+        shifts = candidates["shift"].to_numpy(dtype=object)
+
+        self.candidates = {}
+        for shift_name in pd.unique(shifts):
+            rows = np.flatnonzero(shifts == shift_name)
+            rows = rows[np.argsort(worker[rows], kind="stable")]
+            self.candidates[shift_name] = (worker[rows], primary[rows])
+
+        # --- Навыки: блоки (worker, rank, is_primary) по (смена, профессия)
+        skill_worker = self._worker_index.get_indexer(skills["worker_id"])
+        skill_profession = self._profession_codes(skills["profession"])
+        skill_rank = skills["rank"].to_numpy(dtype="float64")
+        is_primary = (skills["profession"] == skills["primary_profession"]).to_numpy()
+
+        self.skill_blocks = defaultdict(dict)
+        for (shift_name, profession), rows in skills.groupby(
+            ["shift", "profession"], sort=False, observed=True
+        ).indices.items():
+            rows = rows[np.argsort(skill_worker[rows], kind="stable")]
+            self.skill_blocks[shift_name][self._profession_code[profession]] = (
+                skill_worker[rows],
+                skill_rank[rows],
+                is_primary[rows],
+            )
+
+        # Навыки по работнику (без повторов по сменам): для ShiftMatcher
+        unique = (
+            ~pd.DataFrame({"worker": skill_worker, "profession": skill_profession})
+            .duplicated()
+            .to_numpy()
+        )
+        self.skill_worker = skill_worker[unique]
+        self.skill_profession = skill_profession[unique]
+        self.skill_rank = skill_rank[unique]
+
+        # --- Слоты по сменам
+        self.slots = {
+            shift_name: self._encode_slots(frame)
+            for shift_name, frame in shift_frames.items()
+        }
+
+    def _profession_codes(self, professions):
+        """Коды профессий (-1 — неизвестная или не задана)."""
+        if isinstance(professions.dtype, pd.CategoricalDtype):
+            # Переводится только словарь, строки — по целочисленным кодам
+            lookup = self._profession_codes(pd.Series(professions.cat.categories))
+            return np.append(lookup, -1)[professions.cat.codes.to_numpy()]
+        return professions.map(self._profession_code).fillna(-1).to_numpy(dtype="int64")
+
+    def _encode_slots(self, frame):
+        """Переводит DataFrame слотов смены в параллельные массивы."""
+        worker_id = frame["worker_id"].replace("", None)
+        worker = self._worker_index.get_indexer(worker_id)
+        worker[worker_id.isna().to_numpy()] = -1
+
+        machine, _ = pd.factorize(frame["machine_id"])
+        return {
+            "profession": self._profession_codes(frame["machine_type"]),
+            "min_rank": frame["min_rank"].to_numpy(dtype="float64"),
+            "machine": machine,
+            # Как groupby(["machine_id", "machine_type"]): NaN-ключи не считаются
+            "counted": frame["machine_type"].notna().to_numpy() & (machine >= 0),
+            "has_position": frame["position"].notna().to_numpy(),
+            "worker": worker,
+        }
+
+    def encode(self, worker_ids):
+        """Булева маска по справочнику работников для множества worker_id."""
+        mask = np.zeros(len(self.worker_ids), dtype=bool)
+        codes = self._worker_index.get_indexer(list(worker_ids))
+        mask[codes[codes >= 0]] = True
+        return mask
+
+    def pick(self, shift_name, busy, mode, profession, min_rank, stats=None):
+        """
+        Возвращает код лучшего свободного кандидата смены shift_name
+        (наибольший ранг, затем наименьший worker_id) или -1.
+        Если передан stats (EngineStats), учитывает размер множества кандидатов.
+        """
+        block = self.skill_blocks.get(shift_name, {}).get(profession)
+        if block is None:
+            if stats is not None:
+                stats.on_find(0)
+            return -1
+        # В блоке только кандидаты смены с этой профессией (ранг > 0)
+        worker, rank, primary = block
+        free = ~busy[worker]
+
+        if mode == "ferst":
+            eligible = free & primary & (rank == min_rank)
+        elif mode == "second":
+            eligible = free & ((rank == min_rank) | (rank == min_rank + 1))
+        elif mode == "third":
+            eligible = free
+        else:
+            raise ValueError(
+                f"Неизвестный режим '{mode}'. Используйте 'ferst', 'second' или 'third'."
+            )
+
+        if stats is not None:
+            stats.on_find(int(eligible.sum()))
+        if not eligible.any():
+            return -1
+        return worker[np.where(eligible, rank, -np.inf).argmax()]
+
+    def speculate(self, shift_name, rounds, busy):
+        """
+        Туры rounds по копии слотов смены shift_name при занятости busy
+        (слоты и busy не меняются) — для параллельного режима AssignmentEngine.
+
+        Returns:
+            list по выполненным турам: (rows, chosen, candidates) — обойдённые
+            пустые строки, выбранные коды (-1 — кандидата нет) и размеры
+            множеств кандидатов.
+        """
+        slots = self.slots[shift_name]
+        worker = slots["worker"].copy()
+        busy = busy.copy()
+        result = []
+        for round_idx, (mode, round_shift) in enumerate(rounds):
+            if round_idx > 0 and not (worker < 0).any():
+                break
+            rows = np.flatnonzero(worker < 0)
+            chosen = np.full(len(rows), -1, dtype="int64")
+            counts = _FindCounts()
+            for k, i in enumerate(rows):
+                code = self.pick(
+                    round_shift,
+                    busy,
+                    mode,
+                    slots["profession"][i],
+                    slots["min_rank"][i],
+                    stats=counts,
+                )
+                if code >= 0:
+                    worker[i] = code
+                    busy[code] = True
+                    chosen[k] = code
+            result.append((rows, chosen, counts))
+        return result
+
+    def team_counts(self, slots):
+        """Требуемые и назначенные позиции по коду машины."""
+        size = int(slots["machine"].max()) + 1 if len(slots["machine"]) else 0
+        counted = slots["counted"]
+        required = np.bincount(
+            slots["machine"][counted & slots["has_position"]], minlength=size
+        )
+        assigned = np.bincount(
+            slots["machine"][counted & (slots["worker"] >= 0)], minlength=size
+        )
+        return required, assigned
+
+    def to_frame(self, shift_name, frame):
+        """
+        Возвращает копию frame с worker_id из массивов: коды работников
+        становятся кодами category со словарём worker_ids (без раскодирования
+        в строки).
+        """
+        worker = self.slots[shift_name]["worker"]
+        updated = frame.copy()
+        updated["worker_id"] = pd.Categorical.from_codes(
+            worker, categories=pd.Index(self.worker_ids, dtype=object)
+        )
+        return updated
+
 
 class AssignmentEngine:
     """Ищет исполнителей по слотам и фиксирует глобальные назначения."""
@@ -127,11 +842,42 @@ class AssignmentEngine:
         shift_equipment_day,
         shift_equipment_evening,
         shift_equipment_night,
+        backend="pandas",
+        collect_stats=False,
+        parallel=False,
     ):
         """
         Конструктор класса. Загружает данные и выполняет
         первичную, не зависящую от недели, подготовку.
+
+        Args:
+            backend: "pandas" — туры по DataFrame слотов;
+                "numpy" — тот же алгоритм на целочисленных массивах
+                (EngineArrays), DataFrame собирается только в конце;
+                "optimal" — вместо жадных туров назначение минимальной
+                стоимости на каждую смену (ShiftMatcher).
+            collect_stats: Собирать время и счётчики по этапам в self.stats
+                (EngineStats); при False накладных расходов практически нет.
+            parallel: Только для backend="numpy": начальные туры смен по
+                своим кандидатам считаются заранее в executor (True — пул
+                потоков, либо готовый concurrent.futures.Executor) и затем
+                принимаются по порядку смен. Результат совпадает с
+                последовательным. Это не режим ускорения: в потоках туры
+                сериализуются GIL, в процессах добавляется передача
+                EngineArrays, и прогон медленнее последовательного.
         """
+        if backend not in ("pandas", "numpy", "optimal"):
+            raise ValueError(
+                f"Неизвестный backend '{backend}'. "
+                "Используйте 'pandas', 'numpy' или 'optimal'."
+            )
+        if parallel and backend != "numpy":
+            raise ValueError(
+                "Параллельный режим поддерживается только backend='numpy'."
+            )
+        self.backend = backend
+        self.parallel = parallel
+
         # Загрузка датафреймов
         self.shift_candidates = shift_candidates
         self.shift_equipment_day = shift_equipment_day
@@ -146,41 +892,78 @@ class AssignmentEngine:
         self.all_shifts = None
         self.no_position = None
 
-    def _find_candidates(self, assigned_shift, mode, profession, min_rank, shift_name):
-        """
-        Ядро алгоритма: ищет подходящих кандидатов на позицию.
-        """
-        assigned_shift = set(assigned_shift)
-        blocked_ids = self.global_assigned - assigned_shift
-
-        base_mask = (
-            (self.shift_candidates["shift"] == shift_name)
-            & (~self.shift_candidates["worker_id"].isin(blocked_ids))
-            & (~self.shift_candidates["worker_id"].isin(assigned_shift))
+        # Прогресс и отмена (задаются в run)
+        self._progress = None
+        self._is_cancelled = None
+        self._current_shift = None
+        self._stage = 0
+        self._stages_per_shift = 0
+        self._total_stages = 0
+
+        # Статистика этапов (None — сбор выключен)
+        self.stats = EngineStats() if collect_stats else None
+
+        # Индекс кандидатов: (shift, profession, rank) -> свободные worker_id
+        self.candidate_index = (
+            CandidateIndex(self._candidate_skills(self._shift_frames().values()))
+            if backend == "pandas"
+            else None
         )
 
-        profession_mask = self.shift_candidates["all_professions"].apply(
-            lambda profs: profession in profs
+    def _shift_frames(self):
+        """Текущие слоты смен: dict {shift_name: DataFrame}."""
+        return {
+            "day": self.shift_equipment_day,
+            "evening": self.shift_equipment_evening,
+            "night": self.shift_equipment_night,
+        }
+
+    def _candidate_skills(self, frames):
+        """Разреженные навыки кандидатов по профессиям машин из слотов frames."""
+        machines = pd.concat([frame[["machine_type"]] for frame in frames])
+        professions = DataPipeline.discover_professions(self.shift_candidates, machines)
+        return candidate_skills(self.shift_candidates, professions)
+
+    def _arrays(self, frames):
+        """EngineArrays по текущим кандидатам и слотам frames ({shift: DataFrame})."""
+        return EngineArrays(
+            self.shift_candidates, frames, self._candidate_skills(frames.values())
         )
 
+    def _find_candidates(self, assigned_shift, mode, profession, min_rank, shift_name):
+        """
+        Ядро алгоритма: возвращает лучшего свободного кандидата на позицию
+        (наибольший ранг, затем наименьший worker_id) или None.
+        """
         if mode == "ferst":
-            primary_mask = self.shift_candidates["primary_profession"] == profession
-            rank_mask = self.shift_candidates[profession] == min_rank
-            candidates = self.shift_candidates[base_mask & primary_mask & rank_mask]
+            ranks, primary = [min_rank], True
         elif mode == "second":
-            rank_mask = self.shift_candidates[profession].isin([min_rank, min_rank + 1])
-            candidates = self.shift_candidates[base_mask & profession_mask & rank_mask]
+            ranks, primary = [min_rank + 1, min_rank], False
         elif mode == "third":
-            rank_mask = self.shift_candidates[profession] > 0
-            candidates = self.shift_candidates[base_mask & profession_mask & rank_mask]
+            ranks, primary = None, False
         else:
             raise ValueError(
                 f"Неизвестный режим '{mode}'. Используйте 'ferst', 'second' или 'third'."
             )
 
-        return candidates.sort_values(
-            by=[profession, "worker_id"], ascending=[False, True]
-        )
+        if self.stats is not None:
+            self.stats.on_find(
+                self.candidate_index.count(
+                    shift_name, profession, ranks, primary=primary
+                )
+            )
+
+        while True:
+            worker_id = self.candidate_index.head(
+                shift_name, profession, ranks, primary=primary
+            )
+            if worker_id is None:
+                return None
+            # Подстраховка: занятых в обход индекса выкидываем из корзин
+            if worker_id in self.global_assigned or worker_id in assigned_shift:
+                self.candidate_index.take(worker_id)
+                continue
+            return worker_id
 
     def _fill_positions(
         self,
@@ -199,23 +982,21 @@ class AssignmentEngine:
                 profession = row["machine_type"]
                 min_rank = row["min_rank"]
 
-                candidates = self._find_candidates(
+                chosen = self._find_candidates(
                     assigned_shift, mode, profession, min_rank, shift_name
                 )
 
-                if not candidates.empty:
-                    chosen = candidates.iloc[0]
-                    updated.loc[i, "worker_id"] = chosen["worker_id"]
-                    assigned_shift.add(chosen["worker_id"])
+                if chosen is not None:
+                    updated.loc[i, "worker_id"] = chosen
+                    assigned_shift.add(chosen)
+                    self.candidate_index.take(chosen)
+                    if self.stats is not None:
+                        self.stats.on_filled()
                 else:
-                    free_positions.append(updated.loc[i])
+                    free_positions.append(i)
 
-        columns = updated.columns
-        free_df = (
-            pd.DataFrame(free_positions, columns=columns)
-            if free_positions
-            else pd.DataFrame(columns=columns)
-        )
+        # Срез по индексам сохраняет типы столбцов (в т.ч. category)
+        free_df = updated.loc[free_positions]
 
         return free_df, updated, assigned_shift
 
@@ -224,6 +1005,7 @@ class AssignmentEngine:
     ):
         """Запускает серию туров (_fill_positions) согласно конфигурации default_rounds."""
 
+        self._tick("тур", *default_rounds[0])
         fill_positions = self._fill_positions(
             shift_equipment,
             assigned_shift,
@@ -235,6 +1017,7 @@ class AssignmentEngine:
         for round_idx, (mode, shift_name) in enumerate(default_rounds[1:], start=2):
             if free_positions.empty:
                 break
+            self._tick("тур", mode, shift_name)
             fill_positions = self._fill_positions(
                 free_positions,
                 assigned_shift,
@@ -248,13 +1031,7 @@ class AssignmentEngine:
 
     def _summary_team(self, shift_equipment):
         """Считает требуемые и назначенные позиции для каждой машины."""
-        summary = shift_equipment.groupby(
-            ["machine_id", "machine_type"], as_index=False
-        ).agg(
-            required=("position", "count"),
-            assigned=("worker_id", lambda s: s.notna().sum() - (s == "").sum()),
-        )
-        return summary
+        return summary_team(shift_equipment, ["machine_id", "machine_type"])
 
     def _incomplete_team(self, shift_equipment):
         summary = self._summary_team(shift_equipment)
@@ -265,6 +1042,7 @@ class AssignmentEngine:
 
     def _decomlate_team(self, shift_equipment, assigned_shift):
         """Расформировывает бригады, где назначено меньше половины от требуемого."""
+        self._tick("расформирование")
         incomplete = self._incomplete_team(shift_equipment)
         destaff = incomplete[incomplete["required"] / 2 >= incomplete["assigned"]][
             "machine_id"
@@ -281,12 +1059,18 @@ class AssignmentEngine:
 
         shift_equipment.loc[mask, "worker_id"] = None
         assigned_shift -= set(freed)
+        if self.stats is not None:
+            self.stats.on_freed(len(freed))
+        for worker_id in freed:
+            self.candidate_index.release(worker_id)
 
         return shift_equipment, assigned_shift
 
     def _staff_team(
         self, shift_equipment, assigned_shift, shift_name="night", mode="third"
     ):
+        """Доукомплектовывает неполные бригады (по умолчанию режимом third)."""
+        self._tick("доукомплектование")
         incomplete = self._incomplete_team(shift_equipment)
         if incomplete.empty:
             return shift_equipment, assigned_shift
@@ -307,12 +1091,8 @@ class AssignmentEngine:
 
         return updated, assigned_shift
 
-    def run(self):
-        """
-        Главный метод-дирижер. Запускает полный цикл
-        планирования для 'target_week'.
-        """
-        # Конфигурация раундов назначение работников на позиции
+    def _shift_rounds(self):
+        """Конфигурация туров назначения для каждой смены (в порядке запуска)."""
         default_tourse = [
             ("ferst", "day"),
             ("second", "day"),
@@ -321,11 +1101,430 @@ class AssignmentEngine:
             ("ferst", "evening"),
             ("second", "evening"),
         ]
-        default_tourse_day = default_tourse.copy()
-        default_tourse_evening = default_tourse[4:] + default_tourse[:4]
-        default_tourse_night = default_tourse[2:] + default_tourse[:2]
+        return {
+            "day": default_tourse.copy(),
+            "evening": default_tourse[4:] + default_tourse[:4],
+            "night": default_tourse[2:] + default_tourse[:2],
+        }
+
+    def _fill_positions_arrays(
+        self, arrays, slots, busy, assigned_shift, mode, shift_name, rows=None
+    ):
+        """
+        Аналог _fill_positions для backend="numpy": один тур по пустым слотам
+        (только среди rows, если они заданы).
+        """
+        worker = slots["worker"]
+        empty = worker < 0
+        if rows is not None:
+            empty &= rows
+        free_rows = []
+        for i in np.flatnonzero(empty):
+            chosen = arrays.pick(
+                shift_name,
+                busy,
+                mode,
+                slots["profession"][i],
+                slots["min_rank"][i],
+                stats=self.stats,
+            )
+            if chosen >= 0:
+                worker[i] = chosen
+                busy[chosen] = True
+                assigned_shift.add(arrays.worker_ids[chosen])
+                if self.stats is not None:
+                    self.stats.on_filled()
+            else:
+                free_rows.append(i)
+        return free_rows
+
+    def _decomlate_team_arrays(
+        self, arrays, slots, busy, assigned_shift, machines=None
+    ):
+        """
+        Аналог _decomlate_team для backend="numpy"; machines — маска кодов
+        машин, которые разрешено расформировывать (по умолчанию все).
+        """
+        self._tick("расформирование")
+        required, assigned = arrays.team_counts(slots)
+        destaff = (assigned > 0) & (assigned < required) & (required / 2 >= assigned)
+        if machines is not None:
+            destaff &= machines
+        if not destaff.any():
+            return
+
+        worker = slots["worker"]
+        mask = destaff[slots["machine"]] & (slots["machine"] >= 0) & (worker >= 0)
+        freed = worker[mask]
+        worker[mask] = -1
+        if self.stats is not None:
+            self.stats.on_freed(len(freed))
+        busy[freed] = False
+        assigned_shift -= set(arrays.worker_ids[freed].tolist())
+        # Занятые в других сменах остаются заблокированными
+        busy |= arrays.encode(self.global_assigned)
+
+    def _staff_team_arrays(
+        self, arrays, slots, busy, assigned_shift, shift_name, machines=None
+    ):
+        """
+        Аналог _staff_team для backend="numpy" (режим third); machines —
+        маска кодов машин, которые разрешено доукомплектовывать.
+        """
+        self._tick("доукомплектование")
+        required, assigned = arrays.team_counts(slots)
+        incomplete = (assigned > 0) & (assigned < required)
+        if machines is not None:
+            incomplete &= machines
+        if not incomplete.any():
+            return
+
+        worker = slots["worker"]
+        rows = incomplete[slots["machine"]] & (slots["machine"] >= 0) & (worker < 0)
+        for i in np.flatnonzero(rows):
+            chosen = arrays.pick(
+                shift_name,
+                busy,
+                "third",
+                slots["profession"][i],
+                slots["min_rank"][i],
+                stats=self.stats,
+            )
+            if chosen >= 0:
+                worker[i] = chosen
+                busy[chosen] = True
+                assigned_shift.add(arrays.worker_ids[chosen])
+                if self.stats is not None:
+                    self.stats.on_filled()
+
+    def _run_arrays(self):
+        """Полный цикл планирования на EngineArrays (backend="numpy")."""
+        arrays = self._arrays(self._shift_frames())
+        shift_rounds = self._shift_rounds()
+
+        executor = None
+        if self.parallel:
+            executor = (
+                self.parallel
+                if isinstance(self.parallel, Executor)
+                else ThreadPoolExecutor(max_workers=len(shift_rounds))
+            )
+        try:
+            speculated = (
+                self._speculate(arrays, shift_rounds, executor) if executor else {}
+            )
+            for shift_idx, (shift_name, rounds) in enumerate(shift_rounds.items()):
+                self._run_shift_arrays(
+                    arrays, shift_idx, shift_name, rounds, speculated.get(shift_name)
+                )
+        finally:
+            if executor is not None and executor is not self.parallel:
+                executor.shutdown(cancel_futures=True)
+
+    def _speculate(self, arrays, shift_rounds, executor):
+        """
+        Запускает в executor начальные туры каждой смены по своим кандидатам
+        (ferst/second своей смены) при исходной занятости. Первой смене
+        спекуляция не нужна: до неё ничего не назначено.
+
+        Returns:
+            dict {shift_name: Future} для всех смен, кроме первой.
+        """
+        futures = {}
+        for shift_name, rounds in list(shift_rounds.items())[1:]:
+            own = list(
+                itertools.takewhile(lambda r, name=shift_name: r[1] == name, rounds)
+            )
+            if not own:
+                continue
+            assigned_shift = getattr(self, f"assigned_{shift_name}")
+            busy = arrays.encode(self.global_assigned | assigned_shift)
+            futures[shift_name] = executor.submit(
+                arrays.speculate, shift_name, own, busy
+            )
+        return futures
+
+    def _replay(self, arrays, slots, busy, assigned_shift, rounds, speculated):
+        """
+        Применяет спекулятивные туры смены. Выбор принимается, пока выбранный
+        работник ещё свободен: занятость не выбранных спекуляцией работников
+        на жадный выбор не влияет, поэтому принятая часть совпадает с
+        последовательным прогоном. На первом уже занятом работнике тур
+        прерывается и дальше считается обычным способом.
+
+        Returns:
+            (round_idx, row): тур и строка, с которой продолжить прерванный
+            тур (row=None — все спекулятивные туры приняты целиком).
+        """
+        worker = slots["worker"]
+        for round_idx, (rows, chosen, counts) in enumerate(speculated):
+            mode, round_shift = rounds[round_idx]
+            if round_idx > 0 and not (worker < 0).any():
+                return round_idx, None
+            self._tick("тур", mode, round_shift)
+            taken = chosen >= 0
+            conflict = np.flatnonzero(taken & busy[np.where(taken, chosen, 0)])
+            end = conflict[0] if len(conflict) else len(rows)
+
+            accepted = chosen[:end][taken[:end]]
+            worker[rows[:end][taken[:end]]] = accepted
+            busy[accepted] = True
+            assigned_shift.update(arrays.worker_ids[accepted].tolist())
+            if self.stats is not None:
+                for candidates in counts[:end]:
+                    self.stats.on_find(candidates)
+                for _ in range(len(accepted)):
+                    self.stats.on_filled()
+            if len(conflict):
+                return round_idx, rows[end]
+        return len(speculated), None
+
+    def _run_shift_arrays(self, arrays, shift_idx, shift_name, rounds, speculated):
+        """Туры, расформирование и доукомплектование одной смены (numpy)."""
+        self._begin_shift(shift_idx, shift_name)
+        slots = arrays.slots[shift_name]
+        assigned_shift = getattr(self, f"assigned_{shift_name}")
+        busy = arrays.encode(self.global_assigned | assigned_shift)
+
+        start, resume = 0, None
+        if speculated is not None:
+            start, resume = self._replay(
+                arrays, slots, busy, assigned_shift, rounds, speculated.result()
+            )
+
+        for round_idx, (mode, round_shift) in enumerate(rounds[start:], start=start):
+            rows = None
+            if resume is not None:
+                # Тур, прерванный в _replay, продолжается с той же строки
+                rows = np.arange(len(slots["worker"])) >= resume
+                resume = None
+            else:
+                if round_idx > 0 and not (slots["worker"] < 0).any():
+                    break
+                self._tick("тур", mode, round_shift)
+            self._fill_positions_arrays(
+                arrays, slots, busy, assigned_shift, mode, round_shift, rows=rows
+            )
+
+        self._decomlate_team_arrays(arrays, slots, busy, assigned_shift)
+        self._staff_team_arrays(arrays, slots, busy, assigned_shift, shift_name)
+        self.global_assigned.update(assigned_shift)
+
+        frame = getattr(self, f"shift_equipment_{shift_name}")
+        setattr(
+            self,
+            f"shift_equipment_{shift_name}",
+            arrays.to_frame(shift_name, frame),
+        )
+
+    def _match_arrays(self, matcher, slots, busy, shift_name, rows, staff=False):
+        """Закрывает слоты rows через ShiftMatcher и учитывает статистику."""
+        filled, candidates, _ = matcher.assign(
+            shift_name, slots, rows, busy, staff=staff
+        )
+        if self.stats is not None:
+            self.stats.on_find(candidates)
+            for _ in range(filled):
+                self.stats.on_filled()
+
+    def _run_optimal(self):
+        """
+        Полный цикл планирования с назначением минимальной стоимости
+        (backend="optimal").
+
+        Для каждой смены: одно решение на все пустые слоты; затем бригады,
+        где назначено не больше половины, закрываются, и задача решается
+        заново без них, пока такие бригады не исчезнут; в конце неполные
+        бригады доукомплектовываются работниками своей смены (как third).
+        """
+        arrays = self._arrays(self._shift_frames())
+        matcher = ShiftMatcher(arrays)
+
+        for shift_idx, shift_name in enumerate(self._shift_rounds()):
+            self._begin_shift(shift_idx, shift_name)
+            slots = arrays.slots[shift_name]
+            worker = slots["worker"]
+            initial = worker.copy()
+            assigned_shift = getattr(self, f"assigned_{shift_name}")
+            base_busy = arrays.encode(self.global_assigned | assigned_shift)
+            base_busy[initial[initial >= 0]] = True
+            busy = base_busy.copy()
+
+            self._tick("матчинг")
+            self._match_arrays(
+                matcher, slots, busy, shift_name, np.flatnonzero(worker < 0)
+            )
+
+            self._tick("расформирование")
+            closed = np.zeros(len(arrays.team_counts(slots)[0]), dtype=bool)
+            while True:
+                required, assigned = arrays.team_counts(slots)
+                destaff = (
+                    (assigned > 0) & (assigned < required) & (required / 2 >= assigned)
+                )
+                if not destaff.any():
+                    break
+                if self.stats is not None:
+                    self.stats.on_freed(int(assigned[destaff].sum()))
+                closed |= destaff
+                worker[:] = initial
+                in_closed = closed[slots["machine"]] & (slots["machine"] >= 0)
+                worker[in_closed] = -1
+                busy[:] = base_busy
+                self._match_arrays(
+                    matcher,
+                    slots,
+                    busy,
+                    shift_name,
+                    np.flatnonzero((worker < 0) & ~in_closed),
+                )
+
+            self._tick("доукомплектование")
+            required, assigned = arrays.team_counts(slots)
+            incomplete = (assigned > 0) & (assigned < required)
+            if incomplete.any():
+                rows = incomplete[slots["machine"]] & (slots["machine"] >= 0)
+                self._match_arrays(
+                    matcher,
+                    slots,
+                    busy,
+                    shift_name,
+                    np.flatnonzero(rows & (worker < 0)),
+                    staff=True,
+                )
+
+            assigned_shift.update(arrays.worker_ids[worker[worker >= 0]].tolist())
+            self.global_assigned.update(assigned_shift)
+
+            frame = getattr(self, f"shift_equipment_{shift_name}")
+            setattr(
+                self,
+                f"shift_equipment_{shift_name}",
+                arrays.to_frame(shift_name, frame),
+            )
+
+    def _begin_shift(self, shift_idx, shift_name):
+        """Отмечает начало смены: прогресс выравнивается на границу смены."""
+        self._current_shift = shift_name
+        self._stage = shift_idx * self._stages_per_shift
+
+    def _tick(self, stage, mode=None, round_shift=None):
+        """
+        Проверяет отмену и сообщает о переходе к очередному этапу смены
+        (тур mode/round_shift, расформирование или доукомплектование).
+        """
+        text = f"{self._current_shift}: {stage}"
+        if mode is not None:
+            text += f" {mode}/{round_shift}"
+        if self._is_cancelled is not None and self._is_cancelled():
+            raise GenerationCancelled(text)
+        if self.stats is not None:
+            self.stats.begin(self._current_shift, stage, mode, round_shift)
+        self._stage += 1
+        if self._progress is not None:
+            self._progress(self._stage, self._total_stages, text)
+
+    def run(self, progress=None, is_cancelled=None):
+        """
+        Главный метод-дирижер. Запускает полный цикл
+        планирования для 'target_week'.
+
+        Args:
+            progress: callable(done, total, text) — вызывается перед каждым
+                туром, расформированием и доукомплектованием каждой смены.
+            is_cancelled: callable() -> bool; проверяется перед каждым этапом,
+                при True run() прерывается исключением GenerationCancelled.
+        """
+        rounds = self._shift_rounds()
+        self._progress = progress
+        self._is_cancelled = is_cancelled
+        if self.backend == "optimal":
+            # матчинг, расформирование, доукомплектование
+            self._stages_per_shift = 3
+        else:
+            self._stages_per_shift = len(rounds["day"]) + 2
+        self._total_stages = len(rounds) * self._stages_per_shift
+        started = time.perf_counter()
+
+        if self.backend == "numpy":
+            self._run_arrays()
+        elif self.backend == "optimal":
+            self._run_optimal()
+        else:
+            self._run_frames()
+
+        if self.stats is not None:
+            self.stats.end()
+            self.stats.total_seconds = time.perf_counter() - started
+
+        if progress is not None:
+            progress(self._total_stages, self._total_stages, "готово")
+
+        self._update_no_position()
+
+    def _update_no_position(self):
+        """Кандидаты, не получившие ни одной позиции."""
+        self.no_position = self.shift_candidates[
+            ~self.shift_candidates["worker_id"].isin(self.global_assigned)
+        ]
+
+    def repair(self, shift_name, machine_ids):
+        """
+        Перерасчёт одной смены после run() только для машин machine_ids:
+        пустые слоты этих машин проходят туры смены, затем к ним (и только
+        к ним) применяются расформирование и доукомплектование. Остальные
+        назначения недели не меняются.
+
+        Используется инкрементальной перегенерацией (incremental.py); слоты
+        и кандидаты к этому моменту уже отражают изменение.
+        """
+        frame = getattr(self, f"shift_equipment_{shift_name}")
+        assigned_shift = getattr(self, f"assigned_{shift_name}")
+        # Смена пересчитывается заново: её работники не блокируются глобально
+        self.global_assigned -= assigned_shift
+        self._progress = None
+        self._is_cancelled = None
+        self._current_shift = shift_name
+
+        arrays = self._arrays({shift_name: frame})
+        slots = arrays.slots[shift_name]
+        busy = arrays.encode(self.global_assigned | assigned_shift)
+
+        rows = frame["machine_id"].isin(machine_ids).to_numpy()
+        required, _ = arrays.team_counts(slots)
+        machines = np.zeros(len(required), dtype=bool)
+        machines[slots["machine"][rows & (slots["machine"] >= 0)]] = True
+
+        for mode, round_shift in self._shift_rounds()[shift_name]:
+            if not (rows & (slots["worker"] < 0)).any():
+                break
+            self._tick("тур", mode, round_shift)
+            self._fill_positions_arrays(
+                arrays, slots, busy, assigned_shift, mode, round_shift, rows=rows
+            )
+        self._decomlate_team_arrays(arrays, slots, busy, assigned_shift, machines)
+        self._staff_team_arrays(
+            arrays, slots, busy, assigned_shift, shift_name, machines
+        )
+        if self.stats is not None:
+            self.stats.end()
+
+        self.global_assigned.update(assigned_shift)
+        setattr(
+            self, f"shift_equipment_{shift_name}", arrays.to_frame(shift_name, frame)
+        )
+        self._update_no_position()
+
+    def _run_frames(self):
+        """Полный цикл планирования на DataFrame слотов (backend="pandas")."""
+        # Конфигурация раундов назначение работников на позиции
+        rounds = self._shift_rounds()
+        default_tourse_day = rounds["day"]
+        default_tourse_evening = rounds["evening"]
+        default_tourse_night = rounds["night"]
 
         # Генератор Дневной смены
+        self._begin_shift(0, "day")
         self.shift_equipment_day, self.assigned_day = self._run_assignment_for_shift(
             self.shift_equipment_day, self.assigned_day, default_tourse_day
         )
@@ -340,6 +1539,7 @@ class AssignmentEngine:
         self.global_assigned.update(self.assigned_day)
 
         # Генератор eveningней смены
+        self._begin_shift(1, "evening")
         self.shift_equipment_evening, self.assigned_evening = (
             self._run_assignment_for_shift(
                 self.shift_equipment_evening,
@@ -358,6 +1558,7 @@ class AssignmentEngine:
         self.global_assigned.update(self.assigned_evening)
 
         # Генератор Ночной смены
+        self._begin_shift(2, "night")
         self.shift_equipment_night, self.assigned_night = (
             self._run_assignment_for_shift(
                 self.shift_equipment_night, self.assigned_night, default_tourse_night
@@ -373,10 +1574,6 @@ class AssignmentEngine:
         )
         self.global_assigned.update(self.assigned_night)
 
-        self.no_position = self.shift_candidates[
-            ~self.shift_candidates["worker_id"].isin(self.global_assigned)
-        ]
-
 
 class SchedulerReport:
     """Формирует итоговые таблицы и текстовые отчёты по расписанию."""
@@ -403,19 +1600,26 @@ class SchedulerReport:
 
         self.final_assignments_df = None
         self.report = None
+        self._combined = None
 
         self.summary_lines = []
 
     def _combined_shifts(self):
-        """Возвращает DataFrame со всеми сменами."""
-        return pd.concat(
-            [
-                self.shift_equipment_night,
-                self.shift_equipment_day,
-                self.shift_equipment_evening,
-            ],
-            ignore_index=True,
-        )
+        """Возвращает DataFrame со всеми сменами (concat выполняется один раз)."""
+        if self._combined is None:
+            self._combined = pd.concat(
+                [
+                    self.shift_equipment_night,
+                    self.shift_equipment_day,
+                    self.shift_equipment_evening,
+                ],
+                ignore_index=True,
+            )
+        return self._combined
+
+    def _site_keys(self):
+        """["site"], если смены размечены площадкой (MultiSiteScheduler), иначе []."""
+        return ["site"] if "site" in self._combined_shifts().columns else []
 
     def _summary_team(self, df, group_cols=None):
         """
@@ -424,38 +1628,41 @@ class SchedulerReport:
         """
         if group_cols is None:
             group_cols = ["machine_id", "machine_type"]
+        return summary_team(df, group_cols)
 
-        summary = df.groupby(group_cols, as_index=False).agg(
-            required=("position", "count"),
-            assigned=("worker_id", lambda s: s.notna().sum() - (s == "").sum()),
-        )
-        # self.report = summary
-        return summary
+    def _brigades(self):
+        """Сводка по бригадам (self.report); строится один раз."""
+        if self.report is None:
+            self.get_brigade_summary()
+        return self.report
+
+    def full_brigades(self):
+        """Полностью укомплектованные бригады (N/N)."""
+        rep = self._brigades()
+        return rep[(rep["required"] > 0) & (rep["assigned"] == rep["required"])]
 
     def _incomplete_brigades(self):
-        """Неполные (k/N, k>0). Источник: self.all_shifts (должен быть собран)."""
-        rep = self._summary_team(
-            self.all_shifts, ["week", "shift", "machine_id", "machine_type"]
-        )
+        """Неполные (k/N, k>0). Источник: сводка по бригадам (self.report)."""
+        rep = self._brigades()
         df = rep[(rep["assigned"] > 0) & (rep["assigned"] < rep["required"])].copy()
         df["missing"] = df["required"] - df["assigned"]
         df["status"] = "incomplete"
+        keys = self._site_keys()
         return df.sort_values(
-            ["week", "shift", "missing", "machine_id"],
-            ascending=[True, True, False, True],
+            keys + ["week", "shift", "missing", "machine_id"],
+            ascending=[True] * len(keys) + [True, True, False, True],
         ).reset_index(drop=True)
 
     def _empty_brigades(self):
-        """Пустые (0/N). Источник: self.all_shifts."""
-        rep = self._summary_team(
-            self.all_shifts, ["week", "shift", "machine_id", "machine_type"]
-        )
+        """Пустые (0/N). Источник: сводка по бригадам (self.report)."""
+        rep = self._brigades()
         df = rep[(rep["assigned"] == 0) & (rep["required"] > 0)].copy()
         df["missing"] = df["required"]
         df["status"] = "empty"
+        keys = self._site_keys()
         return df.sort_values(
-            ["week", "shift", "required", "machine_id"],
-            ascending=[True, True, False, True],
+            keys + ["week", "shift", "required", "machine_id"],
+            ascending=[True] * len(keys) + [True, True, False, True],
         ).reset_index(drop=True)
 
     def get_final_assignments(self):
@@ -464,9 +1671,23 @@ class SchedulerReport:
         """
         # Собираем все смены в один график night, day, evening
         self.all_shifts = self._combined_shifts()
-        # Добавляем персональные данные работникам
+        keys = self._site_keys()
+        # Добавляем персональные данные работникам (и площадку работника,
+        # если площадок несколько: одолженный работает не на своей)
+        people = self.workers[["worker_id", "name"]]
+        if keys and "site" in self.workers.columns:
+            people = self.workers[["worker_id", "name", "site"]].rename(
+                columns={"site": "home_site"}
+            )
+        worker_dtype = self.all_shifts["worker_id"].dtype
+        if isinstance(worker_dtype, pd.CategoricalDtype):
+            # Ключ к словарю слотов: merge идёт по кодам, worker_id остаётся
+            # category; работники вне словаря (NaN) не должны совпасть с
+            # пустыми слотами
+            people = people.astype({"worker_id": worker_dtype})
+            people = people[people["worker_id"].notna()]
         self.all_shifts = self.all_shifts.merge(
-            self.workers[["worker_id", "name"]],
+            people,
             on="worker_id",
             how="left",
         )
@@ -475,19 +1696,24 @@ class SchedulerReport:
         assigned_rows = self.all_shifts[self.all_shifts["worker_id"].notna()].copy()
         # Сортируем по смена, машина, позиция
         assigned_rows = assigned_rows.sort_values(
-            by=["shift", "machine_id", "position"],
+            by=keys + ["shift", "machine_id", "position"],
             ignore_index=True,
         )
-        self.final_assignments_df = assigned_rows[
-            ["week", "shift", "machine_id", "position", "worker_id", "name"]
-        ]
+        columns = ["week", "shift", "machine_id", "position", "worker_id", "name"]
+        if keys:
+            columns = (
+                keys
+                + columns
+                + [c for c in ["home_site"] if c in assigned_rows.columns]
+            )
+        self.final_assignments_df = assigned_rows[columns]
 
     def get_unfilled_positions(self):
         """
         Возвращает DataFrame со всеми незаполненными позициями.
         """
         all_shifts = self._combined_shifts()
-        self.final_assignments_df = all_shifts[all_shifts["worker_id"].isna()]
+        self.final_assignments_df = all_shifts[all_shifts["worker_id"].isna()].copy()
 
     def get_brigade_summary(self):
         """
@@ -495,8 +1721,54 @@ class SchedulerReport:
         """
 
         self.report = self._summary_team(
-            self._combined_shifts(), ["week", "shift", "machine_id", "machine_type"]
+            self._combined_shifts(), self._site_keys() + BRIGADE_KEYS
+        )
+
+    def site_summary(self):
+        """
+        Разбивка по площадкам (для результата MultiSiteScheduler): кандидаты,
+        назначенные, позиции и бригады по статусам, одолженные работники
+        (lent_out — работали на другой площадке, lent_in — пришли с другой).
+        Пустой DataFrame, если площадок нет.
+        """
+        if not self._site_keys():
+            return pd.DataFrame()
+        rep = self._brigades()
+        full = (rep["required"] > 0) & (rep["assigned"] == rep["required"])
+        partial = (rep["assigned"] > 0) & (rep["assigned"] < rep["required"])
+        empty = (rep["required"] > 0) & (rep["assigned"] == 0)
+        summary = (
+            rep.assign(
+                full_brigades=full, incomplete_brigades=partial, empty_brigades=empty
+            )
+            .groupby("site")[
+                [
+                    "required",
+                    "assigned",
+                    "full_brigades",
+                    "incomplete_brigades",
+                    "empty_brigades",
+                ]
+            ]
+            .sum()
         )
+        summary["vacant"] = summary["required"] - summary["assigned"]
+
+        candidates = self.shift_candidates
+        if "site" in candidates.columns:
+            summary["candidates"] = candidates.groupby("site")["worker_id"].nunique()
+
+        if self.final_assignments_df is None:
+            self.get_final_assignments()
+        final = self.final_assignments_df
+        if "home_site" in final.columns:
+            lent = final[
+                final["home_site"].notna() & (final["home_site"] != final["site"])
+            ]
+            summary["lent_in"] = lent.groupby("site").size()
+            summary["lent_out"] = lent.groupby("home_site").size()
+
+        return summary.fillna(0).astype("int64").reset_index()
 
     def generate_text_summary(self, target_week):
         """
@@ -542,6 +1814,26 @@ class SchedulerReport:
             self.summary_lines.append(f"Осталось вакантных: {total_empty}")
             self.summary_lines.append("")
 
+            # --- Блок 2а: Площадки (если их несколько) ---
+            site_keys = self._site_keys()
+            if site_keys:
+                self.summary_lines.append("--- ПЛОЩАДКИ ---")
+                for row in self.site_summary().itertuples(index=False):
+                    line = (
+                        f"{row.site}: позиций {row.assigned} из {row.required}, "
+                        f"бригад N/N {row.full_brigades}, "
+                        f"M/N {row.incomplete_brigades}, 0/N {row.empty_brigades}"
+                    )
+                    if hasattr(row, "lent_in"):
+                        line += f", получено {row.lent_in}, одолжено {row.lent_out}"
+                    self.summary_lines.append(line)
+                self.summary_lines.append("")
+
+            def machine_label(row):
+                if site_keys:
+                    return f"{row['site']}/{row['machine_id']}"
+                return row["machine_id"]
+
             # --- Блок 3: Проблемные бригады ---
             self.summary_lines.append("--- !!! ПРОБЛЕМНЫЕ БРИГАДЫ ---")
 
@@ -553,13 +1845,18 @@ class SchedulerReport:
                     # если столбец есть, фильтруем по нему
                     pl = pl[pl["works"].astype(int) == 1]
                 # если столбца нет (как у тебя) — уже отфильтровано на этапе подготовки
+                plan_keys = [k for k in site_keys if k in pl.columns]
                 planned_cnt = (
-                    pl[["week", "shift", "machine_id"]].drop_duplicates().shape[0]
+                    pl[plan_keys + ["week", "shift", "machine_id"]]
+                    .drop_duplicates()
+                    .shape[0]
                 )
             else:
                 # запасной путь: считаем по факту слотов
                 planned_cnt = (
-                    rep[["week", "shift", "machine_id"]].drop_duplicates().shape[0]
+                    rep[site_keys + ["week", "shift", "machine_id"]]
+                    .drop_duplicates()
+                    .shape[0]
                 )
 
             # 3.2. Фактическая укомплектованность (по rep за неделю)
@@ -587,7 +1884,7 @@ class SchedulerReport:
                 for _, row in inc.iterrows():
                     self.summary_lines.append(
                         f"  - нед.{int(row['week']):02d} {row['shift']}: "
-                        f"{row['machine_id']} — {int(row['assigned'])} из {int(row['required'])}"
+                        f"{machine_label(row)} — {int(row['assigned'])} из {int(row['required'])}"
                     )
 
             # --- Список неназначённых (0/N) ---
@@ -605,7 +1902,7 @@ class SchedulerReport:
                     if has_week and has_shift:
                         prefix = f"нед.{int(row['week']):02d} {row['shift']}: "
                     self.summary_lines.append(
-                        f"  - {prefix}{row['machine_id']} — 0 из {int(row['required'])}"
+                        f"  - {prefix}{machine_label(row)} — 0 из {int(row['required'])}"
                     )
 
         except Exception as e:
@@ -613,7 +1910,8 @@ class SchedulerReport:
 
     def problem_brigades(self):
         """Возвращает объединённый список неполных и пустых бригад."""
-        cols = [
+        keys = self._site_keys()
+        cols = keys + [
             "week",
             "shift",
             "machine_id",
@@ -628,8 +1926,8 @@ class SchedulerReport:
         return (
             pd.concat([inc, emp], ignore_index=True)
             .sort_values(
-                ["week", "shift", "status", "missing", "machine_id"],
-                ascending=[True, True, True, False, True],
+                keys + ["week", "shift", "status", "missing", "machine_id"],
+                ascending=[True] * len(keys) + [True, True, True, False, True],
             )
             .reset_index(drop=True)
         )
@@ -642,66 +1940,331 @@ class SchedulerReport:
         Args:
             target_week (int): Номер целевой недели.
             start_date (datetime.date): Объект date понедельника.
+
+        Returns:
+            str или None, если назначений за неделю нет. Для записи в файл
+            без сборки всей строки — write_human_readable_txt.
         """
         try:
-            # 1. Фильтруем DF только по текущей неделе
-            current_week_df = self.final_assignments_df[
-                self.final_assignments_df["week"] == target_week
-            ]
-
-            if current_week_df.empty:
-                return None  # Нет данных для генерации
-
-            # 2. Собираем текстовые строки
-            lines = []
-
-            # --- Строка 1: Диапазон дат ---
-            end_date = start_date + timedelta(days=4)  # Пятница
-            date_range_str = (
-                f"Расписание на неделю: {start_date.strftime('%d.%m.%Y')} - "
-                f"{end_date.strftime('%d.%m.%Y')} (Неделя {target_week})"
+            lines = iter_schedule_lines(
+                self.final_assignments_df, target_week, start_date
             )
+            text = "\n".join(lines)
+            return text or None
 
-            lines.append(date_range_str)
-            lines.append("=" * len(date_range_str))
-            lines.append("")  # Пустая строка
-
-            # 3. Цикл по сменам, машинам, позициям
-            shift_translation = {"night": "Ночь", "day": "День", "evening": "Вечер"}
-            shifts_order = ["night", "day", "evening"]
-
-            for shift in shifts_order:
-                shift_name = shift_translation.get(shift, shift.capitalize())
-                lines.append(f"--- СМЕНА: {shift_name} ---")
-
-                shift_df = current_week_df[
-                    current_week_df["shift"] == shift
-                ].sort_values(by=["machine_id", "position"])
-
-                if shift_df.empty:
-                    lines.append("\t(Нет назначений в этой смене)")
-                    lines.append("")
-                    continue
-
-                machines = shift_df["machine_id"].unique()
-                for machine in machines:
-                    lines.append(f"\tМашина: {machine}")
-
-                    machine_df = shift_df[shift_df["machine_id"] == machine]
-
-                    for _, assignment_row in machine_df.iterrows():
-                        pos_name = assignment_row["position"]
-                        worker_name = assignment_row["name"]
+        except Exception as e:
+            print(f"Ошибка при генерации TXT в SchedulerReport: {e}")
+            return None
 
-                        if pd.isna(worker_name):
-                            worker_name = "--- ВАКАНСИЯ ---"
+    def write_human_readable_txt(self, file, target_week, start_date):
+        """
+        Потоково пишет расписание недели в открытый текстовый файл file.
 
-                        lines.append(f"\t\t- Позиция {pos_name}: {worker_name}")
+        Returns:
+            bool: Были ли назначения (записано ли что-нибудь).
+        """
+        return _write_lines(
+            file,
+            iter_schedule_lines(self.final_assignments_df, target_week, start_date),
+        )
 
-                    lines.append("")  # Пустая строка после каждой машины
 
-            return "\n".join(lines)
+# Порядок и подписи смен в текстовом расписании
+SHIFT_TITLES = {"night": "Ночь", "day": "День", "evening": "Вечер"}
+
+
+def _sort_schedule(assignments):
+    """
+    Назначения, отсортированные один раз по (неделя, смена, машина, позиция).
+
+    Смена и машина — category: сортировка по кодам словаря шла бы в
+    порядке словаря (day, evening, night), поэтому значения раскодируются.
+    Строки неизвестных смен уходят в конец своей недели и не выводятся.
+    """
+    df = assignments.astype({"shift": object, "machine_id": object})
+    shift_order = {shift: idx for idx, shift in enumerate(SHIFT_TITLES)}
+    return df.assign(_shift_order=df["shift"].map(shift_order)).sort_values(
+        ["week", "_shift_order", "machine_id", "position"], kind="stable"
+    )
+
+
+def _week_lines(week_df, target_week, start_date):
+    """Строки расписания одной недели по уже отсортированным назначениям."""
+    if week_df.empty:
+        return  # Нет данных для генерации
+
+    # --- Строка 1: Диапазон дат ---
+    end_date = start_date + timedelta(days=4)  # Пятница
+    date_range_str = (
+        f"Расписание на неделю: {start_date.strftime('%d.%m.%Y')} - "
+        f"{end_date.strftime('%d.%m.%Y')} (Неделя {target_week})"
+    )
+    yield date_range_str
+    yield "=" * len(date_range_str)
+    yield ""
+
+    rows = week_df[["shift", "machine_id", "position", "name"]].itertuples(
+        index=False, name=None
+    )
+
+    pending = next(rows, None)
+    for shift, title in SHIFT_TITLES.items():
+        yield f"--- СМЕНА: {title} ---"
+        if pending is None or pending[0] != shift:
+            yield "\t(Нет назначений в этой смене)"
+            yield ""
+            continue
+
+        machine = None
+        while pending is not None and pending[0] == shift:
+            _, machine_id, position, name = pending
+            if machine_id != machine:
+                if machine is not None:
+                    yield ""  # Пустая строка после каждой машины
+                yield f"\tМашина: {machine_id}"
+                machine = machine_id
+            if pd.isna(name):
+                name = "--- ВАКАНСИЯ ---"
+            yield f"\t\t- Позиция {position}: {name}"
+            pending = next(rows, None)
+        yield ""
+
+
+def iter_schedule_lines(assignments, target_week, start_date):
+    """
+    Строки текстового расписания недели (генератор, без символов перевода строки).
+
+    Назначения сортируются один раз (смена, машина, позиция) и проходятся
+    за один проход без фильтрации по каждой смене и машине.
+
+    Args:
+        assignments: DataFrame week/shift/machine_id/position/name (может
+            содержать несколько недель).
+        target_week: Неделя, которую выводим.
+        start_date: datetime.date понедельника недели.
+    """
+    week_df = assignments[assignments["week"] == target_week]
+    yield from _week_lines(_sort_schedule(week_df), target_week, start_date)
+
+
+def _write_lines(file, lines):
+    """Пишет строки через перевод строки (как join); True, если была хоть одна."""
+    first = True
+    for line in lines:
+        if not first:
+            file.write("\n")
+        file.write(line)
+        first = False
+    return not first
+
+
+def write_schedule_txt(
+    assignments, start_dates, path=None, output_dir=None, encoding="utf-8"
+):
+    """
+    Потоковый экспорт текстового расписания нескольких недель за один вызов.
+
+    Args:
+        assignments: DataFrame назначений (например, результат generate_range).
+        start_dates: dict {неделя: datetime.date понедельника}; экспортируются
+            недели из этого словаря, в его порядке.
+        path: Один файл на все недели (недели разделены пустой строкой).
+        output_dir: Или каталог для файлов `Расписание_Неделя_<N>.txt`.
+
+    Returns:
+        list: Пути записанных файлов (недели без назначений пропускаются).
+    """
+    if (path is None) == (output_dir is None):
+        raise ValueError("Укажите ровно один из параметров: path или output_dir.")
+
+    # Одна сортировка на весь диапазон; недели берутся группами без
+    # повторной фильтрации и сортировки всего кадра
+    weeks = dict(iter(_sort_schedule(assignments).groupby("week", sort=False)))
+    week_lines = (
+        (week, _week_lines(weeks[week], week, start_date))
+        for week, start_date in start_dates.items()
+        if week in weeks
+    )
+
+    if path is not None:
+        with open(path, "w", encoding=encoding) as f:
+            written = False
+            for _, lines in week_lines:
+                if written:
+                    f.write("\n")  # Пустая строка между неделями
+                written = _write_lines(f, lines) or written
+        return [path]
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for week, lines in week_lines:
+        file_path = os.path.join(output_dir, f"Расписание_Неделя_{week}.txt")
+        with open(file_path, "w", encoding=encoding) as f:
+            _write_lines(f, lines)
+        paths.append(file_path)
+    return paths
+
+
+def generate_range(
+    workers,
+    equipment,
+    schedule,
+    requirements,
+    plan,
+    start_week,
+    end_week,
+    backend="numpy",
+    carry_unassigned=False,
+    parallel=False,
+    plan_long=None,
+):
+    """
+    Генерирует расписание на недели start_week..end_week (включительно)
+    целиком в памяти: DataPipeline -> AssignmentEngine -> SchedulerReport.
+
+    Ротация каждой следующей недели строится по только что сгенерированной
+    (как если бы после каждой недели нажимали Save), но assignment_history.csv
+    не пишется и CSV не перечитываются.
+
+    Args:
+        workers, equipment, schedule, requirements, plan: исходные DataFrame
+            (как в DataPipeline); schedule может быть HistoryStore или
+            HistoryIndex.
+        start_week: Первая генерируемая неделя.
+        end_week: Последняя генерируемая неделя.
+        backend: backend для AssignmentEngine.
+        carry_unassigned: Переносить в ротацию и тех, кто остался без смены
+            (со сменой, в которую они были кандидатами). По умолчанию, как и
+            при Save, в историю попадают только назначенные.
+        parallel: Спекулятивный режим AssignmentEngine (только
+            backend="numpy"); не ускоряет прогон.
+        plan_long: Готовый длинный план (например, из data_cache); тогда
+            workers должны быть подготовлены (prepare_workers), как в
+            DataPipeline. Справочники копируются: кешированные кадры
+            вызывающей стороны не меняются.
+
+    Returns:
+        tuple: (DataFrame назначений за все недели, dict {week: SchedulerReport}).
+    """
+    if end_week < start_week:
+        raise ValueError(
+            f"Неверный диапазон недель: {start_week}..{end_week} "
+            "(end_week должен быть не меньше start_week)."
+        )
 
-        except Exception as e:
-            print(f"Ошибка при генерации TXT в SchedulerReport: {e}")
-            return None
+    rotation_cols = ["worker_id", "week", "shift"]
+    if isinstance(schedule, (HistoryStore, HistoryIndex)):
+        schedule = schedule.rotation_base(start_week - 1)
+    pipeline = DataPipeline(
+        workers.copy(),
+        equipment.copy(),
+        schedule[rotation_cols],
+        requirements.copy(),
+        plan.copy(),
+        plan_long=None if plan_long is None else plan_long.copy(),
+    )
+
+    frames = []
+    reports = {}
+    for week in range(start_week, end_week + 1):
+        pipeline.run(week)
+
+        engine = AssignmentEngine(
+            pipeline.shift_candidates,
+            pipeline.shift_equipment_day,
+            pipeline.shift_equipment_evening,
+            pipeline.shift_equipment_night,
+            backend=backend,
+            parallel=parallel,
+        )
+        engine.run()
+
+        report = SchedulerReport(
+            shift_equipment_day=engine.shift_equipment_day,
+            shift_equipment_evening=engine.shift_equipment_evening,
+            shift_equipment_night=engine.shift_equipment_night,
+            workers=pipeline.workers,
+            shift_candidates=pipeline.shift_candidates,
+            global_assigned_set=engine.global_assigned,
+            plan_long=pipeline.plan_long,
+        )
+        report.get_final_assignments()
+        report.get_brigade_summary()
+        report.generate_text_summary(week)
+
+        frames.append(report.final_assignments_df)
+        reports[week] = report
+
+        # Скользящее состояние: следующей неделе нужна только эта неделя
+        rotation = report.final_assignments_df[rotation_cols]
+        if carry_unassigned:
+            rotation = pd.concat(
+                [rotation, engine.no_position[rotation_cols]], ignore_index=True
+            )
+        pipeline.schedule = rotation
+
+    return pd.concat(frames, ignore_index=True), reports
+
+
+def compare_backends(
+    shift_candidates,
+    shift_equipment_day,
+    shift_equipment_evening,
+    shift_equipment_night,
+    backends=("numpy", "optimal"),
+):
+    """
+    Прогоняет одну неделю несколькими backend движка и сравнивает результат:
+    закрытые/вакантные позиции, полные/неполные/пустые бригады и показатели
+    модели стоимости ShiftMatcher (стоимость, переходы из другой смены,
+    назначения не по основной профессии, избыток ранга, ранг ниже min_rank).
+
+    Args:
+        shift_candidates, shift_equipment_*: результат DataPipeline.run.
+        backends: Сравниваемые backend AssignmentEngine.
+
+    Returns:
+        DataFrame: одна строка на backend в порядке backends.
+    """
+    rows = []
+    for backend in backends:
+        engine = AssignmentEngine(
+            shift_candidates,
+            shift_equipment_day,
+            shift_equipment_evening,
+            shift_equipment_night,
+            backend=backend,
+        )
+        started = time.perf_counter()
+        engine.run()
+        seconds = time.perf_counter() - started
+
+        frames = {
+            "day": engine.shift_equipment_day,
+            "evening": engine.shift_equipment_evening,
+            "night": engine.shift_equipment_night,
+        }
+        arrays = engine._arrays(frames)
+        matcher = ShiftMatcher(arrays)
+
+        row = {"backend": backend, "seconds": seconds}
+        totals = defaultdict(int)
+        for shift_name in frames:
+            slots = arrays.slots[shift_name]
+            required, assigned = arrays.team_counts(slots)
+            totals["required"] += int(required.sum())
+            totals["filled"] += int(assigned.sum())
+            totals["complete_brigades"] += int(
+                ((required > 0) & (assigned == required)).sum()
+            )
+            totals["incomplete_brigades"] += int(
+                ((assigned > 0) & (assigned < required)).sum()
+            )
+            totals["empty_brigades"] += int(((required > 0) & (assigned == 0)).sum())
+            for key, value in matcher.score(shift_name, slots).items():
+                totals[key] += value
+        row.update(totals)
+        row["vacant"] = row["required"] - row["filled"]
+        rows.append(row)
+
+    return pd.DataFrame(rows)
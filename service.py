@@ -0,0 +1,281 @@
+"""
+Локальный HTTP-сервис генерации расписания с «тёплыми» справочниками в памяти.
+
+Запуск:
+    python service.py --port 8765
+
+Эндпоинты (параметр ?backend=numpy|pandas|optimal, по умолчанию numpy):
+    GET /health                          — состояние сервиса
+    GET /weeks/<N>                       — назначения недели N (JSON)
+    GET /weeks/<N>/problem_brigades      — проблемные бригады (JSON)
+    GET /weeks/<N>/summary               — текстовая сводка (text/plain)
+
+Справочники разбираются один раз и перечитываются только при изменении CSV.
+Результаты кешируются по (неделя, backend, хеш входных данных: справочники и
+прочитанная база ротации); параллельные запросы одной недели ждут одного
+расчёта, а не запускают свои.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from data_cache import load_reference_data, reference_fingerprint
+from history_store import HistoryStore
+from scheduler import DataPipeline, PipelineMemo, AssignmentEngine, SchedulerReport
+from validation import InputValidationError
+
+BACKENDS = ("numpy", "pandas", "optimal")
+ROUTE = re.compile(r"^/weeks/(\d{1,2})(?:/(problem_brigades|summary))?/?$")
+
+
+def _records(df):
+    """DataFrame -> list of dict, пригодный для json.dumps (NaN -> null)."""
+    return json.loads(df.to_json(orient="records", force_ascii=False))
+
+
+class ScheduleService:
+    """Тёплое состояние сервиса: справочники, история и кеш результатов."""
+
+    def __init__(self, data_dir="data", history_dir=None, max_cached=32):
+        """
+        Args:
+            data_dir: Каталог справочников CSV.
+            history_dir: Каталог истории (по умолчанию <data_dir>/history).
+            max_cached: Сколько сгенерированных недель держать в памяти.
+        """
+        self.data_dir = data_dir
+        self.history = HistoryStore(
+            history_dir or os.path.join(data_dir, "history"),
+            legacy_csv=os.path.join(data_dir, "assignment_history.csv"),
+        )
+        self.max_cached = max_cached
+
+        self._lock = threading.Lock()
+        # HistoryStore не потокобезопасен: чтения истории из потоков
+        # запросов идут по одному
+        self._history_lock = threading.Lock()
+        self._reference = None
+        self._reference_key = None
+        self._results = OrderedDict()
+        self._pending = {}
+        # Проверка входа, навыки и кандидаты недели — общие для backend
+        self.pipeline_memo = PipelineMemo()
+
+    # --- Входные данные -----------------------------------------------------
+    def reference(self):
+        """Справочники; перечитываются (через data_cache), только если CSV изменились."""
+        key = reference_fingerprint(self.data_dir)
+        with self._lock:
+            if key != self._reference_key:
+                self._reference = load_reference_data(
+                    self.data_dir,
+                    os.path.join(self.data_dir, ".cache", "reference.pkl"),
+                )
+                self._reference_key = key
+            return self._reference, key
+
+    def rotation_input(self, week, reference_key):
+        """
+        База ротации недели (прошлая неделя истории) и хеш входа по ней.
+
+        База читается один раз под блокировкой истории, и хеш считается
+        по прочитанным данным: результат в кеше всегда соответствует тому,
+        из чего он посчитан, даже если Save из GUI/CLI пишет неделю
+        одновременно с запросом.
+
+        Returns:
+            (DataFrame worker_id/week/shift, хеш справочников + недели + базы).
+        """
+        with self._history_lock:
+            base = self.history.rotation_base(week - 1).copy()
+        history_key = DataPipeline.fingerprint(base)
+        payload = repr((reference_key, week, history_key)).encode("utf-8")
+        return base, hashlib.sha256(payload).hexdigest()[:16]
+
+    # --- Генерация ----------------------------------------------------------
+    def _generate(self, week, backend, reference, rotation_base):
+        pipeline = DataPipeline(
+            reference["workers"],
+            reference["equipment"],
+            rotation_base,
+            reference["requirements"],
+            reference["plan"],
+            plan_long=reference["plan_long"],
+            memo=self.pipeline_memo,
+        )
+        pipeline.run(week)
+
+        engine = AssignmentEngine(
+            pipeline.shift_candidates,
+            pipeline.shift_equipment_day,
+            pipeline.shift_equipment_evening,
+            pipeline.shift_equipment_night,
+            backend=backend,
+        )
+        engine.run()
+
+        report = SchedulerReport(
+            shift_equipment_day=engine.shift_equipment_day,
+            shift_equipment_evening=engine.shift_equipment_evening,
+            shift_equipment_night=engine.shift_equipment_night,
+            workers=pipeline.workers,
+            shift_candidates=pipeline.shift_candidates,
+            global_assigned_set=engine.global_assigned,
+            plan_long=pipeline.plan_long,
+        )
+        report.get_final_assignments()
+        report.get_brigade_summary()
+        report.generate_text_summary(week)
+        return {
+            "assignments": _records(report.final_assignments_df),
+            "problem_brigades": _records(report.problem_brigades()),
+            "summary": report.summary_lines,
+        }
+
+    def result(self, week, backend="numpy"):
+        """
+        Результат недели из кеша или свежий расчёт.
+
+        Returns:
+            (result, meta): dict с assignments/problem_brigades/summary и
+            dict week/backend/input_hash/cached/seconds.
+        """
+        reference, reference_key = self.reference()
+        rotation_base, input_hash = self.rotation_input(week, reference_key)
+        key = (week, backend, input_hash)
+        meta = {"week": week, "backend": backend, "input_hash": key[2]}
+
+        while True:
+            with self._lock:
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    return self._results[key], dict(meta, cached=True, seconds=0.0)
+                event = self._pending.get(key)
+                if event is None:
+                    event = self._pending[key] = threading.Event()
+                    break
+            # Ту же неделю уже считает другой запрос — ждём его результата
+            event.wait()
+
+        started = time.perf_counter()
+        try:
+            result = self._generate(week, backend, reference, rotation_base)
+            with self._lock:
+                self._results[key] = result
+                while len(self._results) > self.max_cached:
+                    self._results.popitem(last=False)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            event.set()
+        seconds = round(time.perf_counter() - started, 4)
+        return result, dict(meta, cached=False, seconds=seconds)
+
+    def health(self):
+        with self._history_lock:
+            weeks = self.history.weeks()
+        with self._lock:
+            return {
+                "status": "ok",
+                "reference_loaded": self._reference is not None,
+                "cached_results": len(self._results),
+                "history_weeks": weeks,
+            }
+
+
+class ScheduleHandler(BaseHTTPRequestHandler):
+    """HTTP-обработчик поверх ScheduleService (server.service)."""
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8"):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, ensure_ascii=False)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, {"error": message})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        service = self.server.service
+        if url.path.rstrip("/") == "/health":
+            self._send(200, service.health())
+            return
+
+        match = ROUTE.match(url.path)
+        if match is None:
+            self._error(404, f"Неизвестный путь: {url.path}")
+            return
+        week, view = int(match.group(1)), match.group(2)
+        backend = parse_qs(url.query).get("backend", ["numpy"])[0]
+        if not 1 <= week <= 53:
+            self._error(400, "Неделя должна быть в диапазоне 1 - 53")
+            return
+        if backend not in BACKENDS:
+            self._error(400, f"Неизвестный backend '{backend}'")
+            return
+
+        try:
+            result, meta = service.result(week, backend)
+        except InputValidationError as e:
+            self._send(
+                422,
+                {"error": str(e).splitlines()[0], "issues": _records(e.issues)},
+            )
+            return
+        except Exception as e:
+            self._error(500, repr(e))
+            return
+
+        if view == "summary":
+            self._send(
+                200, "\n".join(result["summary"]) + "\n", "text/plain; charset=utf-8"
+            )
+        elif view == "problem_brigades":
+            self._send(200, dict(meta, problem_brigades=result["problem_brigades"]))
+        else:
+            self._send(200, dict(meta, assignments=result["assignments"]))
+
+
+def make_server(host="127.0.0.1", port=8765, service=None):
+    """ThreadingHTTPServer с привязанным ScheduleService."""
+    server = ThreadingHTTPServer((host, port), ScheduleHandler)
+    server.service = service or ScheduleService()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--history-dir", default=None)
+    args = parser.parse_args(argv)
+
+    service = ScheduleService(args.data_dir, args.history_dir)
+    service.reference()
+    server = make_server(args.host, args.port, service)
+    print(f"Сервис расписания: http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+Планирование нескольких площадок (цехов) за один прогон.
+
+Каждая площадка — свой набор справочников и своя история ротации; данные
+площадок не смешиваются, поэтому площадки считаются независимо и
+параллельно. Итог собирается в один SchedulerReport со столбцом site
+(разбивка по площадкам — SchedulerReport.site_summary()).
+
+Раскладка каталогов для load_sites:
+    <root>/<площадка>/workers.csv, equipment.csv, position_requirements.csv,
+    plan.csv, history/ (и assignment_history.csv до миграции)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data_cache import load_reference_data
+from history_store import HistoryIndex, HistoryStore
+from scheduler import AssignmentEngine, DataPipeline, SchedulerReport, summary_team
+
+SHIFTS = ("day", "evening", "night")
+ROTATION_COLUMNS = ["worker_id", "week", "shift"]
+
+
+def _concat(frames):
+    """
+    pd.concat кадров разных площадок с общими словарями category: у каждой
+    площадки свои словари (worker_id, machine_id, ...), поэтому они
+    объединяются, и столбцы остаются category.
+    """
+    frames = list(frames)
+    for column in {c for frame in frames for c in frame.columns}:
+        present = [frame[column] for frame in frames if column in frame.columns]
+        if not any(isinstance(s.dtype, pd.CategoricalDtype) for s in present):
+            continue
+        values = set()
+        for series in present:
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values.update(series.cat.categories.tolist())
+            else:
+                values.update(series.dropna().unique().tolist())
+        dtype = pd.CategoricalDtype(sorted(values))
+        frames = [
+            frame.astype({column: dtype}) if column in frame.columns else frame
+            for frame in frames
+        ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_sites(root, use_cache=True):
+    """
+    Справочники и история всех площадок каталога root.
+
+    Площадка — подкаталог с workers.csv; имя площадки — имя подкаталога.
+
+    Returns:
+        dict {площадка: dict workers/equipment/requirements/plan/plan_long
+        (как load_reference_data) + schedule (HistoryStore площадки)},
+        площадки по алфавиту.
+    """
+    sites = {}
+    for name in sorted(os.listdir(root)):
+        site_dir = os.path.join(root, name)
+        if not os.path.isfile(os.path.join(site_dir, "workers.csv")):
+            continue
+        cache_path = os.path.join(site_dir, ".cache", "reference.pkl")
+        site = dict(load_reference_data(site_dir, cache_path if use_cache else None))
+        site["schedule"] = HistoryStore(
+            os.path.join(site_dir, "history"),
+            legacy_csv=os.path.join(site_dir, "assignment_history.csv"),
+        )
+        sites[name] = site
+    if not sites:
+        raise ValueError(
+            f"В каталоге '{root}' нет площадок (подкаталогов с workers.csv)."
+        )
+    return sites
+
+
+def _schedule_site(site, target_week, backend):
+    """
+    DataPipeline + AssignmentEngine одной площадки (выполняется в executor).
+    Справочники копируются, как в generate_range: DataPipeline дополняет
+    workers, и кадры площадки у вызывающей стороны не меняются.
+    """
+    schedule = site["schedule"]
+    if isinstance(schedule, (HistoryStore, HistoryIndex)):
+        schedule = schedule.rotation_base(target_week - 1)
+    plan_long = site.get("plan_long")
+    pipeline = DataPipeline(
+        site["workers"].copy(),
+        site["equipment"].copy(),
+        schedule,
+        site["requirements"].copy(),
+        site["plan"].copy(),
+        plan_long=None if plan_long is None else plan_long.copy(),
+    )
+    pipeline.run(target_week)
+
+    engine = AssignmentEngine(
+        pipeline.shift_candidates,
+        pipeline.shift_equipment_day,
+        pipeline.shift_equipment_evening,
+        pipeline.shift_equipment_night,
+        backend=backend,
+    )
+    engine.run()
+    return pipeline, engine
+
+
+class MultiSiteScheduler:
+    """
+    Неделя для нескольких площадок: независимые прогоны по площадкам
+    (параллельно) и, по желанию, одалживание работников между площадками.
+
+    При lending=True после основных прогонов работники, оставшиеся на своей
+    площадке без позиции, предлагаются на вакансии других площадок: они
+    добавляются кандидатами (со своей сменой по ротации) и бригады с
+    вакансиями пересчитываются AssignmentEngine.repair — по тем же правилам,
+    что и свои работники. Площадки-получатели обходятся в порядке sites,
+    поэтому результат детерминирован.
+
+    worker_id должны быть уникальны между площадками (одалженный работник
+    узнаётся по worker_id); machine_id могут повторяться.
+    """
+
+    def __init__(self, sites, backend="numpy", lending=False, executor=None):
+        """
+        Args:
+            sites: dict {площадка: dict workers/equipment/requirements/plan,
+                необязательный plan_long, schedule (DataFrame истории,
+                HistoryStore или HistoryIndex)} — см. load_sites.
+            backend: backend для AssignmentEngine.
+            lending: Одалживать работников без позиции другим площадкам.
+            executor: concurrent.futures.Executor для прогонов площадок; по
+                умолчанию ThreadPoolExecutor на число площадок.
+        """
+        if not sites:
+            raise ValueError("Не задано ни одной площадки.")
+        self.sites = sites
+        self.backend = backend
+        self.lending = lending
+        self.executor = executor
+        self._check_worker_ids()
+
+        self.pipelines = {}
+        self.engines = {}
+        self.reports = {}
+        self.lent = None
+        self.report = None
+
+    def _check_worker_ids(self):
+        home = pd.concat(
+            [
+                site["workers"][["worker_id"]].assign(site=name)
+                for name, site in self.sites.items()
+            ],
+            ignore_index=True,
+        )
+        shared = home[home["worker_id"].duplicated(keep=False)]
+        if not shared.empty:
+            sample = ", ".join(map(str, shared["worker_id"].unique()[:10]))
+            raise ValueError(
+                f"worker_id повторяются на разных площадках: {sample}. "
+                "Идентификаторы работников должны быть уникальны."
+            )
+
+    # --- Прогон ------------------------------------------------------------
+    def run(self, target_week):
+        """
+        Считает неделю target_week по всем площадкам.
+
+        Returns:
+            SchedulerReport: общий отчёт (столбец site, разбивка
+            site_summary()); отчёты по площадкам — в self.reports,
+            одалженные работники — в self.lent.
+        """
+        names = list(self.sites)
+        executor = self.executor or ThreadPoolExecutor(max_workers=len(names))
+        try:
+            futures = {
+                name: executor.submit(
+                    _schedule_site, self.sites[name], target_week, self.backend
+                )
+                for name in names
+            }
+            results = {name: future.result() for name, future in futures.items()}
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+
+        self.pipelines = {name: result[0] for name, result in results.items()}
+        self.engines = {name: result[1] for name, result in results.items()}
+        self.lent = self._lend() if self.lending else self._no_lending()
+
+        self.reports = {name: self._site_report(name) for name in names}
+        self.report = self._merged_report(target_week)
+        return self.report
+
+    def _no_lending(self):
+        return pd.DataFrame(columns=["worker_id", "home_site", "site", "shift"])
+
+    def _vacancies(self, engine, shift_name):
+        """Машины смены, где остались пустые позиции."""
+        frame = getattr(engine, f"shift_equipment_{shift_name}")
+        summary = summary_team(frame, ["machine_id", "machine_type"])
+        return summary.loc[
+            summary["assigned"] < summary["required"], "machine_id"
+        ].tolist()
+
+    def _lend(self):
+        """Одалживание свободных работников; возвращает DataFrame одалженных."""
+        lent = []
+        for site in self.sites:
+            engine = self.engines[site]
+            vacancies = {
+                shift_name: self._vacancies(engine, shift_name) for shift_name in SHIFTS
+            }
+            if not any(vacancies.values()):
+                continue
+
+            pool = [
+                self.engines[home].no_position.assign(_home=home)
+                for home in self.sites
+                if home != site and not self.engines[home].no_position.empty
+            ]
+            if not pool:
+                continue
+            pool = _concat(pool)
+            homes = pool.pop("_home")
+
+            own = engine.shift_candidates
+            engine.shift_candidates = _concat([own, pool])
+            for shift_name, machine_ids in vacancies.items():
+                if machine_ids:
+                    engine.repair(shift_name, machine_ids)
+
+            # Кандидатами остаются только реально одолженные; у своей
+            # площадки они больше не числятся
+            used = pool["worker_id"].isin(engine.global_assigned)
+            engine.shift_candidates = _concat([own, pool[used]])
+            engine._update_no_position()
+            for home in homes[used].unique():
+                donor = self.engines[home]
+                donor.shift_candidates = donor.shift_candidates[
+                    ~donor.shift_candidates["worker_id"].isin(
+                        pool.loc[used, "worker_id"]
+                    )
+                ].reset_index(drop=True)
+                donor._update_no_position()
+
+            lent.append(
+                pd.DataFrame(
+                    {
+                        "worker_id": pool.loc[used, "worker_id"].values,
+                        "home_site": homes[used].values,
+                        "site": site,
+                        "shift": pool.loc[used, "shift"].values,
+                    }
+                )
+            )
+        lent = [frame for frame in lent if not frame.empty]
+        if not lent:
+            return self._no_lending()
+        return pd.concat(lent, ignore_index=True)
+
+    # --- Отчёты ------------------------------------------------------------
+    def _workers(self, site):
+        """Работники площадки вместе с одолженными ей (для имён в отчёте)."""
+        workers = self.pipelines[site].workers
+        guests = self.lent.loc[self.lent["site"] == site]
+        if guests.empty:
+            return workers
+        others = [self.pipelines[home].workers for home in guests["home_site"].unique()]
+        others = pd.concat(others, ignore_index=True)
+        others = others[others["worker_id"].isin(guests["worker_id"])]
+        return pd.concat([workers, others], ignore_index=True)
+
+    def _site_report(self, site):
+        pipeline, engine = self.pipelines[site], self.engines[site]
+        report = SchedulerReport(
+            shift_equipment_day=engine.shift_equipment_day,
+            shift_equipment_evening=engine.shift_equipment_evening,
+            shift_equipment_night=engine.shift_equipment_night,
+            workers=self._workers(site),
+            shift_candidates=engine.shift_candidates,
+            global_assigned_set=engine.global_assigned,
+            plan_long=pipeline.plan_long,
+        )
+        report.get_final_assignments()
+        report.get_brigade_summary()
+        return report
+
+    def _merged_report(self, target_week):
+        def stacked(frames):
+            return _concat(frame.assign(site=site) for site, frame in frames.items())
+
+        frames = {
+            shift_name: stacked(
+                {
+                    site: getattr(engine, f"shift_equipment_{shift_name}")
+                    for site, engine in self.engines.items()
+                }
+            )
+            for shift_name in SHIFTS
+        }
+        assigned = set()
+        for engine in self.engines.values():
+            assigned |= engine.global_assigned
+
+        report = SchedulerReport(
+            shift_equipment_day=frames["day"],
+            shift_equipment_evening=frames["evening"],
+            shift_equipment_night=frames["night"],
+            workers=stacked({site: p.workers for site, p in self.pipelines.items()}),
+            shift_candidates=stacked(
+                {site: e.shift_candidates for site, e in self.engines.items()}
+            ),
+            global_assigned_set=assigned,
+            plan_long=stacked(
+                {site: p.plan_long for site, p in self.pipelines.items()}
+            ),
+        )
+        report.get_final_assignments()
+        report.get_brigade_summary()
+        report.generate_text_summary(target_week)
+        return report
+
+    # --- История -------------------------------------------------------------
+    def rotation(self, site, report=None):
+        """
+        Назначения недели (report, по умолчанию последний run), по которым
+        строится ротация площадки site: её работники, включая одолженных
+        другим (ротация идёт за человеком, а не за машиной).
+        """
+        final = (report or self.report).final_assignments_df
+        return final[final["home_site"] == site]
+
+    def save(self, target_week, report=None):
+        """Записывает неделю в HistoryStore каждой площадки (как Save в GUI)."""
+        columns = ["week", "shift", "machine_id", "position", "worker_id", "name"]
+        for site, data in self.sites.items():
+            data["schedule"].write_week(
+                target_week, self.rotation(site, report)[columns]
+            )
+
+    def run_range(self, start_week, end_week):
+        """
+        Недели start_week..end_week в памяти, как generate_range: ротация
+        следующей недели строится по только что посчитанной, история не
+        пишется.
+
+        Returns:
+            tuple: (DataFrame назначений за все недели со столбцом site,
+            dict {week: SchedulerReport}).
+        """
+        if end_week < start_week:
+            raise ValueError(
+                f"Неверный диапазон недель: {start_week}..{end_week} "
+                "(end_week должен быть не меньше start_week)."
+            )
+        sites = self.sites
+        self.sites = dict(sites)
+        try:
+            frames, reports = [], {}
+            for week in range(start_week, end_week + 1):
+                reports[week] = self.run(week)
+                frames.append(self.report.final_assignments_df)
+                self.sites = {
+                    site: dict(data, schedule=self.rotation(site)[ROTATION_COLUMNS])
+                    for site, data in self.sites.items()
+                }
+        finally:
+            self.sites = sites
+        return _concat(frames), reports
@@ -0,0 +1,92 @@
+"""
+Общие фикстуры тестов: справочники и история из data/ (без кеша и без
+каталога data/history — тесты ничего не пишут в репозиторий).
+"""
+
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_cache import load_reference_data  # noqa: E402
+from scheduler import DataPipeline, generate_range  # noqa: E402
+
+ASSIGNMENT_COLUMNS = ["week", "shift", "machine_id", "position", "worker_id"]
+
+DATA_DIR = os.path.join(ROOT, "data")
+GOLDEN_DIR = os.path.join(ROOT, "tests", "golden")
+# Неделя поставляемых данных: история заканчивается неделей 45, а
+# output/Расписание_Неделя_46.txt — её расписание, сохранённое из GUI
+WEEK = 46
+WEEK_START = date(2025, 11, 10)
+BACKENDS = ("numpy", "pandas", "optimal")
+
+
+@pytest.fixture
+def reference():
+    """Справочники data/ (как load_reference_data, без кеша)."""
+    return load_reference_data(DATA_DIR, cache_path=None)
+
+
+@pytest.fixture
+def history():
+    """Исходный журнал назначений data/assignment_history.csv."""
+    return pd.read_csv(os.path.join(DATA_DIR, "assignment_history.csv"))
+
+
+@pytest.fixture
+def generate(reference, history):
+    """generate(backend, start=WEEK, end=None) -> (combined, reports) по data/."""
+
+    def run(backend="numpy", start=WEEK, end=None, **kwargs):
+        return generate_range(
+            reference["workers"],
+            reference["equipment"],
+            history,
+            reference["requirements"],
+            reference["plan"],
+            start,
+            start if end is None else end,
+            backend=backend,
+            plan_long=reference["plan_long"],
+            **kwargs,
+        )
+
+    return run
+
+
+@pytest.fixture
+def pipeline(reference, history):
+    """DataPipeline недели WEEK на копиях справочников data/."""
+    pipeline = DataPipeline(
+        reference["workers"].copy(),
+        reference["equipment"],
+        history[["worker_id", "week", "shift"]],
+        reference["requirements"],
+        reference["plan"],
+        plan_long=reference["plan_long"],
+    )
+    pipeline.run(WEEK)
+    return pipeline
+
+
+def shift_assignments(engine):
+    """
+    Назначения трёх смен движка одной таблицей ASSIGNMENT_COLUMNS
+    (идентификаторы строками, порядок — смена, машина, позиция).
+    """
+    frames = [
+        getattr(engine, f"shift_equipment_{shift_name}")
+        for shift_name in ("night", "day", "evening")
+    ]
+    df = pd.concat(frames, ignore_index=True)[ASSIGNMENT_COLUMNS]
+    df = df.astype({"shift": object, "machine_id": object, "worker_id": object})
+    order = {"night": 0, "day": 1, "evening": 2}
+    df = df.assign(_order=df["shift"].map(order))
+    df = df.sort_values(["_order", "machine_id", "position"]).drop(columns="_order")
+    return df.reset_index(drop=True)
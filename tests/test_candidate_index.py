@@ -0,0 +1,58 @@
+import pandas as pd
+
+from scheduler import CandidateIndex, candidate_skills
+
+
+def make_index():
+    skills = pd.DataFrame(
+        [
+            # worker_id, shift, primary_profession, profession, rank
+            ("W3", "day", "flat", "flat", 7),
+            ("W1", "day", "flat", "flat", 7),
+            ("W2", "day", "inkjet", "flat", 5),
+            ("W2", "day", "inkjet", "inkjet", 6),
+            ("W4", "night", "flat", "flat", 7),
+        ],
+        columns=["worker_id", "shift", "primary_profession", "profession", "rank"],
+    )
+    return CandidateIndex(skills)
+
+
+def test_head_prefers_rank_then_smallest_worker_id():
+    index = make_index()
+    assert index.head("day", "flat") == "W1"
+    assert index.head("day", "flat", ranks=[5]) == "W2"
+    assert index.head("night", "flat") == "W4"
+    assert index.head("evening", "flat") is None
+
+
+def test_primary_buckets_hold_only_primary_profession():
+    index = make_index()
+    assert index.head("day", "flat", ranks=[5], primary=True) is None
+    assert index.head("day", "inkjet", primary=True) == "W2"
+    assert index.count("day", "flat", primary=True) == 2
+
+
+def test_take_and_release_update_every_bucket():
+    index = make_index()
+    index.take("W1")
+    index.take("W2")
+    assert index.head("day", "flat") == "W3"
+    assert index.head("day", "inkjet") is None
+    assert index.count("day", "flat") == 1
+
+    index.release("W2")
+    assert index.head("day", "inkjet") == "W2"
+    assert index.count("day", "flat") == 2
+    # Повторные take/release не дублируют работника в корзинах
+    index.release("W2")
+    assert index.count("day", "flat") == 2
+
+
+def test_index_covers_every_candidate_skill(pipeline):
+    skills = candidate_skills(pipeline.shift_candidates, pipeline.professions)
+    index = CandidateIndex(skills)
+    for (shift_name, profession), group in skills.groupby(
+        ["shift", "profession"], observed=True
+    ):
+        assert index.count(shift_name, profession) == group["worker_id"].nunique()
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from conftest import WEEK, shift_assignments
+from scheduler import SHIFT_CATEGORIES, compact
+from test_engine_backends import golden, run_engine
+
+
+def test_compact_builds_sorted_dictionaries():
+    df = pd.DataFrame(
+        {
+            "machine_id": ["PM-02", "PM-01", None],
+            "shift": ["night", "day", "day"],
+            "position": [1, 2, 3],
+        }
+    )
+    result = compact(
+        df, ["machine_id", "shift", "worker_id"], {"machine_id": ["SM-01", "PM-01"]}
+    )
+    assert result is df
+    assert df["machine_id"].cat.categories.tolist() == ["PM-01", "PM-02", "SM-01"]
+    assert df["machine_id"].isna().tolist() == [False, False, True]
+    assert df["shift"].cat.categories.tolist() == SHIFT_CATEGORIES
+    assert df["position"].dtype == "int64"
+
+
+def test_compact_keeps_existing_category():
+    dtype = pd.CategoricalDtype(["b", "a"])
+    df = pd.DataFrame({"worker_id": pd.Series(["a"], dtype=dtype)})
+    compact(df, ["worker_id"])
+    assert df["worker_id"].dtype == dtype
+
+
+def test_pipeline_frames_share_dictionaries(pipeline):
+    candidates = pipeline.shift_candidates
+    worker_dtype = candidates["worker_id"].dtype
+    assert isinstance(worker_dtype, pd.CategoricalDtype)
+    for column in ("shift", "prev_shift"):
+        assert candidates[column].cat.categories.tolist() == SHIFT_CATEGORIES
+    for shift_name in ("day", "evening", "night"):
+        slots = getattr(pipeline, f"shift_equipment_{shift_name}")
+        assert slots["worker_id"].dtype == worker_dtype
+        assert slots["machine_id"].dtype == pipeline.plan_long["machine_id"].dtype
+    machines = pipeline.plan_long["machine_id"].cat.categories
+    assert set(pipeline.equipment["machine_id"]) <= set(machines)
+
+
+def test_engine_results_decode_to_golden(pipeline):
+    engine = run_engine(pipeline, "pandas")
+    assert isinstance(
+        engine.shift_equipment_day["worker_id"].dtype, pd.CategoricalDtype
+    )
+    pd.testing.assert_frame_equal(shift_assignments(engine), golden("greedy"))
+
+
+def test_report_views_decode_for_display(generate):
+    _, reports = generate()
+    report = reports[WEEK]
+    final = report.final_assignments_df
+    night = final[final["shift"] == "night"]
+    assert len(night) == 20
+    assert night["name"].notna().all()
+    report.generate_text_summary(WEEK)
+    assert not any("Ошибка" in line for line in report.summary_lines)
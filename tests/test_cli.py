@@ -0,0 +1,101 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import cli
+from conftest import DATA_DIR, WEEK
+
+
+def run_cli(capsys, tmp_path, *argv):
+    code = cli.main(
+        [
+            "--data-dir",
+            DATA_DIR,
+            "--history-dir",
+            str(tmp_path / "history"),
+            "--output-dir",
+            str(tmp_path / "out"),
+            "--no-cache",
+            *argv,
+        ]
+    )
+    status = json.loads(capsys.readouterr().out)
+    assert status["exit_code"] == code
+    return code, status
+
+
+def test_single_week_writes_outputs(capsys, tmp_path, history):
+    code, status = run_cli(capsys, tmp_path, "--week", str(WEEK))
+    assert code == cli.EXIT_OK
+    assert status["status"] == "ok"
+    assert status["weeks"] == [WEEK]
+    assert status["assignments"] == len(history)
+    out = tmp_path / "out"
+    assert sorted(status["outputs"]) == sorted(
+        [str(out / f"week_{WEEK}.csv"), str(out / f"summary_{WEEK}.txt")]
+    )
+    week = pd.read_csv(out / f"week_{WEEK}.csv")
+    assert len(week) == len(history)
+    assert not os.path.exists(tmp_path / "history" / f"week_{WEEK}.csv")
+
+
+def test_range_saves_history(capsys, tmp_path):
+    code, status = run_cli(
+        capsys,
+        tmp_path,
+        "--weeks",
+        str(WEEK),
+        str(WEEK + 1),
+        "--format",
+        "csv",
+        "--save-history",
+    )
+    assert code == cli.EXIT_OK
+    assert status["weeks"] == [WEEK, WEEK + 1]
+    for week in (WEEK, WEEK + 1):
+        path = tmp_path / "history" / f"week_{week}.csv"
+        assert str(path) in status["outputs"]
+        pd.testing.assert_frame_equal(
+            pd.read_csv(path), pd.read_csv(tmp_path / "out" / f"week_{week}.csv")
+        )
+
+
+def test_missing_data_is_input_error(capsys, tmp_path):
+    code = cli.main(
+        ["--week", str(WEEK), "--data-dir", str(tmp_path / "nope"), "--no-cache"]
+    )
+    status = json.loads(capsys.readouterr().out)
+    assert code == cli.EXIT_INPUT
+    assert status["status"] == "input_error"
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [],
+        ["--week", "46", "--weeks", "46", "47"],
+        ["--weeks", "47", "46"],
+        ["--week", "46", "--parallel"],
+        ["--week", "46", "--lending"],
+        ["--week", "46", "--format", "pdf"],
+    ],
+)
+def test_bad_arguments_exit_with_usage(capsys, argv):
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main(argv)
+    assert excinfo.value.code == cli.EXIT_USAGE
+    assert capsys.readouterr().out == ""
+
+
+def test_fail_on_problems(capsys, tmp_path):
+    argv = ["--weeks", str(WEEK), str(WEEK + 1), "--format", "problems"]
+    code, status = run_cli(capsys, tmp_path, *argv)
+    assert code == cli.EXIT_OK
+    assert status["problem_brigades"][str(WEEK)] == 0
+    assert status["problem_brigades"][str(WEEK + 1)] > 0
+
+    code, status = run_cli(capsys, tmp_path, *argv, "--fail-on-problems")
+    assert code == cli.EXIT_PROBLEMS
+    assert status["status"] == "problems"
@@ -0,0 +1,114 @@
+import os
+import pickle
+import shutil
+
+import pandas as pd
+import pytest
+
+import data_cache
+from conftest import WEEK
+from data_cache import CACHE_SCHEMA_VERSION, REFERENCE_FILES, load_reference_data
+from scheduler import generate_range
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    target = tmp_path / "data"
+    target.mkdir()
+    for file_name in REFERENCE_FILES.values():
+        shutil.copy(os.path.join("data", file_name), target / file_name)
+    return str(target)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+    build = data_cache._build
+
+    def counting_build(paths):
+        calls.append(paths)
+        return build(paths)
+
+    monkeypatch.setattr(data_cache, "_build", counting_build)
+    return calls
+
+
+def assert_same_frames(left, right):
+    assert left.keys() == right.keys()
+    for name in left:
+        pd.testing.assert_frame_equal(left[name], right[name])
+
+
+def test_cache_hit_skips_csv(data_dir, builds):
+    cache_path = os.path.join(data_dir, ".cache", "reference.pkl")
+    first = load_reference_data(data_dir, cache_path)
+    second = load_reference_data(data_dir, cache_path)
+    assert len(builds) == 1
+    assert_same_frames(first, second)
+    assert_same_frames(first, load_reference_data(data_dir, cache_path=None))
+
+
+def test_touch_keeps_cache(data_dir, builds):
+    cache_path = os.path.join(data_dir, ".cache", "reference.pkl")
+    load_reference_data(data_dir, cache_path)
+    workers_csv = os.path.join(data_dir, REFERENCE_FILES["workers"])
+    st = os.stat(workers_csv)
+    os.utime(workers_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    load_reference_data(data_dir, cache_path)
+    assert len(builds) == 1
+    with open(cache_path, "rb") as f:
+        stat = pickle.load(f)["sources"]["workers"]["stat"]
+    assert stat == (st.st_mtime_ns + 10**9, st.st_size)
+
+
+def test_changed_csv_rebuilds(data_dir, builds):
+    cache_path = os.path.join(data_dir, ".cache", "reference.pkl")
+    load_reference_data(data_dir, cache_path)
+    equipment_csv = os.path.join(data_dir, REFERENCE_FILES["equipment"])
+    equipment = pd.read_csv(equipment_csv)
+    equipment = equipment.iloc[1:]
+    equipment.to_csv(equipment_csv, index=False)
+
+    frames = load_reference_data(data_dir, cache_path)
+    assert len(builds) == 2
+    assert len(frames["equipment"]) == len(equipment)
+
+
+@pytest.mark.parametrize("payload", [b"not a pickle", None])
+def test_broken_or_stale_cache_rebuilds(data_dir, builds, payload):
+    cache_path = os.path.join(data_dir, ".cache", "reference.pkl")
+    load_reference_data(data_dir, cache_path)
+    if payload is None:
+        with open(cache_path, "rb") as f:
+            stale = pickle.load(f)
+        stale["schema"] = CACHE_SCHEMA_VERSION - 1
+        payload = pickle.dumps(stale)
+    with open(cache_path, "wb") as f:
+        f.write(payload)
+
+    load_reference_data(data_dir, cache_path)
+    assert len(builds) == 2
+    with open(cache_path, "rb") as f:
+        assert pickle.load(f)["schema"] == CACHE_SCHEMA_VERSION
+
+
+def test_generate_range_plan_long_is_optional(reference, history):
+    workers = reference["workers"].copy()
+    plan = reference["plan"].copy()
+    args = (
+        workers,
+        reference["equipment"],
+        history[["worker_id", "week", "shift"]],
+        reference["requirements"],
+        plan,
+        WEEK,
+        WEEK + 1,
+    )
+    with_plan_long, _ = generate_range(*args, plan_long=reference["plan_long"])
+    without, _ = generate_range(*args)
+
+    pd.testing.assert_frame_equal(with_plan_long, without)
+    assert sorted(with_plan_long["week"].unique()) == [WEEK, WEEK + 1]
+    pd.testing.assert_frame_equal(workers, reference["workers"])
+    pd.testing.assert_frame_equal(plan, reference["plan"])
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_plant
+from conftest import GOLDEN_DIR, shift_assignments
+from scheduler import AssignmentEngine, DataPipeline
+
+
+def run_engine(pipeline, backend, **kwargs):
+    engine = AssignmentEngine(
+        pipeline.shift_candidates,
+        pipeline.shift_equipment_day,
+        pipeline.shift_equipment_evening,
+        pipeline.shift_equipment_night,
+        backend=backend,
+        **kwargs,
+    )
+    engine.run()
+    return engine
+
+
+def golden(name):
+    return pd.read_csv(os.path.join(GOLDEN_DIR, f"week46_{name}.csv"))
+
+
+def synthetic_pipeline(n_workers, seed=0, **kwargs):
+    plant = make_plant(n_workers, seed=seed, **kwargs)
+    pipeline = DataPipeline(
+        plant["workers"].copy(),
+        plant["equipment"],
+        plant["history"][["worker_id", "week", "shift"]],
+        plant["requirements"],
+        plant["plan"],
+    )
+    pipeline.run(10)
+    return pipeline
+
+
+@pytest.mark.parametrize("backend", ["numpy", "pandas"])
+def test_greedy_backends_match_golden_week(pipeline, backend):
+    # Эталон — результат исходного (до индексов и массивов) движка
+    engine = run_engine(pipeline, backend)
+    pd.testing.assert_frame_equal(shift_assignments(engine), golden("greedy"))
+
+
+@pytest.mark.parametrize("seed", [0, 7])
+def test_numpy_backend_matches_pandas_on_synthetic_plant(seed):
+    pipeline = synthetic_pipeline(600, seed=seed)
+    frames = run_engine(pipeline, "pandas")
+    arrays = run_engine(pipeline, "numpy")
+    pd.testing.assert_frame_equal(shift_assignments(arrays), shift_assignments(frames))
+    assert arrays.global_assigned == frames.global_assigned
+    assert set(arrays.no_position["worker_id"]) == set(frames.no_position["worker_id"])
+
+
+def test_unknown_backend_is_rejected(pipeline):
+    with pytest.raises(ValueError, match="backend"):
+        run_engine(pipeline, "gpu")
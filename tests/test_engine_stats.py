@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from conftest import BACKENDS, shift_assignments
+from scheduler import EngineStats
+from test_engine_backends import run_engine, synthetic_pipeline
+
+
+@pytest.fixture(scope="module")
+def plant_pipeline():
+    return synthetic_pipeline(600, seed=0)
+
+
+def test_stats_are_off_by_default(pipeline):
+    assert run_engine(pipeline, "numpy").stats is None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_stats_do_not_change_assignments(plant_pipeline, backend):
+    plain = run_engine(plant_pipeline, backend)
+    counted = run_engine(plant_pipeline, backend, collect_stats=True)
+    pd.testing.assert_frame_equal(shift_assignments(counted), shift_assignments(plain))
+    frame = counted.stats.to_frame()
+    assert frame.columns.tolist() == EngineStats.COLUMNS
+    assert set(frame["shift"]) == {"night", "day", "evening"}
+    assert (frame["seconds"] >= 0).all()
+    assert counted.stats.find_calls == frame["find_calls"].sum()
+
+
+@pytest.mark.parametrize("backend", ["numpy", "pandas"])
+def test_greedy_counters_add_up(plant_pipeline, backend):
+    engine = run_engine(plant_pipeline, backend, collect_stats=True)
+    frame = engine.stats.to_frame()
+    assert frame["filled"].sum() - frame["freed"].sum() == len(engine.global_assigned)
+    assert (frame["candidates_max"] <= frame["candidates_total"]).all()
+
+
+def test_greedy_backends_count_the_same_work(plant_pipeline):
+    frames = [
+        run_engine(plant_pipeline, backend, collect_stats=True)
+        .stats.to_frame()
+        .drop(columns="seconds")
+        for backend in ("numpy", "pandas")
+    ]
+    pd.testing.assert_frame_equal(*frames)
@@ -0,0 +1,109 @@
+import os
+
+import pandas as pd
+import pytest
+
+import export
+from conftest import WEEK
+from export import export_schedule, missing_dependencies, schedule_tables, typed
+
+
+@pytest.fixture
+def reports(generate):
+    _, reports = generate(end=WEEK + 1)
+    return reports
+
+
+def decoded(df):
+    return df.astype({c: object for c in df.select_dtypes("category").columns})
+
+
+def test_tables_concatenate_weeks(reports):
+    tables = schedule_tables(reports)
+    assert set(tables) == {"assignments", "problem_brigades", "brigades"}
+    assignments = tables["assignments"]
+    assert sorted(assignments["week"].unique()) == [WEEK, WEEK + 1]
+    assert len(assignments) == sum(
+        len(r.final_assignments_df) for r in reports.values()
+    )
+    assert assignments["shift"].cat.categories.tolist() == ["day", "evening", "night"]
+    assert assignments["shift"].cat.ordered
+    assert assignments["worker_id"].dtype == "category"
+    assert assignments["week"].dtype == "int32"
+    assert len(tables["problem_brigades"]) == len(reports[WEEK + 1].problem_brigades())
+
+
+def test_typed_keeps_missing_integers():
+    df = typed(pd.DataFrame({"position": [1, None], "note": ["a", "b"]}))
+    assert str(df["position"].dtype) == "Int32"
+    assert df["note"].dtype == object
+
+
+def test_default_stem_is_week_range(reports, tmp_path):
+    pytest.importorskip("pyarrow")
+    paths = export_schedule(reports, tmp_path, ["parquet"])
+    assert sorted(os.path.basename(p) for p in paths) == [
+        f"assignments_{WEEK}-{WEEK + 1}.parquet",
+        f"brigades_{WEEK}-{WEEK + 1}.parquet",
+        f"problem_brigades_{WEEK}-{WEEK + 1}.parquet",
+    ]
+    paths = export_schedule(reports[WEEK], tmp_path / "one", ["parquet"])
+    assert os.path.basename(paths[0]) == f"assignments_{WEEK}.parquet"
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_round_trip(reports, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    tables = schedule_tables(reports)
+    for path in export_schedule(reports, tmp_path, [fmt], stem="x"):
+        name = os.path.basename(path)[: -len(f"_x.{fmt}")]
+        if fmt == "parquet":
+            loaded = pd.read_parquet(path)
+        else:
+            with pa.memory_map(path) as source:
+                loaded = pa.ipc.open_file(source).read_all().to_pandas()
+        pd.testing.assert_frame_equal(loaded, tables[name])
+
+
+def test_xlsx_workbook(reports, tmp_path):
+    pytest.importorskip("openpyxl")
+    (path,) = export_schedule(reports, tmp_path, ["xlsx"], stem="x")
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == [
+        "day",
+        "evening",
+        "night",
+        "problem_brigades",
+        "brigades",
+    ]
+    assignments = decoded(schedule_tables(reports)["assignments"])
+    for shift_name in ("day", "evening", "night"):
+        expected = assignments[assignments["shift"] == shift_name]
+        assert (
+            sheets[shift_name]["worker_id"].tolist() == expected["worker_id"].tolist()
+        )
+
+
+def test_unknown_format_is_rejected(reports, tmp_path):
+    with pytest.raises(ValueError, match="pdf"):
+        export_schedule(reports, tmp_path, ["pdf"])
+    assert not os.listdir(tmp_path)
+
+
+def test_missing_dependencies(monkeypatch):
+    monkeypatch.setattr(
+        export.importlib.util,
+        "find_spec",
+        lambda name: None if name == "pyarrow" else object(),
+    )
+    assert missing_dependencies(["parquet", "arrow", "xlsx", "csv"]) == ["pyarrow"]
+    with pytest.raises(ImportError, match="pyarrow.*requirements-export.txt"):
+        export_schedule({}, "unused", ["parquet"])
+
+
+def test_export_requirements_pin_format_modules():
+    path = os.path.join(os.path.dirname(export.__file__), export.EXPORT_REQUIREMENTS)
+    with open(path, encoding="utf-8") as f:
+        pins = dict(line.strip().split("==") for line in f if line.strip())
+    assert set(export.FORMAT_MODULES.values()) <= set(pins)
+    assert all(pins.values())
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from conftest import ASSIGNMENT_COLUMNS, WEEK
+from scheduler import generate_range
+
+
+def test_first_week_matches_single_week_run(generate):
+    combined, reports = generate(end=WEEK + 2)
+    assert list(reports) == [WEEK, WEEK + 1, WEEK + 2]
+    assert sorted(combined["week"].unique()) == [WEEK, WEEK + 1, WEEK + 2]
+
+    single, _ = generate()
+    first = combined[combined["week"] == WEEK].reset_index(drop=True)
+    pd.testing.assert_frame_equal(first, single)
+
+
+def test_next_week_rotates_from_generated_week(generate, reference, history):
+    combined, _ = generate(end=WEEK + 1)
+
+    # Та же неделя WEEK + 1 отдельным прогоном по истории, дополненной WEEK
+    saved = combined.loc[combined["week"] == WEEK, ["worker_id", "week", "shift"]]
+    extended = pd.concat(
+        [history[["worker_id", "week", "shift"]], saved.astype(object)],
+        ignore_index=True,
+    )
+    expected, _ = generate_range(
+        reference["workers"],
+        reference["equipment"],
+        extended,
+        reference["requirements"],
+        reference["plan"],
+        WEEK + 1,
+        WEEK + 1,
+        plan_long=reference["plan_long"],
+    )
+    second = combined[combined["week"] == WEEK + 1].reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        second[ASSIGNMENT_COLUMNS].astype(object),
+        expected[ASSIGNMENT_COLUMNS].astype(object),
+    )
+
+
+def test_next_week_candidates_follow_rotation_of_generated_week(generate):
+    _, reports = generate(end=WEEK + 1)
+    assigned = reports[WEEK].final_assignments_df.astype(
+        {"worker_id": object, "shift": object}
+    )
+    candidates = reports[WEEK + 1].shift_candidates.astype(
+        {"worker_id": object, "prev_shift": object, "shift": object}
+    )
+    # Кандидаты следующей недели — ровно назначенные на этой, со сменой
+    # по правилу ротации ночь -> вечер -> день -> ночь
+    merged = candidates.merge(assigned[["worker_id", "shift"]], on="worker_id")
+    assert len(merged) == len(candidates) == len(assigned)
+    assert (merged["prev_shift"] == merged["shift_y"]).all()
+    rotation = {"night": "evening", "day": "night", "evening": "day"}
+    assert (merged["prev_shift"].map(rotation) == merged["shift_x"]).all()
+
+
+def test_reversed_range_is_rejected(generate):
+    with pytest.raises(ValueError, match="диапазон"):
+        generate(start=WEEK + 1, end=WEEK)
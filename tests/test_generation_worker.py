@@ -0,0 +1,111 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import WEEK
+from scheduler import AssignmentEngine, GenerationCancelled
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def make_engine(pipeline):
+    return AssignmentEngine(
+        pipeline.shift_candidates,
+        pipeline.shift_equipment_day,
+        pipeline.shift_equipment_evening,
+        pipeline.shift_equipment_night,
+        backend="numpy",
+    )
+
+
+def test_progress_reaches_total(pipeline):
+    calls = []
+    make_engine(pipeline).run(progress=lambda *args: calls.append(args))
+    done = [call[0] for call in calls]
+    total = calls[-1][1]
+    assert done == sorted(done)
+    assert calls[-1] == (total, total, "готово")
+    assert {call[1] for call in calls} == {total}
+
+
+def test_cancel_stops_between_stages(pipeline):
+    calls = []
+    engine = make_engine(pipeline)
+    with pytest.raises(GenerationCancelled):
+        engine.run(
+            progress=lambda *args: calls.append(args),
+            is_cancelled=lambda: len(calls) >= 2,
+        )
+    assert len(calls) == 2
+
+
+def make_worker(reference, history):
+    main = pytest.importorskip("main")
+    return main.GenerationWorker(
+        reference["workers"].copy(),
+        reference["equipment"].copy(),
+        history[["worker_id", "week", "shift"]],
+        reference["requirements"].copy(),
+        reference["plan"].copy(),
+        reference["plan_long"].copy(),
+        WEEK,
+    )
+
+
+def test_worker_emits_finished_result(reference, history):
+    worker = make_worker(reference, history)
+    results, progress = [], []
+    worker.finished.connect(results.append)
+    worker.progress.connect(lambda *args: progress.append(args))
+    worker.run()
+
+    (result,) = results
+    assert len(result["report"].final_assignments_df) == 60
+    assert result["problem_brigades"].empty
+    assert not result["stats"].empty
+    assert progress[0][2] == "Подготовка данных"
+
+
+def test_worker_emits_cancelled(reference, history):
+    worker = make_worker(reference, history)
+    events = []
+    worker.cancelled.connect(lambda: events.append("cancelled"))
+    worker.finished.connect(lambda result: events.append("finished"))
+    worker.cancel()
+    worker.run()
+    assert events == ["cancelled"]
+
+
+def test_close_waits_for_cancelled_thread(reference, history):
+    main = pytest.importorskip("main")
+    from PyQt5.QtCore import QCoreApplication, Qt, QThread
+    from PyQt5.QtGui import QCloseEvent
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    worker = make_worker(reference, history)
+    events = []
+    worker.cancelled.connect(lambda: events.append("cancelled"))
+    worker.finished.connect(lambda result: events.append("finished"))
+    threads = set()
+    worker.progress.connect(
+        lambda *args: threads.add(threading.get_ident()), Qt.DirectConnection
+    )
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    thread.start()
+
+    window = SimpleNamespace(_generation_thread=thread, _generation_worker=worker)
+    event = QCloseEvent()
+    event.ignore()
+    main.AppWindow.closeEvent(window, event)
+
+    assert event.isAccepted()
+    assert thread.isFinished()
+    # run выполняется в фоновом потоке, а не в потоке GUI
+    assert threads and threading.get_ident() not in threads
+    # Сигналы воркера доставляются в поток GUI (здесь — основной)
+    app.processEvents()
+    assert len(events) == 1
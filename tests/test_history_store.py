@@ -0,0 +1,158 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_DIR, WEEK
+from history_store import (
+    HISTORY_COLUMNS,
+    ROTATION_COLUMNS,
+    HistoryIndex,
+    HistoryStore,
+)
+from scheduler import DataPipeline
+
+LEGACY_CSV = os.path.join(DATA_DIR, "assignment_history.csv")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(root=str(tmp_path / "history"), legacy_csv=LEGACY_CSV)
+
+
+def week_rows(week, worker_ids, shift="День"):
+    return pd.DataFrame(
+        {
+            "week": week,
+            "shift": shift,
+            "machine_id": "M-01",
+            "position": range(1, len(worker_ids) + 1),
+            "worker_id": worker_ids,
+            "name": [f"W{w}" for w in worker_ids],
+        },
+        columns=HISTORY_COLUMNS,
+    )
+
+
+def test_legacy_csv_is_split_by_week(store, history):
+    assert store.weeks() == sorted(history["week"].unique().tolist())
+    for week, week_df in history.groupby("week"):
+        assert os.path.exists(store.week_path(week))
+        pd.testing.assert_frame_equal(
+            store.read_week(week), week_df.reset_index(drop=True)
+        )
+    pd.testing.assert_frame_equal(store.read_all(), history, check_dtype=False)
+
+
+def test_migration_runs_only_once(store):
+    store.write_week(99, week_rows(99, [1, 2]))
+    reopened = HistoryStore(root=store.root, legacy_csv=LEGACY_CSV)
+    assert reopened.has_week(99)
+    assert len(reopened.read_week(99)) == 2
+
+
+def test_write_week_replaces_only_its_file(store):
+    weeks = store.weeks()
+    before = {w: store.read_week(w) for w in weeks[:-1]}
+    last = weeks[-1]
+
+    store.write_week(last, week_rows(last, [10, 11, 12]))
+    assert store.read_week(last)["worker_id"].tolist() == [10, 11, 12]
+    for week, frame in before.items():
+        pd.testing.assert_frame_equal(store.read_week(week), frame)
+
+    index = pd.read_csv(os.path.join(store.root, HistoryStore.INDEX_FILE))
+    assert index["week"].tolist() == weeks
+    assert index.loc[index["week"] == last, "rows"].item() == 3
+    assert not [f for f in os.listdir(store.root) if f.startswith(".tmp_")]
+
+
+def test_missing_week_is_empty(store):
+    assert not store.has_week(1)
+    assert store.read_week(1).columns.tolist() == HISTORY_COLUMNS
+    assert store.read_week(1).empty
+
+
+def test_store_sees_writes_of_another_instance(store):
+    other = HistoryStore(root=store.root, legacy_csv=None)
+    other.write_week(60, week_rows(60, [1]))
+    assert store.has_week(60)
+
+
+def expected_last_shifts(frame):
+    rows = frame.sort_values("week", kind="stable")[ROTATION_COLUMNS]
+    rows = rows[rows["worker_id"].notna()]
+    return (
+        rows.drop_duplicates("worker_id", keep="last")
+        .sort_values("worker_id")
+        .reset_index(drop=True)
+    )
+
+
+def by_worker(frame):
+    return frame.sort_values("worker_id").reset_index(drop=True)
+
+
+def test_last_shifts_follow_history(store, history):
+    pd.testing.assert_frame_equal(
+        by_worker(store.last_shifts()),
+        expected_last_shifts(history),
+        check_dtype=False,
+    )
+
+
+def test_rewritten_week_recovers_older_shifts(store):
+    last = store.weeks()[-1]
+    base = store.read_week(last)
+    store.write_week(last + 1, base.head(3).assign(week=last + 1, shift="Ночь"))
+    store.write_week(last + 1, base.iloc[1:3].assign(week=last + 1, shift="Ночь"))
+
+    expected = expected_last_shifts(store.read_all())
+    dropped = base["worker_id"].iloc[0]
+    assert expected.loc[expected["worker_id"] == dropped, "week"].item() == last
+    pd.testing.assert_frame_equal(
+        by_worker(store.last_shifts()), expected, check_dtype=False
+    )
+
+
+def test_rotation_base_matches_week_file(store):
+    for week in store.weeks():
+        pd.testing.assert_frame_equal(
+            by_worker(store.rotation_base(week)),
+            by_worker(store.read_week(week)[ROTATION_COLUMNS]),
+            check_dtype=False,
+        )
+
+
+def test_history_index_slices_weeks(history):
+    shuffled = history.sample(frac=1, random_state=0)
+    index = HistoryIndex(shuffled)
+    assert index.weeks() == sorted(history["week"].unique().tolist())
+    assert not index.has_week(1)
+    for week in index.weeks():
+        expected = shuffled[shuffled["week"] == week].reset_index(drop=True)
+        pd.testing.assert_frame_equal(index.read_week(week), expected)
+    pd.testing.assert_frame_equal(
+        by_worker(index.last_shifts()), expected_last_shifts(history)
+    )
+
+
+@pytest.mark.parametrize("source", ["store", "index"])
+def test_pipeline_accepts_history_sources(reference, history, store, source):
+    schedule = store if source == "store" else HistoryIndex(history)
+    frames = {}
+    for name, sched in (
+        ("frame", history[ROTATION_COLUMNS]),
+        (source, schedule),
+    ):
+        pipeline = DataPipeline(
+            reference["workers"].copy(),
+            reference["equipment"].copy(),
+            sched,
+            reference["requirements"].copy(),
+            reference["plan"].copy(),
+            plan_long=reference["plan_long"],
+        )
+        pipeline.run(WEEK)
+        frames[name] = pipeline.shift_candidates
+    pd.testing.assert_frame_equal(frames["frame"], frames[source])
@@ -0,0 +1,195 @@
+import pandas as pd
+import pytest
+
+from conftest import WEEK, shift_assignments
+from incremental import SHIFTS, IncrementalScheduler
+from scheduler import DataPipeline
+from test_engine_backends import run_engine
+
+
+@pytest.fixture
+def scheduler(pipeline):
+    return IncrementalScheduler(pipeline, run_engine(pipeline, "numpy"))
+
+
+def assert_consistent(scheduler):
+    engine = scheduler.engine
+    assigned = shift_assignments(engine)["worker_id"].dropna()
+    assert assigned.is_unique
+    assert set(assigned) == engine.global_assigned
+    for shift_name in SHIFTS:
+        frame = getattr(engine, f"shift_equipment_{shift_name}")
+        assert set(frame["worker_id"].dropna()) == getattr(
+            engine, f"assigned_{shift_name}"
+        )
+
+
+def other_shifts(scheduler, shift_name):
+    df = shift_assignments(scheduler.engine)
+    return df[df["shift"] != shift_name].reset_index(drop=True)
+
+
+def test_machine_off_and_on(scheduler):
+    untouched = other_shifts(scheduler, "day")
+    slots = len(scheduler.engine.shift_equipment_day)
+
+    changes = scheduler.set_machine("PM-01", "day", works=False)
+    day = scheduler.engine.shift_equipment_day
+    assert "PM-01" not in set(day["machine_id"])
+    assert set(changes["shift"]) == {"day"}
+    assert changes.loc[changes["machine_id"] == "PM-01", "worker_after"].isna().all()
+    assert_consistent(scheduler)
+
+    changes = scheduler.set_machine("PM-01", "day", works=True)
+    assert len(scheduler.engine.shift_equipment_day) == slots
+    assert (changes["machine_id"] == "PM-01").any()
+    assert_consistent(scheduler)
+    pd.testing.assert_frame_equal(other_shifts(scheduler, "day"), untouched)
+
+    plan_long = scheduler.pipeline.plan_long
+    in_plan = (
+        (plan_long["machine_id"] == "PM-01")
+        & (plan_long["shift"] == "day")
+        & (plan_long["week"] == scheduler.target_week)
+    )
+    assert in_plan.sum() == 1
+
+
+def test_repeated_switch_is_noop(scheduler):
+    before = shift_assignments(scheduler.engine)
+    assert scheduler.set_machine("PM-01", "day", works=True).empty
+    pd.testing.assert_frame_equal(shift_assignments(scheduler.engine), before)
+
+
+def test_remove_worker(scheduler):
+    day = scheduler.engine.shift_equipment_day
+    worker_id = day["worker_id"].dropna().iloc[0]
+    untouched = other_shifts(scheduler, "day")
+
+    changes = scheduler.remove_worker(worker_id)
+    assert worker_id in set(changes["worker_before"])
+    assert worker_id not in set(shift_assignments(scheduler.engine)["worker_id"])
+    assert worker_id not in set(scheduler.pipeline.shift_candidates["worker_id"])
+    assert_consistent(scheduler)
+    pd.testing.assert_frame_equal(other_shifts(scheduler, "day"), untouched)
+
+
+def inkjet_worker(worker_id, rank=5):
+    return {
+        "worker_id": worker_id,
+        "name": "Новый",
+        "flat_printing": 0,
+        "letterpress_printing": 0,
+        "inkjet_printing": rank,
+    }
+
+
+def machine_worker(scheduler, shift_name, machine_id):
+    frame = getattr(scheduler.engine, f"shift_equipment_{shift_name}")
+    row = frame[frame["machine_id"] == machine_id]
+    return row["worker_id"].astype(object).iloc[0]
+
+
+def test_add_worker_fills_vacancy(scheduler):
+    day = scheduler.engine.shift_equipment_day
+    worker_id = day["worker_id"].dropna().iloc[0]
+    scheduler.remove_worker(worker_id)
+    untouched = other_shifts(scheduler, "day")
+    vacant = scheduler.engine.shift_equipment_day["worker_id"].isna().sum()
+
+    worker = {"worker_id": "W900", "name": "Новый"}
+    worker.update({p: 7 for p in scheduler.pipeline.professions})
+    scheduler.add_worker(worker, "day")
+    assert_consistent(scheduler)
+    assert "W900" in set(scheduler.pipeline.workers["worker_id"])
+    assert "W900" in set(scheduler.pipeline.skills["worker_id"])
+    assert scheduler.engine.shift_equipment_day["worker_id"].isna().sum() <= vacant
+    pd.testing.assert_frame_equal(other_shifts(scheduler, "day"), untouched)
+
+
+def test_add_worker_fills_empty_machine(scheduler):
+    # SM-01 — машина на одного; свободных кандидатов в смене нет, и после
+    # удаления её работника она остаётся пустой
+    removed = machine_worker(scheduler, "day", "SM-01")
+    scheduler.remove_worker(removed)
+    assert pd.isna(machine_worker(scheduler, "day", "SM-01"))
+
+    changes = scheduler.add_worker(inkjet_worker("W900"), "day")
+    assert machine_worker(scheduler, "day", "SM-01") == "W900"
+    assert changes[["machine_id", "worker_after"]].astype(object).values.tolist() == [
+        ["SM-01", "W900"]
+    ]
+    assert_consistent(scheduler)
+
+
+def test_add_worker_rejects_existing_candidate(scheduler):
+    worker_id = machine_worker(scheduler, "day", "SM-01")
+    before = shift_assignments(scheduler.engine)
+    with pytest.raises(ValueError, match=worker_id):
+        scheduler.add_worker(inkjet_worker(worker_id), "evening")
+    candidates = scheduler.pipeline.shift_candidates
+    assert (candidates["worker_id"] == worker_id).sum() == 1
+    pd.testing.assert_frame_equal(shift_assignments(scheduler.engine), before)
+
+
+def test_removed_worker_can_be_added_back(scheduler):
+    worker_id = machine_worker(scheduler, "day", "SM-01")
+    scheduler.remove_worker(worker_id)
+    scheduler.add_worker(inkjet_worker(worker_id, rank=6), "day")
+
+    workers = scheduler.pipeline.workers
+    assert (workers["worker_id"] == worker_id).sum() == 1
+    skills = scheduler.pipeline.skills
+    skills = skills[skills["worker_id"] == worker_id]
+    assert skills[["profession", "rank"]].values.tolist() == [["inkjet_printing", 6]]
+    assert (scheduler.pipeline.shift_candidates["worker_id"] == worker_id).sum() == 1
+    assert machine_worker(scheduler, "day", "SM-01") == worker_id
+    assert_consistent(scheduler)
+
+
+def test_empty_roster_takes_week_from_pipeline(reference, history):
+    pipeline = DataPipeline(
+        reference["workers"].copy(),
+        reference["equipment"],
+        history[["worker_id", "week", "shift"]].iloc[:0],
+        reference["requirements"],
+        reference["plan"],
+        plan_long=reference["plan_long"],
+    )
+    pipeline.run(WEEK)
+    assert pipeline.shift_candidates.empty
+    scheduler = IncrementalScheduler(pipeline, run_engine(pipeline, "numpy"))
+    assert scheduler.target_week == WEEK
+
+    scheduler.add_worker(inkjet_worker("W900"), "night")
+    night = scheduler.engine.shift_equipment_night
+    assert set(night["worker_id"].dropna().astype(object)) == {"W900"}
+    assert scheduler.engine.global_assigned == {"W900"}
+
+
+def test_week_is_required_without_run(reference, history):
+    pipeline = DataPipeline(
+        reference["workers"].copy(),
+        reference["equipment"],
+        history[["worker_id", "week", "shift"]],
+        reference["requirements"],
+        reference["plan"],
+        plan_long=reference["plan_long"],
+    )
+    with pytest.raises(ValueError, match="target_week"):
+        IncrementalScheduler(pipeline, engine=None)
+
+
+def test_report_reflects_changes(scheduler):
+    scheduler.set_machine("PM-01", "night", works=False)
+    report = scheduler.report()
+    final = report.final_assignments_df
+    night = final[final["shift"].astype(object) == "night"]
+    assert "PM-01" not in set(night["machine_id"].astype(object))
+
+
+def test_unknown_shift_or_machine(scheduler):
+    with pytest.raises(ValueError, match="смена"):
+        scheduler.set_machine("PM-01", "morning", works=True)
+    with pytest.raises(KeyError):
+        scheduler.set_machine("XX-99", "day", works=True)
@@ -0,0 +1,85 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import shift_assignments
+from matching import min_cost_flow
+from scheduler import compare_backends
+from test_engine_backends import golden, run_engine, synthetic_pipeline
+
+
+def assignment_flow(costs):
+    """Задача о назначениях costs[i][j] (None — ребра нет) как сеть потока."""
+    n_left, n_right = len(costs), len(costs[0])
+    source, sink = n_left + n_right, n_left + n_right + 1
+    edges = [(source, i, 1, 0) for i in range(n_left)]
+    edges += [(n_left + j, sink, 1, 0) for j in range(n_right)]
+    edges += [
+        (i, n_left + j, 1, cost)
+        for i, row in enumerate(costs)
+        for j, cost in enumerate(row)
+        if cost is not None
+    ]
+    return min_cost_flow(n_left + n_right + 2, edges, source, sink), edges
+
+
+def brute_force(costs):
+    """(наибольшее паросочетание, его наименьшая стоимость) перебором."""
+    n_left, n_right = len(costs), len(costs[0])
+    best = (0, 0)
+    for size in range(1, min(n_left, n_right) + 1):
+        for left in itertools.combinations(range(n_left), size):
+            for right in itertools.permutations(range(n_right), size):
+                pairs = [costs[i][j] for i, j in zip(left, right)]
+                if None in pairs:
+                    continue
+                if size > best[0] or sum(pairs) < best[1]:
+                    best = (size, sum(pairs))
+    return best
+
+
+def test_min_cost_flow_known_instance():
+    (flows, total_flow, total_cost), edges = assignment_flow(
+        [[4, 1, 3], [2, 0, 5], [3, 2, 2]]
+    )
+    assert (total_flow, total_cost) == (3, 5)
+    assert sum(f * e[3] for f, e in zip(flows, edges)) == total_cost
+    assert all(0 <= f <= e[2] for f, e in zip(flows, edges))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_min_cost_flow_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n_left, n_right = rng.integers(1, 6, 2)
+    costs = [
+        [int(c) if rng.random() < 0.6 else None for c in rng.integers(0, 30, n_right)]
+        for _ in range(n_left)
+    ]
+    (_, total_flow, total_cost), _ = assignment_flow(costs)
+    assert (total_flow, total_cost) == brute_force(costs)
+
+
+def test_min_cost_flow_without_path():
+    flows, total_flow, total_cost = min_cost_flow(3, [(0, 1, 5, 1)], 0, 2)
+    assert (flows, total_flow, total_cost) == ([0], 0, 0)
+
+
+def test_optimal_backend_matches_golden_week(pipeline):
+    engine = run_engine(pipeline, "optimal")
+    pd.testing.assert_frame_equal(shift_assignments(engine), golden("optimal"))
+
+
+@pytest.mark.parametrize("seed", [0, 7])
+def test_optimal_fills_at_least_as_many_slots(seed):
+    pipeline = synthetic_pipeline(600, seed=seed)
+    result = compare_backends(
+        pipeline.shift_candidates,
+        pipeline.shift_equipment_day,
+        pipeline.shift_equipment_evening,
+        pipeline.shift_equipment_night,
+        backends=("numpy", "optimal"),
+    ).set_index("backend")
+    assert result.loc["optimal", "filled"] >= result.loc["numpy", "filled"]
+    assert (result["filled"] + result["vacant"] == result["required"]).all()
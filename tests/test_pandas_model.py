@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+main = pytest.importorskip("main")
+
+from PyQt5.QtCore import QModelIndex, Qt
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {"worker_id": range(2500), "shift": ["Ночь", "День", None, "Вечер", 1.5] * 500}
+    )
+
+
+def test_rows_are_loaded_in_batches(frame):
+    model = main.PandasModel(frame, batch_size=1000)
+    root = QModelIndex()
+    assert model.rowCount() == 1000
+    assert model.columnCount() == 2
+
+    loaded = []
+    while model.canFetchMore(root):
+        model.fetchMore(root)
+        loaded.append(model.rowCount())
+    assert loaded == [2000, 2500]
+    model.fetchMore(root)
+    assert model.rowCount() == 2500
+
+
+def test_small_frame_is_loaded_at_once(frame):
+    model = main.PandasModel(frame.head(10))
+    assert model.rowCount() == 10
+    assert not model.canFetchMore(QModelIndex())
+
+
+def test_cell_text_matches_str_of_value(frame):
+    model = main.PandasModel(frame, batch_size=100)
+    for row in (0, 2, 4, 2499):
+        for col in range(2):
+            assert model.cell_text(row, col) == str(frame.iat[row, col])
+    assert model.cell_text(2, 1) is model.cell_text(2, 1)
+
+    index = model.index(1, 1)
+    assert model.data(index) == "День"
+    assert model.data(index, Qt.EditRole) is None
+
+
+def test_headers_come_from_frame(frame):
+    model = main.PandasModel(frame)
+    assert model.headerData(1, Qt.Horizontal) == "shift"
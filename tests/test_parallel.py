@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from conftest import WEEK, shift_assignments
+from test_engine_backends import golden, run_engine, synthetic_pipeline
+
+
+def assert_same_engine(left, right):
+    pd.testing.assert_frame_equal(shift_assignments(left), shift_assignments(right))
+    assert left.global_assigned == right.global_assigned
+    assert set(left.no_position["worker_id"]) == set(right.no_position["worker_id"])
+
+
+def test_parallel_matches_golden_week(pipeline):
+    engine = run_engine(pipeline, "numpy", parallel=True)
+    pd.testing.assert_frame_equal(shift_assignments(engine), golden("greedy"))
+
+
+@pytest.mark.parametrize("seed", [0, 3, 7])
+def test_parallel_matches_sequential_on_synthetic_plant(seed):
+    pipeline = synthetic_pipeline(800, seed=seed)
+    assert_same_engine(
+        run_engine(pipeline, "numpy", parallel=True), run_engine(pipeline, "numpy")
+    )
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_caller_executor_is_reused(executor_class):
+    pipeline = synthetic_pipeline(300, seed=1)
+    sequential = run_engine(pipeline, "numpy")
+    with executor_class(max_workers=2) as executor:
+        for _ in range(2):
+            engine = run_engine(pipeline, "numpy", parallel=executor)
+            assert_same_engine(engine, sequential)
+
+
+@pytest.mark.parametrize("backend", ["pandas", "optimal"])
+def test_parallel_needs_numpy_backend(pipeline, backend):
+    with pytest.raises(ValueError, match="numpy"):
+        run_engine(pipeline, backend, parallel=True)
+
+
+def test_generate_range_parallel(generate):
+    sequential, _ = generate(end=WEEK + 2)
+    parallel, _ = generate(end=WEEK + 2, parallel=True)
+    pd.testing.assert_frame_equal(parallel, sequential)
@@ -0,0 +1,146 @@
+import pandas as pd
+import pytest
+
+from conftest import WEEK
+import scheduler
+from scheduler import DataPipeline, PipelineMemo
+
+FRAMES = [
+    "shift_candidates",
+    "shift_equipment_day",
+    "shift_equipment_evening",
+    "shift_equipment_night",
+]
+
+
+@pytest.fixture
+def memo():
+    return PipelineMemo()
+
+
+def make_pipeline(reference, history, memo=None, **changes):
+    frames = {
+        "workers": reference["workers"].copy(),
+        "requirements": reference["requirements"].copy(),
+        "plan_long": reference["plan_long"].copy(),
+        "schedule": history[["worker_id", "week", "shift"]].copy(),
+    }
+    frames.update(changes)
+    pipeline = DataPipeline(
+        frames["workers"],
+        reference["equipment"],
+        frames["schedule"],
+        frames["requirements"],
+        reference["plan"],
+        plan_long=frames["plan_long"],
+        memo=memo,
+    )
+    pipeline.run(WEEK)
+    return pipeline
+
+
+def assert_same_result(left, right):
+    for name in FRAMES:
+        pd.testing.assert_frame_equal(getattr(left, name), getattr(right, name))
+
+
+def test_second_run_hits_memo(reference, history, memo):
+    first = make_pipeline(reference, history, memo)
+    second = make_pipeline(reference, history, memo)
+    assert not first.memo_hit
+    assert second.memo_hit
+    assert_same_result(first, second)
+
+
+def test_without_memo_nothing_is_shared(reference, history, memo):
+    make_pipeline(reference, history, memo)
+    assert not make_pipeline(reference, history).memo_hit
+    assert not make_pipeline(reference, history, PipelineMemo()).memo_hit
+
+
+def test_memo_returns_copies(reference, history, memo):
+    first = make_pipeline(reference, history, memo)
+    first.shift_equipment_day["machine_id"] = None
+    first.skills.drop(first.skills.index, inplace=True)
+    second = make_pipeline(reference, history, memo)
+    assert second.memo_hit
+    assert second.shift_equipment_day["machine_id"].notna().all()
+    assert not second.skills.empty
+    third = make_pipeline(reference, history, memo)
+    assert third.shift_equipment_day is not second.shift_equipment_day
+    assert third.skills is not second.skills
+
+
+def test_validation_and_skills_are_memoized(reference, history, memo, monkeypatch):
+    calls = []
+    check_inputs = scheduler.check_inputs
+    build_skills = DataPipeline.build_skills
+
+    def counting_check(*args):
+        calls.append("check")
+        return check_inputs(*args)
+
+    def counting_skills(*args, **kwargs):
+        calls.append("skills")
+        return build_skills(*args, **kwargs)
+
+    monkeypatch.setattr(scheduler, "check_inputs", counting_check)
+    monkeypatch.setattr(DataPipeline, "build_skills", staticmethod(counting_skills))
+    first = make_pipeline(reference, history, memo)
+    second = make_pipeline(reference, history, memo)
+    assert calls == ["check", "skills"]
+    pd.testing.assert_frame_equal(first.skills, second.skills)
+    pd.testing.assert_frame_equal(first.issues, second.issues)
+
+    make_pipeline(reference, history, memo, workers=changed_workers(reference))
+    assert calls == ["check", "skills"] * 2
+
+
+def changed_history(history):
+    history = history[["worker_id", "week", "shift"]].copy()
+    history.loc[history.index[0], "shift"] = "evening"
+    return history
+
+
+def changed_workers(reference):
+    workers = reference["workers"].copy()
+    workers.loc[0, "inkjet_printing"] = 7
+    return workers
+
+
+def changed_requirements(reference):
+    requirements = reference["requirements"].copy()
+    requirements.loc[0, "min_rank"] = 1
+    return requirements
+
+
+def changed_plan(reference):
+    plan_long = reference["plan_long"]
+    return plan_long.drop(index=plan_long.index[plan_long["week"] == WEEK][0])
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda reference, history: {"schedule": changed_history(history)},
+        lambda reference, history: {"workers": changed_workers(reference)},
+        lambda reference, history: {"requirements": changed_requirements(reference)},
+        lambda reference, history: {"plan_long": changed_plan(reference)},
+    ],
+    ids=["history", "workers", "requirements", "plan"],
+)
+def test_changed_input_misses_memo(reference, history, memo, change):
+    make_pipeline(reference, history, memo)
+    changed = make_pipeline(reference, history, memo, **change(reference, history))
+    assert not changed.memo_hit
+    fresh = make_pipeline(reference, history, **change(reference, history))
+    assert_same_result(changed, fresh)
+    pd.testing.assert_frame_equal(changed.skills, fresh.skills)
+
+
+def test_memo_is_bounded(reference, history):
+    memo = PipelineMemo(size=2)
+    for min_rank in (1, 2, 3):
+        requirements = reference["requirements"].assign(min_rank=min_rank)
+        make_pipeline(reference, history, memo, requirements=requirements)
+    assert len(memo) == 2
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from conftest import WEEK
+from scheduler import BRIGADE_KEYS, summary_team
+
+
+@pytest.fixture
+def report(generate):
+    # Неделя WEEK + 1 — с неполными и пустыми бригадами
+    _, reports = generate(start=WEEK, end=WEEK + 1)
+    report = reports[WEEK + 1]
+    report.get_final_assignments()
+    report.get_brigade_summary()
+    return report
+
+
+def naive_summary(df):
+    rows = []
+    for key, group in df.groupby(BRIGADE_KEYS, observed=True):
+        assigned = group["worker_id"].notna() & (group["worker_id"] != "")
+        rows.append((*key, group["position"].notna().sum(), assigned.sum()))
+    return pd.DataFrame(rows, columns=BRIGADE_KEYS + ["required", "assigned"])
+
+
+def brigade_keys(df):
+    return set(decoded(df)[BRIGADE_KEYS].itertuples(index=False, name=None))
+
+
+def decoded(df):
+    return df.astype({c: object for c in ["shift", "machine_id", "machine_type"]})
+
+
+def test_summary_team_matches_naive_groupby(report):
+    shifts = report._combined_shifts()
+    fast = decoded(summary_team(shifts, BRIGADE_KEYS))
+    naive = decoded(naive_summary(shifts))
+    pd.testing.assert_frame_equal(
+        fast.sort_values(BRIGADE_KEYS, ignore_index=True),
+        naive.sort_values(BRIGADE_KEYS, ignore_index=True),
+        check_dtype=False,
+    )
+
+
+def test_brigade_views_partition_the_summary(report):
+    brigades = report.report[report.report["required"] > 0]
+    full = report.full_brigades()
+    problems = report.problem_brigades()
+    assert len(full) + len(problems) == len(brigades)
+    assert not problems.empty
+    assert set(problems["status"]) == {"incomplete", "empty"}
+    assert (problems["missing"] == problems["required"] - problems["assigned"]).all()
+    assert (problems.loc[problems["status"] == "empty", "assigned"] == 0).all()
+    assert not brigade_keys(full) & brigade_keys(problems)
+
+
+def test_summary_counts_final_assignments(report):
+    final = report.final_assignments_df
+    assert report.report["assigned"].sum() == len(final)
+    assert final["worker_id"].notna().all()
+    assert final["worker_id"].is_unique
+    assert final.columns.tolist() == [
+        "week",
+        "shift",
+        "machine_id",
+        "position",
+        "worker_id",
+        "name",
+    ]
+    assert final["name"].notna().all()
+
+
+def test_text_summary_counts_match_views(report):
+    report.generate_text_summary(WEEK + 1)
+    lines = report.summary_lines
+    problems = report.problem_brigades()
+    incomplete = (problems["status"] == "incomplete").sum()
+    empty = (problems["status"] == "empty").sum()
+    required = int(report.report["required"].sum())
+    assert f"Целевая неделя: {WEEK + 1}" in lines
+    assert f"Заполнено позиций: {len(report.final_assignments_df)}" in lines
+    assert f"Всего требуется позиций: {required}" in lines
+    assert f"Укомплектовано (N/N): {len(report.full_brigades())}" in lines
+    assert f"Неукомплектовано (M/N): {incomplete}" in lines
+    assert f"Не запущено (0/N): {empty}" in lines
@@ -0,0 +1,36 @@
+import pandas as pd
+
+from conftest import WEEK
+from scenarios import run_scenarios
+
+
+def scenarios(reference, history, max_workers):
+    plan = reference["plan"]
+    stopped = plan.copy()
+    stopped.loc[stopped["machine_id"] == "PM-01", ["night", "day", "evening"]] = False
+    return run_scenarios(
+        reference["workers"].drop(columns="primary_profession"),
+        reference["equipment"],
+        history,
+        reference["requirements"],
+        {"base": plan, "no_pm01": stopped},
+        target_week=WEEK,
+        max_workers=max_workers,
+    )
+
+
+def test_scenarios_compare_plan_variants(reference, history):
+    table = scenarios(reference, history, max_workers=1)
+    assert table["scenario"].tolist() == ["base", "no_pm01"]
+    base, stopped = table.to_dict("records")
+    assert base["required"] == base["filled"] == 60
+    # PM-01 работает во всех трёх сменах по 4 позиции
+    assert stopped["required"] == base["required"] - 12
+    assert stopped["unassigned_workers"] > base["unassigned_workers"]
+
+
+def test_process_pool_gives_the_same_table(reference, history):
+    pd.testing.assert_frame_equal(
+        scenarios(reference, history, max_workers=2),
+        scenarios(reference, history, max_workers=1),
+    )
@@ -0,0 +1,103 @@
+import io
+import os
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from conftest import BACKENDS, ROOT, WEEK, WEEK_START
+from scheduler import iter_schedule_lines, write_schedule_txt
+
+COMMITTED_TXT = os.path.join(ROOT, "output", f"Расписание_Неделя_{WEEK}.txt")
+
+
+def committed_text():
+    with open(COMMITTED_TXT, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("backend", ["numpy", "pandas"])
+def test_week_txt_matches_committed_output(generate, backend, tmp_path):
+    combined, _ = generate(backend)
+    (path,) = write_schedule_txt(combined, {WEEK: WEEK_START}, output_dir=tmp_path)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == committed_text()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_txt_lists_every_shift(generate, backend):
+    _, reports = generate(backend)
+    text = reports[WEEK].generate_human_readable_txt(WEEK, WEEK_START)
+    assert "(Нет назначений в этой смене)" not in text
+    for title in ("Ночь", "День", "Вечер"):
+        assert f"--- СМЕНА: {title} ---" in text
+
+
+def test_gui_writer_matches_generated_text(generate):
+    _, reports = generate()
+    report = reports[WEEK]
+    buffer = io.StringIO()
+    assert report.write_human_readable_txt(buffer, WEEK, WEEK_START)
+    assert buffer.getvalue() == committed_text()
+    assert report.generate_human_readable_txt(WEEK, WEEK_START) == committed_text()
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_multi_week_file_joins_week_files(generate, tmp_path):
+    combined, _ = generate(end=WEEK + 1)
+    start_dates = {
+        WEEK: WEEK_START,
+        WEEK + 1: WEEK_START + timedelta(days=7),
+        WEEK + 30: WEEK_START,
+    }
+    paths = write_schedule_txt(combined, start_dates, output_dir=tmp_path / "weeks")
+    assert [os.path.basename(p) for p in paths] == [
+        f"Расписание_Неделя_{WEEK}.txt",
+        f"Расписание_Неделя_{WEEK + 1}.txt",
+    ]
+    (single,) = write_schedule_txt(
+        combined, start_dates, path=str(tmp_path / "all.txt")
+    )
+    assert read(single) == "\n".join(read(p) for p in paths)
+
+
+def test_row_order_does_not_matter(generate):
+    combined, _ = generate()
+    shuffled = combined.sample(frac=1, random_state=0)
+    lines = list(iter_schedule_lines(combined, WEEK, WEEK_START))
+    assert list(iter_schedule_lines(shuffled, WEEK, WEEK_START)) == lines
+    assert "\n".join(lines) == committed_text()
+
+
+def test_empty_week_has_no_lines(generate):
+    combined, _ = generate()
+    assert list(iter_schedule_lines(combined, WEEK + 1, WEEK_START)) == []
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"path": "a.txt", "output_dir": "out"}])
+def test_exactly_one_target_is_required(kwargs):
+    with pytest.raises(ValueError, match="path или output_dir"):
+        write_schedule_txt(pd.DataFrame(), {}, **kwargs)
+
+
+def test_range_is_sorted_once(generate, tmp_path, monkeypatch):
+    import scheduler
+
+    combined, _ = generate(end=WEEK + 1)
+    calls = []
+    sort = scheduler._sort_schedule
+    monkeypatch.setattr(
+        scheduler, "_sort_schedule", lambda df: calls.append(len(df)) or sort(df)
+    )
+    start_dates = {WEEK + 1: WEEK_START + timedelta(days=7), WEEK: WEEK_START}
+    paths = write_schedule_txt(combined, start_dates, output_dir=tmp_path)
+    assert calls == [len(combined)]
+    assert [os.path.basename(p) for p in paths] == [
+        f"Расписание_Неделя_{WEEK + 1}.txt",
+        f"Расписание_Неделя_{WEEK}.txt",
+    ]
+    assert read(paths[1]) == committed_text()
@@ -0,0 +1,162 @@
+import json
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from conftest import DATA_DIR, WEEK
+from data_cache import REFERENCE_FILES
+from service import ScheduleService, make_server
+
+
+@pytest.fixture
+def service(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for file_name in [*REFERENCE_FILES.values(), "assignment_history.csv"]:
+        shutil.copy(f"{DATA_DIR}/{file_name}", data_dir / file_name)
+    return ScheduleService(str(data_dir))
+
+
+@pytest.fixture
+def counted(service, monkeypatch):
+    calls = []
+    generate = service._generate
+
+    def counting_generate(week, backend, reference, rotation_base):
+        calls.append((week, backend))
+        time.sleep(0.05)
+        return generate(week, backend, reference, rotation_base)
+
+    monkeypatch.setattr(service, "_generate", counting_generate)
+    return calls
+
+
+def test_result_is_cached(service, counted, history):
+    result, meta = service.result(WEEK)
+    assert meta["cached"] is False
+    assert len(result["assignments"]) == len(history)
+    again, meta_again = service.result(WEEK)
+    assert meta_again["cached"] is True
+    assert meta_again["input_hash"] == meta["input_hash"]
+    assert again is result
+    assert counted == [(WEEK, "numpy")]
+
+    service.result(WEEK, "pandas")
+    assert counted == [(WEEK, "numpy"), (WEEK, "pandas")]
+
+
+def test_history_change_invalidates_result(service, counted):
+    _, meta = service.result(WEEK)
+    last = service.history.read_week(WEEK - 1)
+    service.history.write_week(WEEK - 1, last.iloc[1:])
+    _, changed = service.result(WEEK)
+    assert changed["cached"] is False
+    assert changed["input_hash"] != meta["input_hash"]
+    assert len(counted) == 2
+
+
+def test_rewrite_with_same_rows_keeps_result(service, counted):
+    _, meta = service.result(WEEK)
+    service.history.write_week(WEEK - 1, service.history.read_week(WEEK - 1))
+    _, again = service.result(WEEK)
+    assert again["cached"] is True
+    assert again["input_hash"] == meta["input_hash"]
+    assert len(counted) == 1
+
+
+def test_result_is_keyed_on_history_it_read(service, monkeypatch):
+    _, reference_key = service.reference()
+    _, read_hash = service.rotation_input(WEEK, reference_key)
+    generate = service._generate
+
+    def generate_during_save(week, backend, reference, rotation_base):
+        # Save из GUI/CLI успевает переписать неделю во время расчёта
+        last = service.history.read_week(WEEK - 1)
+        service.history.write_week(WEEK - 1, last.iloc[1:])
+        monkeypatch.setattr(service, "_generate", generate)
+        return generate(week, backend, reference, rotation_base)
+
+    monkeypatch.setattr(service, "_generate", generate_during_save)
+    first, meta = service.result(WEEK)
+    assert meta["input_hash"] == read_hash
+
+    second, changed = service.result(WEEK)
+    assert changed["cached"] is False
+    assert changed["input_hash"] != read_hash
+    assert len(second["assignments"]) == len(first["assignments"]) - 1
+
+
+def test_concurrent_requests_share_one_run(service, counted):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.result(WEEK)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counted == [(WEEK, "numpy")]
+    assert sorted(meta["cached"] for _, meta in results) == [False, True, True, True]
+
+
+def test_old_results_are_evicted(service, counted):
+    service.max_cached = 1
+    service.result(WEEK)
+    service.result(WEEK, "pandas")
+    service.result(WEEK)
+    assert len(counted) == 3
+    assert service.health()["cached_results"] == 1
+
+
+@pytest.fixture
+def server(service):
+    server = make_server(port=0, service=service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.headers, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode()
+
+
+def test_http_endpoints(server, history):
+    status, _, body = get(f"{server}/health")
+    assert status == 200
+    assert json.loads(body)["history_weeks"] == [WEEK - 1]
+
+    status, _, body = get(f"{server}/weeks/{WEEK}")
+    payload = json.loads(body)
+    assert status == 200
+    assert (payload["week"], payload["backend"]) == (WEEK, "numpy")
+    assert len(payload["assignments"]) == len(history)
+
+    status, _, body = get(f"{server}/weeks/{WEEK}/problem_brigades?backend=pandas")
+    assert status == 200
+    assert json.loads(body)["problem_brigades"] == []
+
+    status, headers, body = get(f"{server}/weeks/{WEEK}/summary")
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/plain")
+    assert body.endswith("\n")
+
+
+@pytest.mark.parametrize(
+    "path, status",
+    [("/nope", 404), ("/weeks/60", 400), (f"/weeks/{WEEK}?backend=gpu", 400)],
+)
+def test_http_errors(server, path, status):
+    code, _, body = get(f"{server}{path}")
+    assert code == status
+    assert "error" in json.loads(body)
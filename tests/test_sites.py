@@ -0,0 +1,150 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from conftest import ASSIGNMENT_COLUMNS, DATA_DIR, WEEK
+from data_cache import REFERENCE_FILES
+from history_store import HistoryStore
+from sites import MultiSiteScheduler, load_sites
+
+SOURCE_FILES = [*REFERENCE_FILES.values(), "assignment_history.csv"]
+
+
+def copy_site(root, name, prefix=None):
+    """Копия data/ как площадка name; prefix заменяет префикс W у worker_id."""
+    site_dir = root / name
+    site_dir.mkdir(parents=True)
+    for file_name in SOURCE_FILES:
+        shutil.copy(os.path.join(DATA_DIR, file_name), site_dir / file_name)
+    if prefix:
+        for file_name in ("workers.csv", "assignment_history.csv"):
+            df = pd.read_csv(site_dir / file_name)
+            df["worker_id"] = df["worker_id"].str.replace("W", prefix, regex=False)
+            df.to_csv(site_dir / file_name, index=False, encoding="utf-8-sig")
+    return site_dir
+
+
+@pytest.fixture
+def sites_dir(tmp_path):
+    root = tmp_path / "sites"
+    copy_site(root, "north")
+    copy_site(root, "south", prefix="S")
+    (root / "notes").mkdir()
+    return root
+
+
+def assignments(df):
+    df = df[ASSIGNMENT_COLUMNS].astype(
+        {"shift": object, "machine_id": object, "worker_id": object}
+    )
+    return df.sort_values(["shift", "machine_id", "position"], ignore_index=True)
+
+
+def test_load_sites(sites_dir):
+    sites = load_sites(str(sites_dir), use_cache=False)
+    assert list(sites) == ["north", "south"]
+    assert isinstance(sites["south"]["schedule"], HistoryStore)
+    assert sites["south"]["workers"]["worker_id"].str.startswith("S").all()
+    assert sites["south"]["schedule"].weeks() == [WEEK - 1]
+
+
+def test_empty_root_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="нет площадок"):
+        load_sites(str(tmp_path))
+
+
+def test_shared_worker_ids_are_rejected(tmp_path):
+    copy_site(tmp_path, "a")
+    copy_site(tmp_path, "b")
+    with pytest.raises(ValueError, match="worker_id повторяются"):
+        MultiSiteScheduler(load_sites(str(tmp_path), use_cache=False))
+
+
+def test_single_site_matches_single_run(tmp_path, generate):
+    copy_site(tmp_path, "main")
+    scheduler = MultiSiteScheduler(load_sites(str(tmp_path), use_cache=False))
+    report = scheduler.run(WEEK)
+    combined, _ = generate()
+    final = report.final_assignments_df
+    assert set(final["site"]) == {"main"}
+    assert (final["home_site"] == "main").all()
+    pd.testing.assert_frame_equal(assignments(final), assignments(combined))
+
+
+def test_sites_are_scheduled_independently(sites_dir, generate):
+    scheduler = MultiSiteScheduler(load_sites(str(sites_dir), use_cache=False))
+    final = scheduler.run(WEEK).final_assignments_df
+    expected = assignments(generate()[0])
+
+    north = assignments(final[final["site"] == "north"])
+    south = assignments(final[final["site"] == "south"])
+    pd.testing.assert_frame_equal(north, expected)
+    south["worker_id"] = south["worker_id"].str.replace("S", "W", regex=False)
+    pd.testing.assert_frame_equal(south, expected)
+
+    summary = scheduler.report.site_summary().set_index("site")
+    assert summary["assigned"].tolist() == [len(expected)] * 2
+
+
+def test_lending_fills_other_sites(sites_dir):
+    # На north две машины недели стоят — их бригады свободны; на south
+    # половины штата нет — там вакансии
+    plan = pd.read_csv(sites_dir / "north" / "plan.csv")
+    stopped = (plan["week"] == WEEK) & plan["machine_id"].isin(["PM-01", "PM-02"])
+    plan.loc[stopped, ["night", "day", "evening"]] = False
+    plan.to_csv(sites_dir / "north" / "plan.csv", index=False)
+    history = pd.read_csv(sites_dir / "south" / "assignment_history.csv")
+    history.iloc[::2].to_csv(
+        sites_dir / "south" / "assignment_history.csv", index=False
+    )
+    sites = load_sites(str(sites_dir), use_cache=False)
+
+    plain = MultiSiteScheduler(sites).run(WEEK)
+    scheduler = MultiSiteScheduler(sites, lending=True)
+    report = scheduler.run(WEEK)
+    lent = scheduler.lent
+
+    assert not lent.empty
+    assert (lent["home_site"] == "north").all()
+    assert (lent["site"] == "south").all()
+    final = report.final_assignments_df
+    assert final["worker_id"].is_unique
+    guests = final[final["worker_id"].isin(lent["worker_id"])]
+    assert (guests["site"] == "south").all()
+    assert (guests["home_site"] == "north").all()
+    assert len(final) > len(plain.final_assignments_df)
+
+    scheduler.save(WEEK)
+    saved = sites["north"]["schedule"].read_week(WEEK)
+    assert set(lent["worker_id"]) <= set(saved["worker_id"])
+
+
+def test_run_range_rotates_each_site(sites_dir, generate):
+    sites = load_sites(str(sites_dir), use_cache=False)
+    combined, reports = MultiSiteScheduler(sites).run_range(WEEK, WEEK + 1)
+    assert sorted(reports) == [WEEK, WEEK + 1]
+    expected, _ = generate(end=WEEK + 1)
+    north = combined[combined["site"] == "north"]
+    for week in (WEEK, WEEK + 1):
+        pd.testing.assert_frame_equal(
+            assignments(north[north["week"] == week]),
+            assignments(expected[expected["week"] == week]),
+        )
+    assert not os.path.exists(sites_dir / "north" / "history" / f"week_{WEEK}.csv")
+
+
+def test_site_frames_are_not_modified(sites_dir):
+    sites = load_sites(str(sites_dir), use_cache=False)
+    for site in sites.values():
+        # Без plan_long DataPipeline сам готовит workers и план
+        del site["plan_long"]
+        site["workers"] = site["workers"].drop(columns="primary_profession")
+    frames = ("workers", "equipment", "requirements", "plan")
+    before = {
+        (name, frame): sites[name][frame].copy() for name in sites for frame in frames
+    }
+    MultiSiteScheduler(sites, lending=True).run(WEEK)
+    for (name, frame), expected in before.items():
+        pd.testing.assert_frame_equal(sites[name][frame], expected)
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from benchmarks.run_benchmarks import benchmark
+from benchmarks.synthetic import make_plant
+from scheduler import PROFESSIONS
+
+
+def test_plant_is_deterministic_per_seed():
+    first, second = make_plant(200, seed=3), make_plant(200, seed=3)
+    for name in first:
+        pd.testing.assert_frame_equal(first[name], second[name])
+    other = make_plant(200, seed=4)
+    assert not first["workers"].equals(other["workers"])
+
+
+def test_plant_shape():
+    plant = make_plant(400, week=12)
+    workers, equipment = plant["workers"], plant["equipment"]
+    assert len(workers) == 400
+    assert workers["worker_id"].is_unique
+    assert len(equipment) == 400 // 8
+    assert set(equipment["machine_type"]) <= set(PROFESSIONS)
+    assert (workers[PROFESSIONS].max(axis=1) >= 3).all()
+
+    crew = plant["requirements"].groupby("machine_type")["position"].count()
+    assert (
+        equipment["operators_needed"]
+        == crew.reindex(equipment["machine_type"]).to_numpy()
+    ).all()
+    assert (plant["plan"]["week"] == 12).all()
+    assert set(plant["plan"]["machine_id"]) == set(equipment["machine_id"])
+    assert (plant["history"]["week"] == 11).all()
+    assert set(plant["history"]["worker_id"]) <= set(workers["worker_id"])
+
+
+def test_many_professions_keep_skills_sparse():
+    plant = make_plant(1000, n_professions=30)
+    types = [c for c in plant["workers"].columns if c.startswith("type_")]
+    assert len(PROFESSIONS) + len(types) == 30
+    skills_per_worker = (plant["workers"].iloc[:, 2:] > 0).sum(axis=1)
+    assert skills_per_worker.mean() < 4
+    assert set(plant["requirements"]["machine_type"]) >= set(types)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "pandas"])
+def test_benchmark_reports_every_stage(backend):
+    result = benchmark(100, backend, repeat=1, seed=0)
+    stages = [stage["stage"] for stage in result["stages"]]
+    assert stages[:4] == ["prepare", "rotation", "slots", "engine init"]
+    assert stages[-1] == "report"
+    assert result["total_s"] == pytest.approx(
+        sum(stage["seconds"] for stage in result["stages"])
+    )
+    assert result["peak_bytes"] > 0
@@ -0,0 +1,130 @@
+import json
+
+import pandas as pd
+import pytest
+
+import cli
+from conftest import DATA_DIR, WEEK
+from scheduler import DataPipeline
+from validation import (
+    ISSUE_COLUMNS,
+    InputValidationError,
+    check_inputs,
+    validate_inputs,
+)
+
+
+@pytest.fixture
+def tables(reference, history):
+    return {
+        "workers": reference["workers"].copy(),
+        "equipment": reference["equipment"].copy(),
+        "requirements": reference["requirements"].copy(),
+        "plan": reference["plan"].copy(),
+        "schedule": history[["worker_id", "week", "shift"]].copy(),
+    }
+
+
+def issues_of(tables):
+    issues = validate_inputs(**tables)
+    assert issues.columns.tolist() == ISSUE_COLUMNS
+    return {(i.severity, i.check, i.table, i.column): i for i in issues.itertuples()}
+
+
+def test_bundled_data_is_clean(tables):
+    assert validate_inputs(**tables).empty
+    assert check_inputs(**tables).empty
+
+
+def test_errors(tables):
+    tables["plan"].loc[0, "machine_id"] = "XX-01"
+    tables["plan"] = tables["plan"].astype({"day": object})
+    tables["plan"].loc[1, "day"] = "yes"
+    tables["equipment"] = pd.concat(
+        [tables["equipment"], tables["equipment"].iloc[:1]], ignore_index=True
+    )
+    tables["requirements"] = tables["requirements"].astype({"min_rank": float})
+    tables["requirements"].loc[0, "min_rank"] = 4.5
+    tables["schedule"].loc[0, "shift"] = "morning"
+    tables["workers"].loc[0, "inkjet_printing"] = -1
+
+    found = issues_of(tables)
+    plan = found[("error", "reference", "plan", "machine_id")]
+    assert (plan.count, plan.sample) == (1, "XX-01")
+    assert ("error", "type", "plan", "day") in found
+    assert found[("error", "duplicate", "equipment", "machine_id")].sample == "PM-01"
+    assert ("error", "type", "requirements", "min_rank") in found
+    assert found[("error", "domain", "schedule", "shift")].sample == "morning"
+    assert found[("error", "type", "workers", "inkjet_printing")].sample == "-1"
+    assert all(severity == "error" for severity, *_ in found)
+
+    with pytest.raises(InputValidationError) as excinfo:
+        check_inputs(**tables)
+    assert len(excinfo.value.issues) == len(found)
+    assert str(excinfo.value).startswith(f"Ошибки во входных данных ({len(found)}):")
+
+
+def test_missing_columns_skip_dependent_checks(tables):
+    tables["plan"] = tables["plan"].drop(columns="night")
+    found = issues_of(tables)
+    assert list(found) == [("error", "columns", "plan", "*")]
+    assert found[("error", "columns", "plan", "*")].sample == "night"
+
+
+def test_warnings_do_not_stop_the_pipeline(tables):
+    tables["schedule"].loc[0, "worker_id"] = "W999"
+    tables["workers"].loc[0, "flat_printing"] = None
+    extra = tables["requirements"].iloc[:1].assign(machine_type="laser")
+    tables["requirements"] = pd.concat(
+        [tables["requirements"], extra], ignore_index=True
+    )
+
+    warnings = check_inputs(**tables)
+    assert set(warnings["severity"]) == {"warning"}
+    assert set(zip(warnings["table"], warnings["column"])) == {
+        ("schedule", "worker_id"),
+        ("workers", "flat_printing"),
+        ("requirements", "machine_type"),
+    }
+
+    pipeline = DataPipeline(
+        tables["workers"],
+        tables["equipment"],
+        tables["schedule"],
+        tables["requirements"],
+        tables["plan"],
+    )
+    assert len(pipeline.issues) == 3
+    pipeline.run(WEEK)
+
+
+def test_pipeline_rejects_bad_input(tables):
+    tables["plan"].loc[0, "machine_id"] = None
+    with pytest.raises(InputValidationError, match="plan.machine_id"):
+        DataPipeline(
+            tables["workers"],
+            tables["equipment"],
+            tables["schedule"],
+            tables["requirements"],
+            tables["plan"],
+        )
+
+
+def test_cli_reports_issues(tmp_path, capsys):
+    for file_name in ("workers.csv", "equipment.csv", "position_requirements.csv"):
+        pd.read_csv(f"{DATA_DIR}/{file_name}").to_csv(tmp_path / file_name, index=False)
+    plan = pd.read_csv(f"{DATA_DIR}/plan.csv")
+    plan.loc[0, "machine_id"] = "XX-01"
+    plan.to_csv(tmp_path / "plan.csv", index=False)
+    pd.read_csv(f"{DATA_DIR}/assignment_history.csv").to_csv(
+        tmp_path / "assignment_history.csv", index=False
+    )
+
+    code = cli.main(
+        ["--week", str(WEEK), "--data-dir", str(tmp_path), "--no-cache"]
+        + ["--output-dir", str(tmp_path / "out")]
+    )
+    status = json.loads(capsys.readouterr().out)
+    assert code == cli.EXIT_INPUT
+    assert status["status"] == "input_error"
+    assert [issue["column"] for issue in status["issues"]] == ["machine_id"]
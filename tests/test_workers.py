@@ -0,0 +1,141 @@
+import os
+import shutil
+
+import pandas as pd
+
+from conftest import DATA_DIR, WEEK
+from data_cache import REFERENCE_FILES, load_reference_data
+from scheduler import DataPipeline, generate_range
+
+
+def rowwise_primary(workers, columns):
+    primary = []
+    for _, row in workers.iterrows():
+        ranks = [(row[c], -i, c) for i, c in enumerate(columns) if row[c] > 0]
+        primary.append(max(ranks)[2] if ranks else None)
+    return primary
+
+
+def test_primary_matches_rowwise_choice(reference):
+    workers = reference["workers"].drop(columns="primary_profession")
+    columns = DataPipeline.rank_columns(workers, reference["equipment"])
+    prepared = DataPipeline.prepare_workers(workers.copy(), columns)
+    assert prepared["primary_profession"].tolist() == rowwise_primary(workers, columns)
+
+
+def test_profession_names_lists_every_skill(reference):
+    workers = reference["workers"]
+    professions = DataPipeline.rank_columns(workers, reference["equipment"])
+    skills = DataPipeline.build_skills(workers, professions)
+    names = DataPipeline.profession_names(workers["worker_id"], skills)
+
+    for worker_id, text in zip(workers["worker_id"], names):
+        row = workers.loc[workers["worker_id"] == worker_id].iloc[0]
+        expected = [p for p in professions if row[p] > 0]
+        assert text == ", ".join(expected)
+    unknown = DataPipeline.profession_names(pd.Series(["W999"]), skills)
+    assert unknown.tolist() == [""]
+
+
+def make_workers():
+    return pd.DataFrame(
+        {
+            "worker_id": ["A", "B", "C", "D"],
+            "name": ["a", "b", "c", "d"],
+            "flat_printing": [3, 5, 0, 0],
+            "binding": [7, 5, 0, 0],
+            "inkjet_printing": [1, 0, 2, 0],
+        }
+    )
+
+
+def make_equipment():
+    return pd.DataFrame(
+        {
+            "machine_id": ["PM-01", "IJ-01", "LP-01"],
+            "machine_type": ["flat_printing", "inkjet_printing", "letterpress"],
+            "operators_needed": [2, 1, 1],
+        }
+    )
+
+
+def test_primary_ignores_columns_missing_from_equipment():
+    workers = make_workers()
+    professions = DataPipeline.discover_professions(workers, make_equipment())
+    workers = DataPipeline.prepare_workers(workers, professions)
+    # binding нет в equipment: ранг по нему старше, но это не профессия
+    assert workers["primary_profession"].tolist() == [
+        "flat_printing",
+        "flat_printing",
+        "inkjet_printing",
+        None,
+    ]
+
+
+def test_discover_professions_follows_rank_columns():
+    professions = DataPipeline.discover_professions(make_workers(), make_equipment())
+    assert professions == ["flat_printing", "inkjet_printing", "letterpress"]
+
+
+def test_skills_are_sparse_and_limited_to_professions():
+    workers = make_workers()
+    professions = DataPipeline.discover_professions(workers, make_equipment())
+    skills = DataPipeline.build_skills(workers, professions)
+    assert list(skills.itertuples(index=False, name=None)) == [
+        ("A", "flat_printing", 3),
+        ("B", "flat_printing", 5),
+        ("A", "inkjet_printing", 1),
+        ("C", "inkjet_printing", 2),
+    ]
+    empty = DataPipeline.build_skills(workers, ["letterpress"])
+    assert empty.empty
+    assert empty.columns.tolist() == ["worker_id", "profession", "rank"]
+
+
+def test_pipeline_primary_follows_equipment(reference, history):
+    workers = reference["workers"].drop(columns="primary_profession")
+    equipment = reference["equipment"]
+    kept = equipment["machine_type"] != "flat_printing"
+    plan = reference["plan"]
+    pipeline = DataPipeline(
+        workers.copy(),
+        equipment[kept],
+        history[["worker_id", "week", "shift"]],
+        reference["requirements"],
+        plan[plan["machine_id"].isin(equipment.loc[kept, "machine_id"])],
+    )
+    assert "flat_printing" not in pipeline.professions
+    assert pipeline.workers["primary_profession"].tolist() == rowwise_primary(
+        workers, DataPipeline.rank_columns(workers, equipment[kept])
+    )
+
+
+def test_extra_numeric_column_is_not_a_profession(tmp_path, history):
+    for file_name in REFERENCE_FILES.values():
+        shutil.copy(os.path.join(DATA_DIR, file_name), tmp_path / file_name)
+    workers = pd.read_csv(tmp_path / "workers.csv")
+    # Стаж больше любого ранга: по всем числовым столбцам он стал бы основной
+    workers["experience_years"] = 20
+    workers.to_csv(tmp_path / "workers.csv", index=False)
+
+    reference = load_reference_data(str(tmp_path), cache_path=None)
+    expected = load_reference_data(DATA_DIR, cache_path=None)
+    assert "experience_years" not in DataPipeline.rank_columns(
+        reference["workers"], reference["equipment"]
+    )
+    assert (
+        reference["workers"]["primary_profession"].tolist()
+        == expected["workers"]["primary_profession"].tolist()
+    )
+
+    combined, _ = generate_range(
+        reference["workers"],
+        reference["equipment"],
+        history,
+        reference["requirements"],
+        reference["plan"],
+        WEEK,
+        WEEK,
+        plan_long=reference["plan_long"],
+    )
+    assert combined["worker_id"].notna().sum() == 60
@@ -54,6 +54,14 @@ class Ui_MainWindow(object):
         self.save_button = QtWidgets.QPushButton(self.tab)
         self.save_button.setObjectName("save_button")
         self.verticalLayout_2.addWidget(self.save_button)
+        self.cancel_button = QtWidgets.QPushButton(self.tab)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.setObjectName("cancel_button")
+        self.verticalLayout_2.addWidget(self.cancel_button)
+        self.progress_bar = QtWidgets.QProgressBar(self.tab)
+        self.progress_bar.setProperty("value", 0)
+        self.progress_bar.setObjectName("progress_bar")
+        self.verticalLayout_2.addWidget(self.progress_bar)
         spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
         self.verticalLayout_2.addItem(spacerItem)
         self.horizontalLayout.addLayout(self.verticalLayout_2)
@@ -112,6 +120,14 @@ class Ui_MainWindow(object):
         self.problem_brigades_table.setObjectName("problem_brigades_table")
         self.horizontalLayout_10.addWidget(self.problem_brigades_table)
         self.tabWidget_2.addTab(self.tab_5, "")
+        self.tab_6 = QtWidgets.QWidget()
+        self.tab_6.setObjectName("tab_6")
+        self.horizontalLayout_11 = QtWidgets.QHBoxLayout(self.tab_6)
+        self.horizontalLayout_11.setObjectName("horizontalLayout_11")
+        self.stats_table = QtWidgets.QTableView(self.tab_6)
+        self.stats_table.setObjectName("stats_table")
+        self.horizontalLayout_11.addWidget(self.stats_table)
+        self.tabWidget_2.addTab(self.tab_6, "")
         self.verticalLayout_5.addWidget(self.tabWidget_2)
         self.tabWidget.addTab(self.tab, "")
         self.tab_3 = QtWidgets.QWidget()
@@ -161,12 +177,16 @@ class Ui_MainWindow(object):
         self.label.setText(_translate("MainWindow", "Выберите неделю для генерации:"))
         self.generate_button.setText(_translate("MainWindow", "ЗАПУСТИТЬ ГЕНЕРАЦИЮ"))
         self.save_button.setText(_translate("MainWindow", "Сохранить"))
+        self.cancel_button.setText(_translate("MainWindow", "Отменить"))
         self.tabWidget_2.setTabText(self.tabWidget_2.indexOf(self.tab_8), _translate("MainWindow", "Все смены"))
         self.tabWidget_2.setTabText(self.tabWidget_2.indexOf(self.tab_9), _translate("MainWindow", "Ночь"))
         self.tabWidget_2.setTabText(self.tabWidget_2.indexOf(self.tab_10), _translate("MainWindow", "День"))
         self.tabWidget_2.setTabText(self.tabWidget_2.indexOf(self.tab_11), _translate("MainWindow", "Вечер"))
         self.tabWidget_2.setTabText(self.tabWidget_2.indexOf(self.tab_4), _translate("MainWindow", "Без позиции"))
         self.tabWidget_2.setTabText(self.tabWidget_2.indexOf(self.tab_5), _translate("MainWindow", "Проблемные бригады"))
+        self.tabWidget_2.setTabText(
+            self.tabWidget_2.indexOf(self.tab_6), _translate("MainWindow", "Статистика")
+        )
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab), _translate("MainWindow", "Генерация"))
         self.view_history_button.setText(_translate("MainWindow", "Исторический график"))
         self.view_equipment_button.setText(_translate("MainWindow", "Оборудование"))
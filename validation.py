@@ -0,0 +1,253 @@
+"""
+Проверка входных данных до запуска DataPipeline.
+
+Ошибки во входных CSV (машина плана без строки в equipment, тип машины без
+требований к позициям, дубли ключей, нечисловые ранги) иначе всплывают
+глубоко в движке или в отчёте. validate_inputs проверяет ссылочную
+целостность и типы векторно (isin / duplicated / to_numeric по столбцам) и
+возвращает все найденные проблемы одной таблицей; check_inputs бросает
+InputValidationError, если среди них есть ошибки.
+"""
+
+import pandas as pd
+
+SHIFTS = ("night", "day", "evening")
+ISSUE_COLUMNS = ["severity", "check", "table", "column", "count", "sample", "message"]
+
+# Обязательные столбцы по таблицам
+REQUIRED_COLUMNS = {
+    "workers": ["worker_id"],
+    "equipment": ["machine_id", "machine_type"],
+    "requirements": ["machine_type", "position", "min_rank"],
+    "plan": ["week", "machine_id", *SHIFTS],
+    "schedule": ["worker_id", "week", "shift"],
+}
+# Ключи, уникальные в пределах таблицы
+UNIQUE_KEYS = {
+    "workers": ["worker_id"],
+    "equipment": ["machine_id"],
+    "requirements": ["machine_type", "position"],
+    "plan": ["week", "machine_id"],
+}
+SAMPLE_SIZE = 5
+
+
+def rank_columns(workers, equipment):
+    """Столбцы рангов workers: столбцы, названные типами машин equipment."""
+    types = set(equipment["machine_type"].dropna())
+    return [c for c in workers.columns if c in types]
+
+
+class InputValidationError(ValueError):
+    """Во входных данных есть ошибки; все проблемы — в атрибуте issues."""
+
+    def __init__(self, issues):
+        self.issues = issues
+        errors = issues[issues["severity"] == "error"]
+        lines = [f"Ошибки во входных данных ({len(errors)}):"]
+        lines += [f"  - {message}" for message in errors["message"]]
+        super().__init__("\n".join(lines))
+
+
+class _Issues(list):
+    """Накопитель проблем; каждая — строка будущего DataFrame ISSUE_COLUMNS."""
+
+    def add(self, severity, check, table, column, values, message):
+        values = pd.Series(values).drop_duplicates()
+        if values.empty:
+            return
+        sample = ", ".join(map(str, values.head(SAMPLE_SIZE)))
+        if len(values) > SAMPLE_SIZE:
+            sample += ", ..."
+        self.append(
+            {
+                "severity": severity,
+                "check": check,
+                "table": table,
+                "column": column,
+                "count": len(values),
+                "sample": sample,
+                "message": f"{table}.{column}: {message} ({len(values)}: {sample})",
+            }
+        )
+
+
+def _not_integer(series):
+    """Значения series, которые не являются целыми числами (включая пропуски)."""
+    numbers = pd.to_numeric(series, errors="coerce")
+    bad = numbers.isna() | (numbers % 1 != 0)
+    return series[bad]
+
+
+def validate_inputs(workers, equipment, requirements, plan, schedule=None):
+    """
+    Проверяет справочники (и, если передан, исторический график).
+
+    Ошибки (severity="error") — данные, на которых пайплайн выдаст неверный
+    результат или упадёт: нет обязательного столбца, пропуск или дубль
+    ключа, машина плана не найдена в equipment, у работающей по плану машины
+    тип без требований, нецелые недели/ранги/позиции, неизвестные смены.
+    Предупреждения (severity="warning") — данные, которые пайплайн
+    переживёт: работник из истории уволен (нет в workers), требования к
+    типу машины, которого нет в equipment, пропуски рангов.
+
+    Args:
+        workers, equipment, requirements, plan: DataFrame справочников.
+        schedule: DataFrame истории (worker_id/week/shift) или None.
+
+    Returns:
+        DataFrame проблем со столбцами ISSUE_COLUMNS (пустой, если всё в порядке).
+    """
+    tables = {
+        "workers": workers,
+        "equipment": equipment,
+        "requirements": requirements,
+        "plan": plan,
+    }
+    if schedule is not None:
+        tables["schedule"] = schedule
+    issues = _Issues()
+
+    # --- Структура: обязательные столбцы, пропуски и дубли ключей
+    complete = {}
+    for table, frame in tables.items():
+        missing = [c for c in REQUIRED_COLUMNS[table] if c not in frame.columns]
+        issues.add("error", "columns", table, "*", missing, "нет столбцов")
+        complete[table] = not missing
+        if missing:
+            continue
+
+        for column in REQUIRED_COLUMNS[table]:
+            if frame[column].isna().any():
+                rows = frame.index[frame[column].isna()]
+                issues.add(
+                    "error", "null", table, column, rows, "пустые значения (строки)"
+                )
+
+        keys = UNIQUE_KEYS.get(table)
+        if keys:
+            dup = frame[frame.duplicated(keys, keep=False)]
+            values = dup[keys[0]].astype(str)
+            for key in keys[1:]:
+                values = values + "/" + dup[key].astype(str)
+            issues.add("error", "duplicate", table, "/".join(keys), values, "дубли")
+
+    # --- Типы
+    if complete["requirements"]:
+        for column in ("position", "min_rank"):
+            issues.add(
+                "error",
+                "type",
+                "requirements",
+                column,
+                _not_integer(requirements[column]),
+                "не целое число",
+            )
+    if complete["plan"]:
+        issues.add(
+            "error",
+            "type",
+            "plan",
+            "week",
+            _not_integer(plan["week"]),
+            "не целое число",
+        )
+        for column in SHIFTS:
+            flags = plan[column]
+            bad = flags[~flags.isin([True, False])]
+            issues.add("error", "type", "plan", column, bad, "не True/False")
+    if "schedule" in tables and complete["schedule"]:
+        issues.add(
+            "error",
+            "type",
+            "schedule",
+            "week",
+            _not_integer(schedule["week"]),
+            "не целое число",
+        )
+        shifts = schedule["shift"]
+        issues.add(
+            "error",
+            "domain",
+            "schedule",
+            "shift",
+            shifts[~shifts.isin(SHIFTS)],
+            f"смена не из {', '.join(SHIFTS)}",
+        )
+    if complete["equipment"]:
+        for column in rank_columns(workers, equipment):
+            ranks = pd.to_numeric(workers[column], errors="coerce")
+            bad = workers.loc[
+                ranks.isna() & workers[column].notna() | (ranks < 0) | (ranks % 1 > 0),
+                column,
+            ]
+            issues.add("error", "type", "workers", column, bad, "ранг не целое >= 0")
+            issues.add(
+                "warning",
+                "null",
+                "workers",
+                column,
+                workers.loc[workers[column].isna(), "worker_id"],
+                "нет ранга, считается 0 (worker_id)",
+            )
+
+    # --- Ссылочная целостность
+    if complete["plan"] and complete["equipment"]:
+        known = plan["machine_id"].isin(equipment["machine_id"])
+        issues.add(
+            "error",
+            "reference",
+            "plan",
+            "machine_id",
+            plan.loc[~known, "machine_id"],
+            "машины нет в equipment",
+        )
+        if complete["requirements"]:
+            works = plan[list(SHIFTS)].isin([True]).any(axis=1)
+            planned = equipment.loc[
+                equipment["machine_id"].isin(plan.loc[works, "machine_id"]),
+                "machine_type",
+            ]
+            issues.add(
+                "error",
+                "reference",
+                "requirements",
+                "machine_type",
+                planned[~planned.isin(requirements["machine_type"])],
+                "у типа работающей по плану машины нет требований к позициям",
+            )
+    if complete["requirements"] and complete["equipment"]:
+        types = requirements["machine_type"]
+        issues.add(
+            "warning",
+            "reference",
+            "requirements",
+            "machine_type",
+            types[~types.isin(equipment["machine_type"])],
+            "типа нет в equipment",
+        )
+    if "schedule" in tables and complete["schedule"] and complete["workers"]:
+        ids = schedule["worker_id"]
+        issues.add(
+            "warning",
+            "reference",
+            "schedule",
+            "worker_id",
+            ids[~ids.isin(workers["worker_id"])],
+            "работника нет в workers",
+        )
+
+    return pd.DataFrame(list(issues), columns=ISSUE_COLUMNS)
+
+
+def check_inputs(workers, equipment, requirements, plan, schedule=None):
+    """
+    validate_inputs + InputValidationError, если есть ошибки.
+
+    Returns:
+        DataFrame предупреждений (пустой, если их нет).
+    """
+    issues = validate_inputs(workers, equipment, requirements, plan, schedule)
+    if (issues["severity"] == "error").any():
+        raise InputValidationError(issues)
+    return issues.reset_index(drop=True)